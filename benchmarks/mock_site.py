@@ -0,0 +1,170 @@
+"""
+Synthetic, local stand-in for the expeditions site, for load-testing the scraper without the network.
+
+Serves a departures listing at /book and a booking page for every /book/<trip>/<departure> link,
+built from the benchmark fixtures (so they carry the same selectors the parsers depend on), with
+configurable catalogue size and injected latency, 503 failures, stalled responses and flaky drawers:
+
+    python benchmarks/mock_site.py --trips 1000 --latency-ms 150 --failure-rate 0.02 --flaky-drawers 0.05
+    BASE_URL=http://127.0.0.1:8765 python src/main.py --shard 0/1
+
+Running as a shard writes output/shards instead of publishing to S3. GET /stats returns what was served.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import urlencode, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+DEFAULT_SETTINGS: dict[str, Any] = {
+    # Catalogue size
+    "trips": 100,
+    "departures": 10,
+    "categories": 8,
+    "cabins": 4,
+    "waitlisted": 4,  # every Nth category is waitlisted (0 = none)
+    # Server-side injection, drawn per request from a seeded generator
+    "latency_ms": 0,
+    "jitter_ms": 0,
+    "failure_rate": 0.0,  # booking pages answered with 503
+    "stall_rate": 0.0,  # booking pages held for stall_s before answering (to hit goto timeouts)
+    "stall_s": 65.0,
+    # Client-side injection inside the pages
+    "click_delay_ms": 50,  # before "Show more" results and drawers appear
+    "flaky_drawers": 0.0,  # probability that "See available cabins" never opens its drawer
+    "seed": 1,
+}
+
+class MockExpeditionSite:
+    """
+    Threaded HTTP server for the mock site. Use as a context manager; `base_url` is set while running.
+    """
+
+    def __init__(self, port: int = 0, **settings: Any) -> None:
+        unknown = set(settings) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown mock site settings: {', '.join(sorted(unknown))}")
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+        self.port = port
+        self.base_url = ""
+        self.stats = {"listing": 0, "booking": 0, "failures": 0, "stalls": 0, "other": 0}
+        self._lock = threading.Lock()
+        self._random = random.Random(self.settings["seed"])
+        self._pages = {}
+        for name in ("listing", "category"):
+            with open(os.path.join(FIXTURES_DIR, f"{name}.html"), encoding="utf-8") as f:
+                self._pages[name] = f.read()
+        self._server: ThreadingHTTPServer | None = None
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _draw(self) -> tuple[float, float]:
+        """
+        Returns (random draw for failure injection, latency in seconds) for one request.
+        """
+        with self._lock:
+            roll = self._random.random()
+            jitter = self._random.uniform(0, self.settings["jitter_ms"])
+        return roll, (self.settings["latency_ms"] + jitter) / 1000
+
+    def render(self, page: str, query: dict[str, Any]) -> bytes:
+        """
+        A fixture page with `query` injected as the settings its script reads.
+        """
+        script = f"<script>window.MOCK_QUERY = {json.dumps(urlencode(query))};</script>\n<script>"
+        return self._pages[page].replace("<script>", script, 1).encode("utf-8")
+
+    def respond(self, path: str) -> tuple[int, str, bytes, float]:
+        """
+        Returns (status, content type, body, delay in seconds) for a GET of `path`.
+        """
+        s = self.settings
+        roll, delay = self._draw()
+
+        if path == "/book":
+            self._count("listing")
+            query = {"trips": s["trips"], "departures": s["departures"], "delay": s["click_delay_ms"]}
+            return 200, "text/html; charset=utf-8", self.render("listing", query), delay
+
+        if path.startswith("/book/"):
+            self._count("booking")
+            if roll < s["failure_rate"]:
+                self._count("failures")
+                return 503, "text/plain", b"Service Unavailable", delay
+            if roll < s["failure_rate"] + s["stall_rate"]:
+                self._count("stalls")
+                delay += s["stall_s"]
+            # Per-page seed: the same booking URL always has the same flaky drawers
+            page_seed = int(hashlib.sha1(f"{s['seed']}{path}".encode()).hexdigest()[:8], 16)
+            query = {"categories": s["categories"], "cabins": s["cabins"], "waitlisted": s["waitlisted"],
+                     "delay": s["click_delay_ms"], "flaky": s["flaky_drawers"], "seed": page_seed}
+            return 200, "text/html; charset=utf-8", self.render("category", query), delay
+
+        if path == "/stats":
+            with self._lock:
+                return 200, "application/json", json.dumps(self.stats).encode("utf-8"), 0.0
+
+        self._count("other")
+        return 204, "text/plain", b"", 0.0
+
+    def __enter__(self) -> "MockExpeditionSite":
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                status, content_type, body, delay = site.respond(urlparse(self.path).path)
+                if delay:
+                    time.sleep(delay)
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The browser gave up on a stalled response
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description="Serve a synthetic expeditions site for load testing.")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    for name, default in DEFAULT_SETTINGS.items():
+        arg_parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    return arg_parser.parse_args(argv)
+
+def main(argv: list[str] | None = None) -> None:
+    args = vars(parse_args(argv))
+    port = args.pop("port")
+    with MockExpeditionSite(port, **args) as site:
+        print(f"Mock site running. Scrape it with:\n  BASE_URL={site.base_url} python src/main.py --shard 0/1")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print(f"Served: {site.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Offline benchmark of TripParser, fetch_departures and CategoryParser.
+
+Serves the fixture pages in benchmarks/fixtures from a local HTTP server, runs each parser
+against them and reports wall time, Playwright round trips and peak Python memory per phase.
+Results are saved as JSON under benchmarks/results so runs on different commits can be compared:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<earlier run>.json
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from category_parser import CategoryParser  # noqa: E402
+from config import BATCHED_EXTRACTION  # noqa: E402
+from departure_parser import fetch_departures  # noqa: E402
+from trip_parser import TripParser  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+# Fixture departures run into 2026; a far cutoff keeps the date filter from ending pagination
+FAR_END_DATE = "2099-12-31"
+
+# Sync API methods that cross to the browser; the rest only build locators client-side
+ROUND_TRIP_METHODS = (
+    "goto", "evaluate", "evaluate_all", "wait_for_selector", "wait_for_load_state", "count", "text_content",
+    "all_text_contents", "get_attribute", "click", "wait_for", "scroll_into_view_if_needed", "is_visible",
+)
+
+@contextmanager
+def fixture_server() -> Iterator[str]:
+    handler = functools.partial(_QuietHandler, directory=FIXTURES_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+@contextmanager
+def count_playwright_calls() -> Iterator[dict[str, int]]:
+    """
+    Counts calls to the round-trip methods of Page and Locator while the block runs.
+    """
+    from playwright.sync_api import Locator, Page
+
+    counts: dict[str, int] = {}
+    patched = []
+
+    def counting(label: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            counts[label] = counts.get(label, 0) + 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    for cls in (Page, Locator):
+        for name in ROUND_TRIP_METHODS:
+            method = cls.__dict__.get(name)
+            if method is not None:
+                setattr(cls, name, counting(f"{cls.__name__}.{name}", method))
+                patched.append((cls, name, method))
+    try:
+        yield counts
+    finally:
+        for cls, name, method in patched:
+            setattr(cls, name, method)
+
+def measure(run: Callable[[], int], repeat: int) -> dict[str, Any]:
+    """
+    Runs `run` (which returns the number of records it produced) `repeat` times.
+    """
+    walls = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        with count_playwright_calls() as calls:
+            started = time.perf_counter()
+            records = run()
+            walls.append(time.perf_counter() - started)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "wall_s_median": round(statistics.median(walls), 3),
+        "wall_s_min": round(min(walls), 3),
+        "playwright_calls": sum(calls.values()),
+        "calls_by_method": dict(sorted(calls.items())),
+        "peak_python_kib": peak // 1024,
+        "records": records,
+    }
+
+def run_phases(args: argparse.Namespace) -> dict[str, dict[str, Any]]:
+    from playwright.sync_api import sync_playwright
+
+    with fixture_server() as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        parser = TripParser(use_search_payloads=False)
+
+        def trip_listing() -> int:
+            page.goto(f"{base_url}/listing.html?trips={args.trips}&departures={args.departures}", timeout=60000)
+            page.wait_for_selector("[class^='hit_container__']", timeout=10000)
+            trips = parser._collect_trips_from_dom(page, args.trips, FAR_END_DATE)
+            return sum(len(trip["departures"]) for trip in trips)
+
+        def departures() -> int:
+            page.goto(f"{base_url}/listing.html?trips=1&departures={args.long_departures}", timeout=60000)
+            page.wait_for_selector("[class^='hit_container__']", timeout=10000)
+            trip = page.locator("[class^='hit_container__']").first
+            return len(fetch_departures(page, trip, end_date=FAR_END_DATE))
+
+        def categories() -> int:
+            url = f"{base_url}/category.html?categories={args.categories}&cabins={args.cabins}"
+            return len(CategoryParser(url, page).fetch_categories())
+
+        phases = {
+            "trip_listing": measure(trip_listing, args.repeat),
+            "departures": measure(departures, args.repeat),
+            "categories": measure(categories, args.repeat),
+        }
+        browser.close()
+    return phases
+
+def _git(*command: str) -> str:
+    try:
+        return subprocess.run(["git", *command], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> bool:
+    """
+    Prints per-phase changes against a baseline run. Returns False if any phase got slower
+    (median wall time) by more than `max_regression` or now makes more Playwright calls.
+    """
+    ok = True
+    print(f"\nCompared with {baseline.get('commit', '?')[:10]} ({baseline.get('created_at', '?')}):")
+    for name, phase in current["phases"].items():
+        before = baseline.get("phases", {}).get(name)
+        if before is None:
+            print(f"  {name:<14} (not in baseline)")
+            continue
+        wall_change = phase["wall_s_median"] / before["wall_s_median"] - 1 if before["wall_s_median"] else 0.0
+        call_change = phase["playwright_calls"] - before["playwright_calls"]
+        regressed = wall_change > max_regression or call_change > 0
+        ok &= not regressed
+        print(f"  {name:<14} wall {before['wall_s_median']:.3f}s -> {phase['wall_s_median']:.3f}s ({wall_change:+.0%}), "
+              f"calls {before['playwright_calls']} -> {phase['playwright_calls']} ({call_change:+d}), "
+              f"peak {before['peak_python_kib']} -> {phase['peak_python_kib']} KiB{'  ❌' if regressed else ''}")
+    return ok
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description="Benchmark the parsers against local fixture pages.")
+    arg_parser.add_argument("--trips", type=int, default=24, help="Trip cards on the listing page.")
+    arg_parser.add_argument("--departures", type=int, default=10, help="Departures per trip on the listing page.")
+    arg_parser.add_argument("--long-departures", type=int, default=40, help="Departures in the fetch_departures phase.")
+    arg_parser.add_argument("--categories", type=int, default=8, help="Category cards on the booking page.")
+    arg_parser.add_argument("--cabins", type=int, default=4, help="Cabins in each drawer.")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Runs per phase; the median wall time is reported.")
+    arg_parser.add_argument("--compare", metavar="RESULT_JSON", help="Earlier result file to compare against.")
+    arg_parser.add_argument("--max-regression", type=float, default=0.2,
+                            help="Allowed median wall-time increase before --compare fails (0.2 = 20%%).")
+    return arg_parser.parse_args(argv)
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_args(argv)
+
+    commit = _git("rev-parse", "HEAD")
+    result = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "settings": {key: value for key, value in vars(args).items() if key not in ("compare", "max_regression")}
+                    | {"batched_extraction": BATCHED_EXTRACTION},
+        "phases": run_phases(args),
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{result['created_at'][:19].replace(':', '')}-{commit[:10] or 'nogit'}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    for name, phase in result["phases"].items():
+        print(f"{name:<14} {phase['wall_s_median']:>7.3f}s  {phase['playwright_calls']:>5} calls  "
+              f"{phase['peak_python_kib']:>7} KiB peak  {phase['records']} records")
+    print(f"Saved {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            return 0 if compare(result, json.load(f), args.max_regression) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -84,9 +84,17 @@ resource "aws_iam_policy" "ecs_task_access" {
       {
         Sid : "S3UploadAccess",
         Effect : "Allow",
-        Action : ["s3:PutObject"],
+        # DeleteObject and AbortMultipartUpload clean up the staging key of streamed uploads
+        Action : ["s3:PutObject", "s3:GetObject", "s3:DeleteObject", "s3:AbortMultipartUpload"],
         Resource : "arn:aws:s3:::mytripdata8675309/*"
       },
+      {
+        # Lets HEAD on a missing key return 404 instead of 403
+        Sid : "S3ListAccess",
+        Effect : "Allow",
+        Action : ["s3:ListBucket"],
+        Resource : "arn:aws:s3:::mytripdata8675309"
+      },
       {
         Sid : "CloudFrontInvalidation",
         Effect : "Allow",
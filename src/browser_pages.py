@@ -0,0 +1,103 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any
+from config import BASE_URL, CONSENT_SESSION, STORAGE_STATE_MAX_AGE_HOURS, STORAGE_STATE_PATH
+from metrics import metrics
+from resource_blocking import ResourceBlocker
+
+BLOCKER_SELECTOR = 'div#wrapper[type="GDPR"], div#wrapper[type="CCPA"]'
+COOKIE_OK_SELECTOR = "button[data-style='button']"
+# The banner's button reads exactly "OK"; a substring match would also hit every "Book" button
+COOKIE_OK_TEXT = re.compile(r"^\s*ok\s*$", re.IGNORECASE)
+
+# Runs before any page script: removes the GDPR/CCPA wrappers as soon as they are inserted
+CONSENT_INIT_SCRIPT = """
+(() => {
+    const selector = 'div#wrapper[type="GDPR"], div#wrapper[type="CCPA"]';
+    const sweep = () => document.querySelectorAll(selector).forEach((el) => el.remove());
+    new MutationObserver(sweep).observe(document, { childList: true, subtree: true });
+    document.addEventListener("DOMContentLoaded", sweep);
+})();
+"""
+
+# True when neither a blocker wrapper nor the cookie "OK" button is on the page.
+# Mirrors the locators of the dismissal fallback (COOKIE_OK_SELECTOR filtered by COOKIE_OK_TEXT).
+CONSENT_CLEARED_JS = """
+([blockers, cookieButtons]) => !document.querySelector(blockers) &&
+    !Array.from(document.querySelectorAll(cookieButtons)).some((el) => /^\\s*ok\\s*$/i.test(el.textContent || ""))
+"""
+
+_state_lock = threading.Lock()
+_state_ready = False
+# Set when preparing the session failed, so later pages use plain contexts instead of retrying
+_state_failed = False
+
+def _state_is_fresh(path: str) -> bool:
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) < STORAGE_STATE_MAX_AGE_HOURS * 3600
+
+def prepare_storage_state(browser: Any, path: str = STORAGE_STATE_PATH, url: str = BASE_URL) -> str | None:
+    """
+    Accepts the cookie banner once and saves the session (cookies and local storage) as Playwright
+    storage state, reused by every page for STORAGE_STATE_MAX_AGE_HOURS. Returns None if that failed,
+    which is only attempted once per run.
+    """
+    global _state_ready, _state_failed
+    with _state_lock:
+        if _state_ready or _state_is_fresh(path):
+            _state_ready = True
+            return path
+        if _state_failed:
+            return None
+
+        context = browser.new_context()
+        try:
+            page = context.new_page()
+            page.goto(url, timeout=60000)
+            ok_button = page.locator(COOKIE_OK_SELECTOR).filter(has_text=COOKIE_OK_TEXT)
+            try:
+                ok_button.first.click(timeout=5000)
+                ok_button.first.wait_for(state="hidden", timeout=2000)
+            except Exception:
+                logging.info("No cookie banner to accept while preparing the browser session.")
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            context.storage_state(path=path)
+            _state_ready = True
+            logging.info(f"🍪 Saved consented browser session to {path}")
+            return path
+        except Exception as e:
+            logging.warning(f"⚠️ Could not prepare a consented browser session, using plain pages: {e}")
+            _state_failed = True
+            return None
+        finally:
+            context.close()
+
+def new_page(browser: Any, consent_session: bool = CONSENT_SESSION) -> Any:
+    """
+    Opens a page configured the same way for the listing, Phase 2 and pooled workers.
+    With a consent session, the page starts from the saved storage state and neutralizes blockers itself.
+    """
+    if consent_session:
+        state = prepare_storage_state(browser)
+        context = browser.new_context(storage_state=state) if state else browser.new_context()
+        context.add_init_script(CONSENT_INIT_SCRIPT)
+        page = context.new_page()
+    else:
+        page = browser.new_page()
+    ResourceBlocker().install(page)
+    return page
+
+def consent_cleared(page: Any) -> bool:
+    """
+    One round trip to check that no blocker or cookie banner needs dismissing. When False, callers
+    fall back to removing them explicitly.
+    """
+    try:
+        cleared = page.evaluate(CONSENT_CLEARED_JS, [BLOCKER_SELECTOR, COOKIE_OK_SELECTOR])
+    except Exception:
+        cleared = False
+    if not cleared:
+        metrics.count("consent_fallbacks")
+    return cleared
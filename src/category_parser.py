@@ -1,156 +1,314 @@
 import logging
 import time
-from config import BASE_URL
+from config import BASE_URL, BATCHED_EXTRACTION
 from typing import Any
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
+from browser_pages import BLOCKER_SELECTOR, COOKIE_OK_SELECTOR, COOKIE_OK_TEXT, consent_cleared
+from metrics import metrics
+from profiling import profiler
+from snapshots import snapshots
+from waits import NetworkTracker, wait_for_network_idle, wait_for_stable_count, wait_for_state
+
+CABIN_CARD_SELECTOR = "[data-testid='cabin-card']"
+CATEGORY_CARD_SELECTOR = "[data-testid='category-card']"
+
+# Reads the raw display fields of every category card in one round trip.
+# Mirrors the locators used by CategoryParser._read_category_fields.
+CATEGORY_CARDS_JS = """
+(cards) => cards.map((card) => {
+    const text = (el) => (el ? el.textContent : null);
+    const hasText = (el, needle) => (el.textContent || "").toLowerCase().includes(needle);
+    const deck = Array.from(card.querySelectorAll("span")).find((el) => hasText(el, "deck"));
+    const pax = card.querySelectorAll("[class*='pax-icons_'] svg");
+    const lastPax = pax.length ? pax[pax.length - 1] : null;
+    const sibling = lastPax ? lastPax.nextElementSibling : null;
+    const buttons = Array.from(card.querySelectorAll("button"));
+    return {
+        deck: text(deck),
+        category_name: text(card.querySelector("h3")),
+        pax_count: pax.length,
+        cabin_type: sibling && sibling.tagName === "SPAN" ? sibling.textContent : null,
+        price: text(card.querySelector("h2")),
+        has_see_available: buttons.some((el) => hasText(el, "see available cabins")),
+        has_join_waitlist: buttons.some((el) => hasText(el, "join waitlist")),
+    };
+})
+"""
+
+# Returns the <p> texts of every cabin card in an open drawer.
+DRAWER_CABINS_JS = """
+(cards) => cards.map((card) => Array.from(card.querySelectorAll("p"), (p) => p.textContent))
+"""
+
+def cabin_numbers_from_texts(card_texts: list[list[str | None]]) -> list[str]:
+    """
+    Distinct cabin numbers from the <p> texts of each cabin card, in drawer order.
+    """
+    seen = set()
+    cabin_numbers = []
+
+    for texts in card_texts:
+        for text_raw in texts:
+            text = text_raw.strip() if text_raw else ""
+            if text.isdigit() and text not in seen:
+                seen.add(text)
+                cabin_numbers.append(text)
+                # break removed to allow collection of multiple cabin numbers per card
+
+    return cabin_numbers
 
 class CategoryParser:
-    def __init__(self, booking_url: str, page: Any) -> None:
+    def __init__(self, booking_url: str, page: Any, batched: bool = BATCHED_EXTRACTION) -> None:
         if not booking_url.startswith("http"):
             booking_url = BASE_URL + booking_url
 
         self.booking_url = booking_url
         self.page = page
         self.categories: list[dict[str, Any]] = []
+        self.waitlisted: list[dict[str, Any]] = []
+        self.batched = batched
+        self.round_trips_saved = 0
+        self.retries = 0
 
         logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
         self.logger = logging.getLogger(__name__)
 
+    def _remove_blockers(self) -> None:
+        try:
+            self.page.evaluate("""
+                const gdpr = document.querySelector('div[type="GDPR"]#wrapper');
+                if (gdpr) gdpr.remove();
+
+                const ccpa = document.querySelector('div[type="CCPA"]#wrapper');
+                if (ccpa) ccpa.remove();
+
+                console.log("Removed known blocker elements.");
+            """)
+            self.logger.info("Forced removal of blockers if present.")
+            wait_for_state(self.page.locator(BLOCKER_SELECTOR), "detached", timeout_ms=2000,
+                           name="blocker_removal", budget_ms=2000)
+        except Exception as e:
+            self.logger.info(f"Could not remove blockers: {e}")
+
     def _dismiss_cookie_banner(self) -> None:
         try:
-            ok_button = self.page.locator("button[data-style='button']").filter(has_text="OK")
+            ok_button = self.page.locator(COOKIE_OK_SELECTOR).filter(has_text=COOKIE_OK_TEXT)
             if ok_button.count() > 0:
                 ok_button.first.click(timeout=5000)
                 self.logger.info("Dismissed cookie consent banner.")
-                time.sleep(1)
+                wait_for_state(ok_button, "hidden", timeout_ms=1000, name="cookie_banner", budget_ms=1000)
         except Exception as e:
             self.logger.warning(f"Cookie banner dismissal failed: {e}")
 
     def extract_available_cabins_from_drawer(self, page: Page) -> list[str]:
-        seen = set()
-        cabin_cards = page.locator("[data-testid='cabin-card']")
-        cabin_numbers = []
-
-        for i in range(cabin_cards.count()):
-            card = cabin_cards.nth(i)
-            candidate = card.locator("p")
-            for j in range(candidate.count()):
-                text_raw = candidate.nth(j).text_content()
-                text = text_raw.strip() if text_raw else ""
-                if text.isdigit() and text not in seen:
-                    seen.add(text)
-                    cabin_numbers.append(text)
-                    # break removed to allow collection of multiple cabin numbers per card
-
-        return cabin_numbers
+        cabin_cards = page.locator(CABIN_CARD_SELECTOR)
+
+        if self.batched:
+            card_texts = cabin_cards.evaluate_all(DRAWER_CABINS_JS)
+            # Legacy path: count() on the cards, then count() plus one text_content() per <p> on each card
+            legacy_round_trips = 1 + sum(1 + len(texts) for texts in card_texts)
+            self.round_trips_saved += legacy_round_trips - 1
+        else:
+            card_texts = []
+            for i in range(cabin_cards.count()):
+                candidate = cabin_cards.nth(i).locator("p")
+                card_texts.append([candidate.nth(j).text_content() for j in range(candidate.count())])
+
+        return cabin_numbers_from_texts(card_texts)
+
+    @staticmethod
+    def _category_fields_from_raw(raw: dict[str, Any]) -> dict[str, str]:
+        deck = raw["deck"].strip() if raw["deck"] else ""
+        category_name = raw["category_name"].strip() if raw["category_name"] else ""
+        cabin_type = raw["cabin_type"].strip() if raw["cabin_type"] is not None else "Unknown"
+        price = raw["price"].strip() if raw["price"] is not None else "Unknown"
+
+        if raw["has_see_available"]:
+            category_status = "Available"
+        elif raw["has_join_waitlist"]:
+            category_status = "Waitlist"
+        else:
+            category_status = "Unknown"
+
+        return {
+            "category_name": category_name or "Unknown",
+            "deck": deck or "Unknown",
+            "occupancy": f"{raw['pax_count']} Person(s)" if raw["pax_count"] > 0 else "Unknown",
+            "cabin_type": cabin_type,
+            "price": price,
+            "status": category_status,
+        }
+
+    @staticmethod
+    def _legacy_card_round_trips(raw: dict[str, Any]) -> int:
+        """
+        Number of Playwright calls _read_category_fields makes for a card with these fields.
+        """
+        round_trips = 7  # count() for deck, h3, cabin type, price and "See available", plus two pax count()s
+        round_trips += sum(raw[key] is not None for key in ("deck", "category_name", "cabin_type", "price"))
+        round_trips += 1 if raw["pax_count"] > 0 else 0
+        round_trips += 0 if raw["has_see_available"] else 1  # "Join Waitlist" count()
+        return round_trips
 
+    def _read_category_fields(self, category: Any) -> dict[str, str]:
+        deck_locator = category.locator("span").filter(has_text="Deck")
+        category_name_locator = category.locator("h3")
+        pax_icons = category.locator("[class*='pax-icons_'] svg")
+        cabin_type_locator = pax_icons.nth(pax_icons.count() - 1).locator("+ span")
+        price_locator = category.locator("h2")
+
+        deck_raw = deck_locator.text_content() if deck_locator.count() > 0 else None
+        deck = deck_raw.strip() if deck_raw else "Unknown"
+        category_name_raw = category_name_locator.text_content() if category_name_locator.count() > 0 else None
+        category_name = category_name_raw.strip() if category_name_raw else "Unknown"
+        occupancy = f"{pax_icons.count()} Person(s)" if pax_icons.count() > 0 else "Unknown"
+        cabin_type = cabin_type_locator.text_content().strip() if cabin_type_locator.count() > 0 else "Unknown"
+        price = price_locator.text_content().strip() if price_locator.count() > 0 else "Unknown"
+
+        see_available_button = category.locator("button").filter(has_text="See available cabins")
+        join_waitlist_button = category.locator("button").filter(has_text="Join Waitlist")
+
+        if see_available_button.count() > 0:
+            category_status = "Available"
+        elif join_waitlist_button.count() > 0:
+            category_status = "Waitlist"
+        else:
+            category_status = "Unknown"
+
+        return {
+            "category_name": category_name,
+            "deck": deck,
+            "occupancy": occupancy,
+            "cabin_type": cabin_type,
+            "price": price,
+            "status": category_status,
+        }
+
+    @metrics.timed("fetch_categories")
     def fetch_categories(self) -> list[dict[str, Any]]:
+        with profiler.profile(self.page, "fetch_categories", self.booking_url) as call:
+            try:
+                return self._fetch_categories()
+            finally:
+                call.retried = self.retries > 0
+
+    def _fetch_categories(self) -> list[dict[str, Any]]:
         self.logger.info(f"  Navigating to booking page: {self.booking_url}")
         MAX_RETRIES = 3
         for attempt in range(1, MAX_RETRIES + 1):
             try:
-                self.page.goto(self.booking_url, timeout=60000)
+                with metrics.span("booking_goto"):
+                    self.page.goto(self.booking_url, timeout=60000)
                 break  # success
             except PlaywrightTimeoutError as e:
+                metrics.count("goto_timeouts")
                 self.logger.warning(f"⏳ Timeout loading {self.booking_url} (attempt {attempt}/{MAX_RETRIES})")
                 if attempt == MAX_RETRIES:
                     self.logger.error(f"❌ Failed after {MAX_RETRIES} attempts: {self.booking_url}")
                     raise e
                 backoff = 2 ** attempt
+                metrics.count("booking_retries")
+                self.retries += 1
                 self.logger.info(f"🔁 Retrying in {backoff}s...")
                 time.sleep(backoff)
 
         try:
-            self.page.wait_for_selector("[data-testid='category-card']", timeout=10000)
+            self.page.wait_for_selector(CATEGORY_CARD_SELECTOR, timeout=10000)
         except Exception as e:
             self.logger.warning(f"No category cards found: {e}")
             return []
 
-        try:
-            self.page.evaluate("""
-                const gdpr = document.querySelector('div[type="GDPR"]#wrapper');
-                if (gdpr) gdpr.remove();
-
-                const ccpa = document.querySelector('div[type="CCPA"]#wrapper');
-                if (ccpa) ccpa.remove();
-
-                console.log("Removed known blocker elements.");
-            """)
-            self.logger.info("Forced removal of blockers if present.")
-            time.sleep(2)
-        except Exception as e:
-            self.logger.info(f"Could not remove blockers: {e}")
+        if consent_cleared(self.page):
+            self.logger.info("No consent blockers or cookie banner to dismiss.")
+        else:
+            self._remove_blockers()
+            self._dismiss_cookie_banner()
 
-        self._dismiss_cookie_banner()
+        snapshots.capture_page(self.page, "booking", self.booking_url)
 
-        category_elements = self.page.locator("[data-testid='category-card']")
+        category_elements = self.page.locator(CATEGORY_CARD_SELECTOR)
         category_count = category_elements.count()
         self.logger.info(f"  Found {category_count} cabin categories.")
 
+        card_fields: list[dict[str, str]] = []
+        if self.batched:
+            raw_fields = category_elements.evaluate_all(CATEGORY_CARDS_JS)
+            self.round_trips_saved += sum(self._legacy_card_round_trips(raw) for raw in raw_fields) - 1
+            card_fields = [self._category_fields_from_raw(raw) for raw in raw_fields]
+
         for i in range(category_count):
             category = category_elements.nth(i)
+            fields = card_fields[i] if self.batched else self._read_category_fields(category)
 
-            deck_locator = category.locator("span").filter(has_text="Deck")
-            category_name_locator = category.locator("h3")
-            pax_icons = category.locator("[class*='pax-icons_'] svg")
-            cabin_type_locator = pax_icons.nth(pax_icons.count() - 1).locator("+ span")
-            price_locator = category.locator("h2")
-
-            deck_raw = deck_locator.text_content() if deck_locator.count() > 0 else None
-            deck = deck_raw.strip() if deck_raw else "Unknown"
-            category_name_raw = category_name_locator.text_content() if category_name_locator.count() > 0 else None
-            category_name = category_name_raw.strip() if category_name_raw else "Unknown"
-            occupancy = f"{pax_icons.count()} Person(s)" if pax_icons.count() > 0 else "Unknown"
-            cabin_type = cabin_type_locator.text_content().strip() if cabin_type_locator.count() > 0 else "Unknown"
-            price = price_locator.text_content().strip() if price_locator.count() > 0 else "Unknown"
-
-            see_available_button = category.locator("button").filter(has_text="See available cabins")
-            join_waitlist_button = category.locator("button").filter(has_text="Join Waitlist")
-
-            if see_available_button.count() > 0:
-                category_status = "Available"
-            elif join_waitlist_button.count() > 0:
-                category_status = "Waitlist"
-            else:
-                category_status = "Unknown"
+            category_name = fields["category_name"]
+            deck = fields["deck"]
+            category_status = fields["status"]
 
             num_cabins = 0
             cabin_numbers: list[str] = []
 
             if category_status == "Available":
-                see_available_button.first.scroll_into_view_if_needed()
-                see_available_button.first.click()
-                self.page.wait_for_timeout(6000)
-                self.logger.info(f"Clicked to open drawer for {category_name}.")
+                see_available_button = category.locator("button").filter(has_text="See available cabins")
+                cabin_cards = self.page.locator(CABIN_CARD_SELECTOR)
+                drawer_started = time.perf_counter()
 
-                try:
-                    self.page.wait_for_selector("[data-testid='cabin-card']", timeout=20000)
-                    cabin_numbers = self.extract_available_cabins_from_drawer(self.page)
-                    num_cabins = len(cabin_numbers)
-                    self.logger.info(f"    {category_name}: {num_cabins} available cabins ({', '.join(cabin_numbers)})")
-                except Exception as e:
-                    self.logger.warning(f"Error fetching available cabins for {category_name}: {e}")
+                # Cards left over from a drawer that did not close would be read as this category's cabins
+                stale_drawer = cabin_cards.count() > 0 and not wait_for_state(
+                    cabin_cards, "detached", timeout_ms=6000, name="drawer_previous_close", budget_ms=0)
+
+                # The drawer's availability requests are tracked from the click on
+                with NetworkTracker(self.page) as network:
+                    if not stale_drawer:
+                        see_available_button.first.scroll_into_view_if_needed()
+                        see_available_button.first.click()
+                        self.logger.info(f"Clicked to open drawer for {category_name}.")
+
+                    try:
+                        if stale_drawer:
+                            metrics.count("drawer_stale")
+                            raise PlaywrightTimeoutError("The previous drawer did not close within 6s")
+                        # Wait for the first cabin card and the drawer's availability requests, then for the
+                        # card count to stop growing, instead of a fixed 6s
+                        if not wait_for_network_idle(network, cabin_cards, timeout_ms=20000,
+                                                     name="drawer_open", budget_ms=6000):
+                            raise PlaywrightTimeoutError("Cabin cards did not load within 20s")
+                        wait_for_stable_count(cabin_cards, timeout_ms=6000, name="drawer_settle", budget_ms=0,
+                                              settle_ms=200)
+                        cabin_numbers = self.extract_available_cabins_from_drawer(self.page)
+                        snapshots.capture_drawer(cabin_cards, self.booking_url, i)
+                        num_cabins = len(cabin_numbers)
+                        self.logger.info(f"    {category_name}: {num_cabins} available cabins ({', '.join(cabin_numbers)})")
+                    except Exception as e:
+                        self.logger.warning(f"Error fetching available cabins for {category_name}: {e}")
+                metrics.record("drawer_open", time.perf_counter() - drawer_started)
 
                 try:
                     close_button = self.page.locator("button[data-variant='text'][data-style='link']")
                     if close_button.count() > 0:
-                        close_button.first.click()
-                        self.page.wait_for_timeout(6000)
+                        with metrics.span("drawer_close"):
+                            close_button.first.click()
+                            wait_for_state(cabin_cards, "detached", timeout_ms=6000,
+                                           name="drawer_close", budget_ms=6000)
                 except Exception as click_error:
                     self.logger.warning(f"Fallback close button failed: {click_error}")
 
+            record = {
+                **fields,
+                "cabinNumbers": "|".join(cabin_numbers),
+                "num_cabins": num_cabins
+            }
             if category_status != "Waitlist":
-                self.categories.append({
-                    "category_name": category_name,
-                    "deck": deck,
-                    "occupancy": occupancy,
-                    "cabin_type": cabin_type,
-                    "price": price,
-                    "status": category_status,
-                    "cabinNumbers": "|".join(cabin_numbers),
-                    "num_cabins": num_cabins
-                })
+                self.categories.append(record)
             else:
                 self.logger.info(f"    🚫 Excluding waitlisted category: {category_name} on {deck}")
+                metrics.count("waitlisted_excluded")
+                self.waitlisted.append(record)
+
+        if self.batched:
+            self.logger.info(f"  ⚡ Batched extraction saved {self.round_trips_saved} Playwright round trips.")
 
-        return self.categories
+        metrics.count("categories_found", len(self.categories))
+        metrics.count("cabins_found", sum(category["num_cabins"] for category in self.categories))
+        # A fully waitlisted page returns its waitlisted categories, so it can be told apart from (and
+        # cached unlike) a page that failed to render. The departure is still dropped from the output.
+        return self.categories or self.waitlisted
@@ -0,0 +1,104 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable
+from playwright.sync_api import sync_playwright
+from browser_pages import new_page
+from category_parser import CategoryParser
+
+class CategoryWorkerPool:
+    """
+    Scrapes cabin categories for submitted (index, label, booking_url) jobs across a pool of
+    browser pages.
+
+    Sync Playwright objects cannot be shared between threads, so every worker owns its own
+    Playwright instance, browser and page. `on_result(index, categories)` is called from the
+    worker thread as soon as each job completes. The job queue is bounded by `max_pending`
+    (0 = unbounded), so a producer submitting faster than the pages can scrape is held back.
+    """
+
+    def __init__(self, concurrency: int, on_result: Callable[[int, list[dict[str, Any]]], None],
+                 max_pending: int = 0) -> None:
+        self.on_result = on_result
+        self.errors: list[BaseException] = []
+        self.jobs: queue.Queue[tuple[int, str, str] | None] = queue.Queue(maxsize=max_pending)
+        self.threads = [
+            threading.Thread(target=self._worker, args=(n + 1,), name=f"category-worker-{n + 1}")
+            for n in range(max(1, concurrency))
+        ]
+        logging.info(f"Starting {len(self.threads)} category browser pages.")
+        for thread in self.threads:
+            thread.start()
+
+    def _worker(self, worker_id: int) -> None:
+        # Setup failures (no browser, a broken session) are recorded too, so submit() and close() raise them
+        try:
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=True)
+                try:
+                    page = new_page(browser)
+                    while not self.errors:
+                        try:
+                            job = self.jobs.get(timeout=1)
+                        except queue.Empty:
+                            continue
+                        if job is None:
+                            break
+
+                        index, label, booking_url = job
+                        logging.info(f"[Worker {worker_id}] {label}")
+                        self.on_result(index, CategoryParser(booking_url, page).fetch_categories())
+                finally:
+                    browser.close()
+        except Exception as e:
+            logging.error(f"❌ Category worker {worker_id} failed: {e}")
+            self.errors.append(e)
+
+    def _put(self, job: tuple[int, str, str] | None) -> None:
+        while True:
+            # Mirror the serial run: a departure that fails after all retries aborts the scrape
+            if self.errors:
+                raise self.errors[0]
+            try:
+                self.jobs.put(job, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def submit(self, index: int, label: str, booking_url: str) -> None:
+        self._put((index, label, booking_url))
+
+    def close(self) -> None:
+        """
+        Waits for every submitted job to finish and re-raises the first worker failure.
+        """
+        try:
+            for _ in self.threads:
+                self._put(None)
+        finally:
+            for thread in self.threads:
+                thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+def fetch_categories_pooled(jobs: list[tuple[str, str]], concurrency: int,
+                            on_result: Callable[[int, list[dict[str, Any]]], None] | None = None) -> list[list[dict[str, Any]]]:
+    """
+    Scrapes every (label, booking_url) job across `concurrency` pages and returns the results in
+    job order regardless of which worker finished first.
+    """
+    results: list[list[dict[str, Any]]] = [[] for _ in jobs]
+
+    def store(index: int, categories: list[dict[str, Any]]) -> None:
+        results[index] = categories
+        if on_result:
+            on_result(index, categories)
+
+    pool = CategoryWorkerPool(min(concurrency, len(jobs)), store)
+    try:
+        for index, (label, booking_url) in enumerate(jobs):
+            pool.submit(index, label, booking_url)
+    finally:
+        pool.close()
+
+    return results
@@ -0,0 +1,81 @@
+import json
+import logging
+import os
+import threading
+from typing import Any
+from config import RUN_JOURNAL_PATH
+
+class RunJournal:
+    """
+    Append-only JSON-lines journal of a scrape in progress.
+
+    One record holds the Phase 1 trips (before categories are attached); every other record
+    holds one completed departure's categories, in whatever order they finished. A crash can
+    only ever truncate the last line, which is cut off on load.
+    """
+
+    def __init__(self, path: str = RUN_JOURNAL_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _append(self, record: dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reset(self) -> None:
+        """
+        Discards the journal of any previous run.
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def record_trips(self, trips: list[dict[str, Any]]) -> None:
+        self._append({"type": "trips", "trips": trips})
+        logging.info(f"📝 Checkpointed {len(trips)} trips from Phase 1 to {self.path}")
+
+    def record_departure(self, booking_url: str, categories: list[dict[str, Any]]) -> None:
+        self._append({"type": "departure", "booking_url": booking_url, "categories": categories})
+
+    def load(self) -> tuple[list[dict[str, Any]] | None, dict[str, list[dict[str, Any]]]]:
+        """
+        Returns the checkpointed Phase 1 trips (None if there are none) and the categories of
+        every departure already completed, keyed by booking URL.
+        """
+        trips = None
+        completed: dict[str, list[dict[str, Any]]] = {}
+        if not os.path.exists(self.path):
+            return trips, completed
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        # Cut a torn last line off the file, so records appended on resume start on a line of their own
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            logging.warning(f"⚠️ Dropping incomplete last journal line in {self.path}")
+            with self._lock, open(self.path, "r+b") as f:
+                f.truncate(complete)
+
+        for line_number, line in enumerate(data[:complete].decode("utf-8").splitlines(), start=1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"⚠️ Ignoring unreadable journal line {line_number} in {self.path}")
+                continue
+            if record.get("type") == "trips":
+                trips = record["trips"]
+            elif record.get("type") == "departure":
+                completed[record["booking_url"]] = record["categories"]
+
+        return trips, completed
+
+    def clear(self) -> None:
+        """
+        Removes the journal once the run's output has been saved.
+        """
+        self.reset()
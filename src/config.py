@@ -1,8 +1,9 @@
 import logging
+import os
 from datetime import datetime, timedelta
 
-# Base URL constants
-BASE_URL = "https://www.expeditions.com"
+# Base URL constants (override BASE_URL / DEPARTURES_URL to scrape a local mock site, see benchmarks/mock_site.py)
+BASE_URL = os.getenv("BASE_URL", "https://www.expeditions.com").rstrip("/")
 
 # Default date range for testing
 START_DATE = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
@@ -20,7 +21,117 @@ START_TIMESTAMP = date_to_timestamp(START_DATE)
 END_TIMESTAMP = date_to_timestamp(END_DATE)
 
 # Construct departures URL
-DEPARTURES_URL = f"https://www.expeditions.com/book?dateRange={START_TIMESTAMP}%253A{END_TIMESTAMP}"
+DEPARTURES_BASE_URL = os.getenv("DEPARTURES_URL", f"{BASE_URL}/book")
+
+def departures_url(start_date: str, end_date: str) -> str:
+    separator = "&" if "?" in DEPARTURES_BASE_URL else "?"
+    return f"{DEPARTURES_BASE_URL}{separator}dateRange={date_to_timestamp(start_date)}%253A{date_to_timestamp(end_date)}"
+
+DEPARTURES_URL = departures_url(START_DATE, END_DATE)
+
+# Split discovery into sub-windows of this many days, each crawled with its own dateRange (0 = one window)
+DISCOVERY_WINDOW_DAYS = int(os.getenv("DISCOVERY_WINDOW_DAYS", "0"))
+
+def split_date_window(start_date: str, end_date: str, window_days: int) -> list[tuple[str, str]]:
+    """
+    Splits START_DATE..END_DATE into (start, end) date ranges of `window_days` days. Each window
+    starts on the last day of the previous one: a dateRange ends at 00:00 of its last day, so
+    without the overlap departures on boundary days could fall between two windows. Departures
+    listed twice are merged by booking URL.
+    """
+    if window_days <= 0:
+        return [(start_date, end_date)]
+
+    windows: list[tuple[str, str]] = []
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    step = timedelta(days=max(window_days - 1, 1))
+    while start <= end:
+        window_end = min(start + step, end)
+        windows.append((start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d")))
+        if window_end == end:
+            break
+        start = window_end
+    return windows
+
+# Number of browser pages used to scrape cabin categories in Phase 2 (1 = serial)
+CATEGORY_CONCURRENCY = int(os.getenv("CATEGORY_CONCURRENCY", "1"))
+
+# Read category cards, drawers and departure rows with one page.evaluate per batch (0 = per-field locators)
+BATCHED_EXTRACTION = os.getenv("BATCHED_EXTRACTION", "1") == "1"
+
+# Build trips from intercepted search API responses instead of the rendered listing (falls back to the DOM)
+SEARCH_PAYLOAD_MODE = os.getenv("SEARCH_PAYLOAD_MODE", "0") == "1"
+SEARCH_PAYLOAD_URL_PATTERN = os.getenv("SEARCH_PAYLOAD_URL_PATTERN", r"algolia|/queries|/search")
+
+# Request routing profile for headless pages ("lean" aborts images, media, fonts and trackers; "off" disables)
+RESOURCE_PROFILE = os.getenv("RESOURCE_PROFILE", "lean")
+# URL substrings that are never blocked, e.g. icons the booking UI needs to render category cards
+RESOURCE_ALLOWLIST = tuple(filter(None, os.getenv("RESOURCE_ALLOWLIST", ".svg").split(",")))
+
+# Departure-level category cache (a TTL of 0 disables it)
+DEPARTURE_CACHE_PATH = os.getenv("DEPARTURE_CACHE_PATH", "output/departure_cache.sqlite3")
+DEPARTURE_CACHE_TTL_HOURS = float(os.getenv("DEPARTURE_CACHE_TTL_HOURS", "0"))
+DEPARTURE_CACHE_REFRESH_WITHIN_DAYS = int(os.getenv("DEPARTURE_CACHE_REFRESH_WITHIN_DAYS", "30"))
+
+# Journal of Phase 1 trips and completed departures, used by `main.py --resume`
+RUN_JOURNAL_PATH = os.getenv("RUN_JOURNAL_PATH", "output/run_journal.jsonl")
+
+# Scrape categories while Phase 1 is still paginating (uses CATEGORY_CONCURRENCY worker pages, at least 1)
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "0") == "1"
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "20"))
+
+# Partial results written by `main.py --shard i/N` and combined by `main.py --merge N`
+SHARD_FOLDER = os.getenv("SHARD_FOLDER", "output/shards")
+
+# Published output: "legacy" (one trip_list.json), "split" (compressed index + per-trip files) or "both"
+OUTPUT_LAYOUT = os.getenv("OUTPUT_LAYOUT", "legacy")
+SPLIT_OUTPUT_FOLDER = os.getenv("SPLIT_OUTPUT_FOLDER", "output/trips")
+# Also write brotli variants of the split files (needs the optional `brotli` package)
+SPLIT_OUTPUT_BROTLI = os.getenv("SPLIT_OUTPUT_BROTLI", "0") == "1"
+
+# Also publish trip_list.normalized.json (lookup tables, integer prices, ISO dates); see normalized_schema.py
+NORMALIZED_OUTPUT = os.getenv("NORMALIZED_OUTPUT", "0") == "1"
+
+# Also publish indexes/*.json (destination, ship, month, price bucket and cabin-count lookups); see query_indexes.py
+QUERY_INDEXES = os.getenv("QUERY_INDEXES", "0") == "1"
+
+# Run summary of timing spans and counters: "emf" (CloudWatch Embedded Metric Format on stdout), "log" or "off"
+METRICS_FORMAT = os.getenv("METRICS_FORMAT", "emf")
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "CruiseFinder")
+
+# Slow-page profiling: trace and cProfile each departure list and booking page, keeping the artifacts
+# only for pages slower than PROFILE_PERCENTILE of earlier ones (after PROFILE_MIN_SAMPLES) or that retried
+PROFILE_PAGES = os.getenv("PROFILE_PAGES", "0") == "1"
+PROFILE_FOLDER = os.getenv("PROFILE_FOLDER", "output/profiles")
+PROFILE_PERCENTILE = float(os.getenv("PROFILE_PERCENTILE", "0.95"))
+PROFILE_MIN_SAMPLES = int(os.getenv("PROFILE_MIN_SAMPLES", "20"))
+PROFILE_MAX_MB = float(os.getenv("PROFILE_MAX_MB", "500"))
+# Playwright tracing records every page once started, kept or not: "dom" (DOM snapshots, no screenshots),
+# "full" (adds screenshots, the most expensive) or "off" (cProfile only)
+PROFILE_TRACE = os.getenv("PROFILE_TRACE", "dom")
+
+# Reuse one consented browser session (Playwright storage state) plus an init script that removes the
+# GDPR/CCPA wrappers on every page; the explicit dismissal only runs if a blocker still shows up
+CONSENT_SESSION = os.getenv("CONSENT_SESSION", "1") == "1"
+STORAGE_STATE_PATH = os.getenv("STORAGE_STATE_PATH", "output/browser_state.json")
+STORAGE_STATE_MAX_AGE_HOURS = float(os.getenv("STORAGE_STATE_MAX_AGE_HOURS", "24"))
+
+# HTTP fast path: fetch listings and booking pages over pooled keep-alive HTTP first and read their
+# embedded state; only pages that need interaction (cabin drawers) or lack state go to the browser
+HTTP_FAST_PATH = os.getenv("HTTP_FAST_PATH", "0") == "1"
+HTTP_CONCURRENCY = int(os.getenv("HTTP_CONCURRENCY", "8"))
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "20"))
+
+# Capture mode: save gzipped DOM snapshots of every listing, departure list, booking page and opened
+# drawer under SNAPSHOT_FOLDER/<run>, so snapshot_parser.py can re-extract the run without a browser
+CAPTURE_SNAPSHOTS = os.getenv("CAPTURE_SNAPSHOTS", "0") == "1"
+SNAPSHOT_FOLDER = os.getenv("SNAPSHOT_FOLDER", "output/snapshots")
+
+# Stream trip_list.json: append each trip as soon as its categories are in, and upload it to S3 in
+# multipart parts of MULTIPART_PART_MB (S3 minimum 5) while the scrape runs, committed at the end
+STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "0") == "1"
+MULTIPART_PART_MB = max(5, int(os.getenv("MULTIPART_PART_MB", "8")))
 
 # Logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
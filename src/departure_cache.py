@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any
+from config import DEPARTURE_CACHE_PATH, DEPARTURE_CACHE_REFRESH_WITHIN_DAYS, DEPARTURE_CACHE_TTL_HOURS
+
+# Upper bounds (hours) of the cache-hit age buckets reported at the end of a run
+AGE_BUCKETS = ((6, "<6h"), (24, "6-24h"), (72, "1-3d"), (168, "3-7d"))
+
+class DepartureCache:
+    """
+    On-disk cache of CategoryParser results keyed by booking URL.
+
+    Entries older than `ttl_hours` are re-scraped, and so is every departure starting within
+    `refresh_within_days`, since availability changes fastest close to sailing.
+    """
+
+    def __init__(self, path: str = DEPARTURE_CACHE_PATH, ttl_hours: float = DEPARTURE_CACHE_TTL_HOURS,
+                 refresh_within_days: int = DEPARTURE_CACHE_REFRESH_WITHIN_DAYS) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.refresh_within_days = refresh_within_days
+
+        # Pooled Phase 2 workers write from their own threads
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._connection()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.near_departure = 0
+        self.hit_ages: dict[str, int] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        The open connection, reopened after close(). Callers hold the lock (or are __init__).
+        """
+        if self._conn is None:
+            # Local shard processes may share the file, so wait on their write locks
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS departures (
+                    booking_url TEXT PRIMARY KEY,
+                    categories TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def _departs_soon(self, start_date: str | None) -> bool:
+        if not start_date:
+            return False
+        try:
+            parsed = datetime.strptime(start_date, "%Y %b %d")
+        except ValueError:
+            return False
+        return (parsed - datetime.now()).days < self.refresh_within_days
+
+    def get(self, booking_url: str, start_date: str | None = None) -> list[dict[str, Any]] | None:
+        """
+        Returns cached categories if they are still fresh, otherwise None.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT categories, fetched_at FROM departures WHERE booking_url = ?", (booking_url,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            age = time.time() - row[1]
+            if age > self.ttl_seconds:
+                self.expired += 1
+                return None
+            if self._departs_soon(start_date):
+                self.near_departure += 1
+                return None
+
+            self.hits += 1
+            bucket = next((label for hours, label in AGE_BUCKETS if age < hours * 3600), ">7d")
+            self.hit_ages[bucket] = self.hit_ages.get(bucket, 0) + 1
+
+        return json.loads(row[0])
+
+    def put(self, booking_url: str, categories: list[dict[str, Any]]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO departures (booking_url, categories, fetched_at) VALUES (?, ?, ?)",
+                (booking_url, json.dumps(categories), time.time())
+            )
+            conn.commit()
+
+    def log_summary(self) -> None:
+        lookups = self.hits + self.misses + self.expired + self.near_departure
+        if not lookups:
+            return
+        logging.info(f"🗄️ Departure cache: {self.hits}/{lookups} hits, {self.misses} new, {self.expired} expired, "
+                     f"{self.near_departure} departing within {self.refresh_within_days} days.")
+        if self.hit_ages:
+            ages = ", ".join(f"{label}: {self.hit_ages[label]}"
+                             for label in [label for _, label in AGE_BUCKETS] + [">7d"] if label in self.hit_ages)
+            logging.info(f"    Cache hit ages - {ages}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
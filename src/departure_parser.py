@@ -1,114 +1,196 @@
 import logging
-from config import BASE_URL, END_DATE
-from typing import Any
+import time
+from config import BASE_URL, BATCHED_EXTRACTION, END_DATE
+from typing import Any, Iterator
 from datetime import datetime
+from metrics import metrics
+from profiling import profiler
+from waits import wait_for_count_increase, wait_for_state
+
+DEPARTURE_CONTAINER_SELECTOR = "[class^='hits_departureHitsContainer__']"
+
+# Reads the fields of every departure row from index `start` onwards in one round trip.
+DEPARTURE_ROWS_JS = """
+(rows, start) => rows.slice(start).map((row) => {
+    const year = row.querySelector("[data-testid='departure-hit-year']");
+    const ship = row.querySelector("i");
+    const link = row.querySelector("a");
+    return {
+        year: year ? year.textContent : null,
+        p_texts: Array.from(row.querySelectorAll("p"), (p) => p.textContent || ""),
+        ship: ship ? ship.textContent : null,
+        href: link ? link.getAttribute("href") : null,
+        has_link: link !== null,
+        is_land_expedition: row.querySelector("div[data-land-expedition='true']") !== null,
+    };
+})
+"""
+
+def _read_departure_rows(elements: Any, start: int, batched: bool) -> list[dict[str, Any]]:
+    """
+    Returns the raw fields of departure rows `start..end`, batched or one locator at a time.
+    """
+    if batched:
+        return elements.evaluate_all(DEPARTURE_ROWS_JS, start)
+
+    rows = []
+    for i in range(start, elements.count()):
+        departure = elements.nth(i)
+
+        year_locator = departure.locator("[data-testid='departure-hit-year']")
+        date_range_locator = departure.locator("p")
+        ship_name_locator = departure.locator("i")
+        booking_url_locator = departure.locator("a")
+        land_expedition_locator = departure.locator("div[data-land-expedition='true']")
+
+        has_link = booking_url_locator.count() > 0
+        rows.append({
+            "year": year_locator.text_content() if year_locator.count() > 0 else None,
+            "p_texts": date_range_locator.all_text_contents(),
+            "ship": ship_name_locator.first.text_content() if ship_name_locator.count() > 0 else None,
+            "href": booking_url_locator.first.get_attribute("href") if has_link else None,
+            "has_link": has_link,
+            "is_land_expedition": land_expedition_locator.count() > 0,
+        })
+
+    return rows
+
+class DepartureRowReader:
+    """
+    Turns raw departure rows (as read by _read_departure_rows) into departures, carrying the
+    year header and seen booking URLs across pages of rows. `stopped` is set once a departure
+    starts after the cutoff date.
+    """
+
+    def __init__(self, cutoff_date: str | None = None) -> None:
+        self.cutoff_date = cutoff_date or END_DATE
+        self.latest_year: str | None = None
+        self.seen_urls: set[str] = set()
+        self.stopped = False
+
+    def read(self, rows: list[dict[str, Any]], start: int = 0) -> Iterator[dict[str, str]]:
+        for i, row in enumerate(rows, start=start):
+            if row["year"] is not None:
+                self.latest_year = row["year"].strip()
+                logging.info(f"  Processing Departures for: {self.latest_year}")
+
+            # Filter <p> tags to get only dates (not prices which contain "$")
+            # Old brittle selector was: p[class*='drDbhx'] (class names change on redeploy)
+            date_texts = [text.strip() for text in row["p_texts"] if text.strip() and "$" not in text]
+
+            missing_fields = []
+            if self.latest_year is None:
+                missing_fields.append("year")
+            if len(date_texts) < 2:
+                missing_fields.append("date range")
+            if not row["has_link"]:
+                missing_fields.append("booking URL")
+
+            if missing_fields:
+                logging.warning(f"Skipping departure {i} due to missing fields: {', '.join(missing_fields)}")
+                continue
+
+            ship_name = "Land Expedition" if row["is_land_expedition"] else (row["ship"] or "").strip()
+
+            booking_url = row["href"]
+            if booking_url and not booking_url.startswith("http"):
+                booking_url = BASE_URL + booking_url
+
+            if not booking_url or booking_url in self.seen_urls:
+                continue  # Skip duplicates
+
+            start_date = f"{self.latest_year} {date_texts[0]}"
+            end_date = f"{self.latest_year} {date_texts[1]}"
 
-def fetch_departures(page: Any, trip: Any) -> list[dict[str, str]]:
-    departures: list[dict[str, str]] = []
-    latest_year = None
-    seen_urls = set()
+            try:
+                parsed_start = datetime.strptime(start_date, "%Y %b %d")
+                end_cutoff = datetime.strptime(self.cutoff_date, "%Y-%m-%d")
+                if parsed_start > end_cutoff:
+                    logging.info(f"🛑 Departure start date {start_date} exceeds END_DATE filter ({self.cutoff_date}). Stopping.")
+                    self.stopped = True
+                    return
+
+            except Exception as date_err:
+                logging.warning(f"Could not parse end_date '{end_date}': {date_err}")
+
+            logging.info(f"  Found departure: {start_date} to {end_date}, Ship: {ship_name}, URL: {booking_url}")
+
+            self.seen_urls.add(booking_url)
+            yield {
+                "start_date": start_date,
+                "end_date": end_date,
+                "ship": ship_name,
+                "booking_url": booking_url
+            }
+
+def fetch_departures(page: Any, trip: Any, batched: bool = BATCHED_EXTRACTION,
+                     end_date: str | None = None) -> list[dict[str, str]]:
+    return list(iter_departures(page, trip, batched, end_date))
+
+def iter_departures(page: Any, trip: Any, batched: bool = BATCHED_EXTRACTION,
+                    end_date: str | None = None, label: str = "") -> Iterator[dict[str, str]]:
+    """
+    Yields each departure of a trip card as soon as it is read, paginating with "Show more"
+    until a departure starts after `end_date` (END_DATE by default).
+    """
+    with profiler.profile(page, "fetch_departures", label or "trip") as call:
+        for departure in _iter_departures(page, trip, batched, end_date):
+            # Time spent by the consumer (e.g. blocked on the pipeline queue) is not this page's
+            with call.paused():
+                yield departure
+
+def _iter_departures(page: Any, trip: Any, batched: bool, end_date: str | None) -> Iterator[dict[str, str]]:
+    reader = DepartureRowReader(end_date)
+    started = time.perf_counter()
 
     try:
         show_departures_button = trip.locator("button", has_text="See departure dates")
         if show_departures_button.count() > 0:
             try:
                 show_departures_button.first.scroll_into_view_if_needed()
-                page.wait_for_timeout(1000)
+                wait_for_state(show_departures_button, "visible", timeout_ms=1000, name="departures_button", budget_ms=1000)
                 show_departures_button.first.click(timeout=15000)
             except Exception as e:
                 logging.warning(f"Failed to click 'See departure dates': {e}")
-                return departures
+                return
 
-            departure_container_locator = trip.locator("[class^='hits_departureHitsContainer__']")
-            page.wait_for_timeout(2000)
+            departure_container_locator = trip.locator(DEPARTURE_CONTAINER_SELECTOR)
+            wait_for_state(departure_container_locator, "attached", timeout_ms=10000, name="departure_list", budget_ms=2000)
             if departure_container_locator.count() == 0:
                 logging.warning("Departure list did not appear.")
-                return departures
+                return
+
+            elements = departure_container_locator.locator("li")
+            processed = 0
 
             while True:
-                elements = departure_container_locator.locator("li")
-                element_count = elements.count()
+                # Only rows appended since the last "Show more" need to be read
+                rows = _read_departure_rows(elements, processed, batched)
 
-                if element_count == 0:
+                if processed == 0 and not rows:
                     logging.info("  No visible departures found for this trip. Skipping.")
                     break
+                if not rows:
+                    logging.info("  'Show more' did not add any departures. Stopping.")
+                    break
 
-                stop_due_to_date = False
-
-                for i in range(element_count):
-                    departure = elements.nth(i)
-
-                    year_locator = departure.locator("[data-testid='departure-hit-year']")
-                    # Use robust selector: find all <p> tags, filter for date-like content
-                    # Old brittle selector was: p[class*='drDbhx'] (class names change on redeploy)
-                    date_range_locator = departure.locator("p")
-                    ship_name_locator = departure.locator("i")
-                    booking_url_locator = departure.locator("a")
-                    land_expedition_locator = departure.locator("div[data-land-expedition='true']")
-
-                    if year_locator.count() > 0:
-                        latest_year = year_locator.text_content().strip()
-                        logging.info(f"  Processing Departures for: {latest_year}")
-
-                    # Filter <p> tags to get only dates (not prices which contain "$")
-                    all_p_texts = date_range_locator.all_text_contents()
-                    date_texts = [text.strip() for text in all_p_texts if text.strip() and "$" not in text]
-                    
-                    missing_fields = []
-                    if latest_year is None:
-                        missing_fields.append("year")
-                    if len(date_texts) < 2:
-                        missing_fields.append("date range")
-                    if booking_url_locator.count() == 0:
-                        missing_fields.append("booking URL")
-
-                    if missing_fields:
-                        logging.warning(f"Skipping departure {i} due to missing fields: {', '.join(missing_fields)}")
-                        continue
-
-                    ship_name = "Land Expedition" if land_expedition_locator.count() > 0 else ship_name_locator.text_content().strip()
-
-                    booking_url = booking_url_locator.get_attribute("href")
-                    if booking_url and not booking_url.startswith("http"):
-                        booking_url = BASE_URL + booking_url
-
-                    if not booking_url or booking_url in seen_urls:
-                        continue  # Skip duplicates
+                for departure in reader.read(rows, processed):
+                    metrics.count("departures_found")
+                    yield departure
 
-                    start_date = f"{latest_year} {date_texts[0]}"
-                    end_date = f"{latest_year} {date_texts[1]}"
+                processed += len(rows)
 
-                    try:
-                        parsed_start = datetime.strptime(start_date, "%Y %b %d")
-                        end_cutoff = datetime.strptime(END_DATE, "%Y-%m-%d")
-                        if parsed_start > end_cutoff:
-                            logging.info(f"🛑 Departure start date {start_date} exceeds END_DATE filter ({END_DATE}). Stopping.")
-                            stop_due_to_date = True
-                            break
-
-                    except Exception as date_err:
-                        logging.warning(f"Could not parse end_date '{end_date}': {date_err}")
-
-                    logging.info(f"  Found departure: {start_date} to {end_date}, Ship: {ship_name}, URL: {booking_url}")
-
-                    departures.append({
-                        "start_date": start_date,
-                        "end_date": end_date,
-                        "ship": ship_name,
-                        "booking_url": booking_url
-                    })
-                    seen_urls.add(booking_url)
-
-                if stop_due_to_date:
+                if reader.stopped:
                     break
 
                 show_more = departure_container_locator.locator("span", has_text="Show more")
                 if show_more.count() > 0:
                     logging.info("  🔽 Clicking 'Show more' to load more departures...")
                     try:
-                        show_more.first.scroll_into_view_if_needed()
-                        show_more.first.click()
-                        page.wait_for_timeout(2000)
+                        with metrics.span("departures_show_more"):
+                            show_more.first.scroll_into_view_if_needed()
+                            show_more.first.click()
+                            wait_for_count_increase(elements, processed, timeout_ms=10000, name="departures_show_more", budget_ms=2000)
                     except Exception as e:
                         logging.warning(f"⚠️ Failed to click 'Show more': {e}")
                         break
@@ -117,5 +199,5 @@ def fetch_departures(page: Any, trip: Any) -> list[dict[str, str]]:
 
     except Exception as e:
         logging.error(f"Error fetching departures: {e}")
-
-    return departures
+    finally:
+        metrics.record("fetch_departures", time.perf_counter() - started)
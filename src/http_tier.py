@@ -0,0 +1,234 @@
+import json
+import logging
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import urllib3
+from config import BASE_URL, HTTP_CONCURRENCY, HTTP_TIMEOUT_S
+from search_payloads import field_text, first_field, page_info, trips_from_payloads
+from snapshots import snapshots
+from trip_values import format_occupancy, format_price
+
+# Server-rendered React apps embed their initial state as JSON in a script tag or a window global
+JSON_SCRIPT_PATTERN = re.compile(r"<script\b[^>]*type=[\"']application/json[\"'][^>]*>(.*?)</script>", re.S | re.I)
+WINDOW_STATE_PATTERN = re.compile(r"window\.(__[A-Z_]+__)\s*=\s*")
+
+# Category fields may appear under several names in the embedded state, tried in order
+CATEGORY_FIELDS = {
+    "category_name": ("categoryName", "name", "title"),
+    "deck": ("deckName", "deck"),
+    "occupancy": ("occupancy", "maxOccupancy", "paxCount"),
+    "cabin_type": ("cabinType", "roomType", "type"),
+    "price": ("price", "fromPrice", "lowestPrice", "displayPrice"),
+    "status": ("status", "availability"),
+    "cabins": ("availableCabins", "cabins", "cabinNumbers"),
+}
+
+def extract_embedded_states(html: str) -> list[Any]:
+    """
+    Every JSON document embedded in the page: application/json script tags (such as
+    __NEXT_DATA__) and `window.__STATE__ = {...}` assignments.
+    """
+    states = []
+    for match in JSON_SCRIPT_PATTERN.finditer(html):
+        try:
+            states.append(json.loads(match.group(1)))
+        except json.JSONDecodeError:
+            continue
+    decoder = json.JSONDecoder()
+    for match in WINDOW_STATE_PATTERN.finditer(html):
+        try:
+            states.append(decoder.raw_decode(html, match.end())[0])
+        except json.JSONDecodeError:
+            continue
+    return states
+
+def _walk(value: Any) -> Any:
+    """
+    Yields every dict and list nested anywhere in `value`, breadth-first in document order.
+    """
+    queue = deque([value])
+    while queue:
+        item = queue.popleft()
+        if isinstance(item, dict):
+            yield item
+            queue.extend(item.values())
+        elif isinstance(item, list):
+            yield item
+            queue.extend(item)
+
+def _looks_like_categories(items: list[Any]) -> bool:
+    return bool(items) and all(
+        isinstance(item, dict) and first_field(item, CATEGORY_FIELDS["category_name"]) is not None
+        and first_field(item, CATEGORY_FIELDS["price"]) is not None and first_field(item, CATEGORY_FIELDS["status"]) is not None
+        for item in items
+    )
+
+def _status(value: Any) -> str:
+    text = str(value).lower()
+    if value is True or text in ("available", "open", "bookable"):
+        return "Available"
+    if "waitlist" in text:
+        return "Waitlist"
+    return "Unknown"
+
+def _cabin_numbers(value: Any) -> list[str] | None:
+    """
+    Cabin numbers from a list of numbers or {"number", "available"} objects; None if absent.
+    """
+    if isinstance(value, str):
+        value = value.split("|") if value else []
+    if not isinstance(value, list):
+        return None
+    numbers = []
+    for cabin in value:
+        if isinstance(cabin, dict):
+            if cabin.get("available") is False:
+                continue
+            cabin = first_field(cabin, ("number", "cabinNumber", "name"))
+        text = field_text(cabin)
+        if text.isdigit() and text not in numbers:
+            numbers.append(text)
+    return numbers
+
+def categories_from_state(state: Any) -> list[dict[str, Any]] | None:
+    """
+    Builds CategoryParser-shaped categories from embedded state. Returns None when the state has
+    no category list, or when an available category has no cabin list (only the drawer shows it).
+    Waitlisted categories are left out unless every category is waitlisted.
+    """
+    items = next((node for node in _walk(state) if isinstance(node, list) and _looks_like_categories(node)), None)
+    if items is None:
+        return None
+
+    categories = []
+    waitlisted = []
+    for item in items:
+        status = _status(first_field(item, CATEGORY_FIELDS["status"]))
+        cabins = _cabin_numbers(item.get(next((k for k in CATEGORY_FIELDS["cabins"] if k in item), ""), None))
+        if status == "Available" and cabins is None:
+            return None
+
+        price = first_field(item, CATEGORY_FIELDS["price"])
+        occupancy = first_field(item, CATEGORY_FIELDS["occupancy"])
+        cabins = [] if status == "Waitlist" else cabins or []
+        (waitlisted if status == "Waitlist" else categories).append({
+            "category_name": field_text(first_field(item, CATEGORY_FIELDS["category_name"])) or "Unknown",
+            "deck": field_text(first_field(item, CATEGORY_FIELDS["deck"])) or "Unknown",
+            "occupancy": format_occupancy(int(occupancy)) if isinstance(occupancy, (int, float)) else field_text(occupancy) or "Unknown",
+            "cabin_type": field_text(first_field(item, CATEGORY_FIELDS["cabin_type"])) or "Unknown",
+            "price": format_price(int(price)) if isinstance(price, (int, float)) else field_text(price),
+            "status": status,
+            "cabinNumbers": "|".join(cabins),
+            "num_cabins": len(cabins),
+        })
+    # Like CategoryParser: waitlisted categories only when there is nothing else
+    return categories or waitlisted
+
+def hit_payloads_from_state(state: Any) -> list[dict[str, Any]]:
+    """
+    Algolia-style results ({"hits": [...]}) embedded by InstantSearch server-side rendering.
+    """
+    return [node for node in _walk(state) if isinstance(node, dict) and isinstance(node.get("hits"), list)]
+
+class HttpTier:
+    """
+    Fetches server-rendered pages over pooled keep-alive HTTP connections and extracts trips and
+    categories from their embedded state, so the browser is only needed for pages that require
+    interaction. Every method returns None / [] when the caller should use the browser instead.
+    """
+
+    def __init__(self, concurrency: int = HTTP_CONCURRENCY, timeout_s: float = HTTP_TIMEOUT_S) -> None:
+        self.concurrency = max(1, concurrency)
+        self.http = urllib3.PoolManager(
+            num_pools=4, maxsize=self.concurrency, block=True,
+            headers={"User-Agent": "Mozilla/5.0 (compatible; cruise-finder)", "Accept": "text/html"},
+            timeout=urllib3.Timeout(connect=5, read=timeout_s),
+            retries=urllib3.Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+        )
+        self._lock = threading.Lock()
+        self.served = {"listing": 0, "booking": 0}
+        self.fallbacks: dict[str, dict[str, int]] = {"listing": {}, "booking": {}}
+
+    def _fallback(self, kind: str, reason: str) -> None:
+        with self._lock:
+            self.fallbacks[kind][reason] = self.fallbacks[kind].get(reason, 0) + 1
+
+    def _serve(self, kind: str) -> None:
+        with self._lock:
+            self.served[kind] += 1
+
+    def _get(self, url: str, kind: str) -> str | None:
+        try:
+            response = self.http.request("GET", url if url.startswith("http") else BASE_URL + url)
+        except urllib3.exceptions.HTTPError as e:
+            logging.info(f"HTTP fetch failed for {url}: {e}")
+            self._fallback(kind, "request failed")
+            return None
+        if response.status != 200:
+            self._fallback(kind, f"HTTP {response.status}")
+            return None
+        return response.data.decode("utf-8", errors="replace")
+
+    def fetch_trips(self, url: str, limit: int, end_date: str | None = None) -> list[dict[str, Any]]:
+        html = self._get(url, "listing")
+        if html is None:
+            return []
+
+        payloads = [payload for state in extract_embedded_states(html) for payload in hit_payloads_from_state(state)]
+        if not payloads:
+            self._fallback("listing", "no embedded hits")
+            return []
+
+        trips = trips_from_payloads(payloads, limit, end_date)
+        pages_seen = {page_info(payload)[0] for payload in payloads}
+        total_pages = max(page_info(payload)[1] for payload in payloads)
+        if len(trips) < limit and total_pages > len(pages_seen):
+            # Only the first page of hits is rendered server-side; the browser path pages through the rest
+            self._fallback("listing", "partial listing")
+            return []
+        if not trips:
+            self._fallback("listing", "no trips in state")
+            return []
+
+        self._serve("listing")
+        snapshots.capture_text("listing_state", url, html, end_date=end_date, limit=limit)
+        return trips
+
+    def fetch_categories(self, booking_url: str) -> list[dict[str, Any]] | None:
+        html = self._get(booking_url, "booking")
+        if html is None:
+            return None
+
+        states = extract_embedded_states(html)
+        for state in states:
+            categories = categories_from_state(state)
+            if categories is not None:
+                self._serve("booking")
+                snapshots.capture_text("booking_state", booking_url, html)
+                return categories
+
+        has_categories = any(
+            isinstance(node, list) and _looks_like_categories(node)
+            for state in states for node in _walk(state)
+        )
+        self._fallback("booking", "needs cabin drawers" if has_categories else "no embedded categories")
+        return None
+
+    def fetch_many(self, booking_urls: list[str]) -> list[list[dict[str, Any]] | None]:
+        """
+        fetch_categories for every URL, at most `concurrency` at a time, in input order.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="http-tier") as executor:
+            return list(executor.map(self.fetch_categories, booking_urls))
+
+    def log_summary(self) -> None:
+        for kind in ("listing", "booking"):
+            fallbacks = self.fallbacks[kind]
+            if not self.served[kind] and not fallbacks:
+                continue
+            reasons = ", ".join(f"{count} {reason}" for reason, count in sorted(fallbacks.items()))
+            logging.info(f"🌐 {kind.capitalize()} pages: {self.served[kind]} served over HTTP, "
+                         f"{sum(fallbacks.values())} via the browser{f' ({reasons})' if reasons else ''}.")
@@ -1,9 +1,22 @@
+import argparse
 import logging
+import os
+import subprocess
+import sys
 import time
+from typing import Any
 import boto3
+from metrics import metrics
 from trip_parser import TripParser
-from save_trips import save_to_json
+from config import NORMALIZED_OUTPUT, OUTPUT_LAYOUT, QUERY_INDEXES, STREAM_OUTPUT
+from save_trips import (INDEX_S3_PREFIX, MANIFEST_NAME, SPLIT_S3_PREFIX, StreamingTripPublisher, publish_indexes,
+                        publish_normalized, publish_split, publish_trips)
+from shards import merge_shards, parse_shard, write_shard
 
+# Trips kept per run; shards record it so the merge caps merged date windows like an unsharded run
+TRIP_LIMIT = 100
+
+@metrics.timed("cloudfront_invalidation")
 def invalidate_cloudfront_cache(distribution_id: str, paths: list[str]) -> None:
     client = boto3.client('cloudfront')
     response = client.create_invalidation(
@@ -18,17 +31,94 @@ def invalidate_cloudfront_cache(distribution_id: str, paths: list[str]) -> None:
     )
     print("✅ CloudFront invalidation submitted:", response['Invalidation']['Id'])
     
-def main() -> None:
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+def _shard_spec(value: str) -> tuple[int, int]:
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
-    parser = TripParser()
-    trips = parser.fetch_trips(limit=100)
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description="Scrape Lindblad trip availability and publish it to S3.")
+    arg_parser.add_argument("--resume", action="store_true",
+                            help="Continue an interrupted run from its checkpoint journal instead of starting over.")
+    mode = arg_parser.add_mutually_exclusive_group()
+    mode.add_argument("--shard", type=_shard_spec, metavar="i/N",
+                      help="Scrape only shard i of N and write a partial result file instead of publishing.")
+    mode.add_argument("--merge", type=int, metavar="N",
+                      help="Merge the N shard files into trip_list.json and publish it.")
+    mode.add_argument("--local-shards", type=int, metavar="N",
+                      help="Run N shard processes on this machine, then merge and publish.")
+    return arg_parser.parse_args(argv)
 
+def publish(trips: list[dict[str, Any]], streamed: StreamingTripPublisher | None = None) -> None:
+    """
+    Publishes the configured layouts. With `streamed`, trip_list.json was already written and
+    uploaded in parts during the scrape, and only needs committing.
+    """
     if trips:
-        save_to_json(trips)  # Save JSON first
-        invalidate_cloudfront_cache("E22G95LIEIJY6O", ["/trip_list.json"])  # Invalidate after S3 push
+        # Save JSON first; only invalidate what the S3 push actually changed
+        changed_paths = []
+        legacy = OUTPUT_LAYOUT in ("legacy", "both")
+        if legacy and (streamed.finish(trips) if streamed else publish_trips(trips)):
+            changed_paths += ["/trip_list.json", "/trip_list.delta.json"]
+        # Split files are content-addressed, so only the manifest pointing at them needs invalidating
+        if OUTPUT_LAYOUT in ("split", "both") and publish_split(trips):
+            changed_paths.append(f"/{SPLIT_S3_PREFIX}/{MANIFEST_NAME}")
+        if NORMALIZED_OUTPUT and publish_normalized(trips):
+            changed_paths.append("/trip_list.normalized.json")
+        if QUERY_INDEXES and publish_indexes(trips):
+            changed_paths.append(f"/{INDEX_S3_PREFIX}/*")
+        if changed_paths:
+            invalidate_cloudfront_cache("E22G95LIEIJY6O", changed_paths)
     else:
+        if streamed:
+            streamed.abort()
         logging.info("No trips with available departures found. Skipping CSV export.")
 
+def run_local_shards(count: int, resume: bool) -> None:
+    """
+    Starts one `--shard i/N` process per shard and waits for all of them.
+    """
+    commands = [[sys.executable, os.path.abspath(__file__), "--shard", f"{index}/{count}"] + (["--resume"] if resume else [])
+                for index in range(count)]
+    processes = [subprocess.Popen(command) for command in commands]
+    failed = [index for index, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        raise RuntimeError(f"Shard processes failed: {', '.join(f'{index}/{count}' for index in failed)}")
+
+def run(args: argparse.Namespace) -> None:
+    if args.merge or args.local_shards:
+        count = args.merge or args.local_shards
+        if args.local_shards:
+            run_local_shards(count, args.resume)
+        publish(merge_shards(count))
+        return
+
+    parser = TripParser(shard=args.shard)
+    streamed = StreamingTripPublisher() if STREAM_OUTPUT and not args.shard and OUTPUT_LAYOUT in ("legacy", "both") else None
+    try:
+        trips = parser.fetch_trips(limit=TRIP_LIMIT, resume=args.resume, on_trip=streamed.append if streamed else None)
+        if args.shard:
+            write_shard(trips, *args.shard, limit=TRIP_LIMIT)
+        else:
+            publish(trips, streamed)
+    except BaseException:
+        # Parts already sent are discarded, never published (a no-op once the upload was committed)
+        if streamed:
+            streamed.abort()
+        raise
+
+    # The run's output is saved, so the next run starts from scratch
+    parser.journal.clear()
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args(argv)
+    try:
+        run(args)
+    finally:
+        # Emitted for failed runs too, since those are the ones worth investigating
+        metrics.emit()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,139 @@
+import functools
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+from config import METRICS_FORMAT, METRICS_NAMESPACE
+
+# CloudWatch accepts at most 100 metrics per Embedded Metric Format document
+EMF_MAX_METRICS = 100
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of `samples` (which must be sorted).
+    """
+    return samples[max(1, math.ceil(len(samples) * fraction)) - 1]
+
+class Metrics:
+    """
+    Run-wide timing spans and counters. Shared by every page of a run, including pooled worker threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.spans: dict[str, list[float]] = {}
+        self.counters: dict[str, int] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans.setdefault(name, []).append(seconds * 1000)
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Times the block, including blocks that raise.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Decorator form of span().
+        """
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans = {}
+            self.counters = {}
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Per-span count, total, p50, p95 and max in milliseconds, plus the counters.
+        """
+        with self._lock:
+            spans = {name: sorted(samples) for name, samples in self.spans.items()}
+            counters = dict(self.counters)
+
+        return {
+            "spans": {
+                name: {
+                    "count": len(samples),
+                    "total_ms": round(sum(samples), 1),
+                    "p50_ms": round(percentile(samples, 0.50), 1),
+                    "p95_ms": round(percentile(samples, 0.95), 1),
+                    "max_ms": round(samples[-1], 1),
+                }
+                for name, samples in sorted(spans.items())
+            },
+            "counters": dict(sorted(counters.items())),
+        }
+
+    def emf_documents(self, namespace: str = METRICS_NAMESPACE, timestamp_ms: int | None = None) -> list[dict[str, Any]]:
+        """
+        The run summary as CloudWatch Embedded Metric Format documents: one per span
+        (dimensioned by Span) and the counters in chunks of EMF_MAX_METRICS.
+        """
+        summary = self.summary()
+        timestamp_ms = timestamp_ms if timestamp_ms is not None else int(time.time() * 1000)
+
+        def document(dimensions: list[str], values: dict[str, Any], units: dict[str, str]) -> dict[str, Any]:
+            return {
+                "_aws": {
+                    "Timestamp": timestamp_ms,
+                    "CloudWatchMetrics": [{
+                        "Namespace": namespace,
+                        "Dimensions": [dimensions],
+                        "Metrics": [{"Name": name, "Unit": units[name]} for name in units],
+                    }],
+                },
+                **values,
+            }
+
+        documents = []
+        for name, stats in summary["spans"].items():
+            values = {"Service": "cruise_finder", "Span": name, "DurationP50": stats["p50_ms"],
+                      "DurationP95": stats["p95_ms"], "DurationMax": stats["max_ms"], "Count": stats["count"]}
+            units = {"DurationP50": "Milliseconds", "DurationP95": "Milliseconds", "DurationMax": "Milliseconds",
+                     "Count": "Count"}
+            documents.append(document(["Service", "Span"], values, units))
+
+        counters = list(summary["counters"].items())
+        for start in range(0, len(counters), EMF_MAX_METRICS):
+            chunk = dict(counters[start:start + EMF_MAX_METRICS])
+            documents.append(document(["Service"], {"Service": "cruise_finder", **chunk},
+                                      {name: "Count" for name in chunk}))
+        return documents
+
+    def emit(self, metrics_format: str = METRICS_FORMAT) -> None:
+        """
+        Writes the run summary: EMF lines on stdout ("emf"), log lines ("log"), or nothing ("off").
+        """
+        if metrics_format == "emf":
+            for doc in self.emf_documents():
+                print(json.dumps(doc), flush=True)
+        elif metrics_format == "log":
+            summary = self.summary()
+            for name, stats in summary["spans"].items():
+                logging.info(f"📈 {name}: {stats['count']}x, p50 {stats['p50_ms']:.0f}ms, "
+                             f"p95 {stats['p95_ms']:.0f}ms, max {stats['max_ms']:.0f}ms")
+            if summary["counters"]:
+                logging.info("📈 " + ", ".join(f"{name}={value}" for name, value in summary["counters"].items()))
+
+metrics = Metrics()
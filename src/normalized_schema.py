@@ -0,0 +1,127 @@
+from datetime import date
+from typing import Any
+from trip_values import (format_display_date, format_occupancy, format_price, parse_display_date,
+                         parse_occupancy, parse_price, split_joined)
+
+SCHEMA_VERSION = 1
+CURRENCY = "USD"
+
+# Repeated strings stored once in a lookup table and referenced by index
+LOOKUP_TABLES = ("ships", "decks", "cabin_types", "destinations")
+
+class _Lookups:
+    def __init__(self) -> None:
+        self.tables: dict[str, list[str]] = {name: [] for name in LOOKUP_TABLES}
+        self._ids: dict[str, dict[str, int]] = {name: {} for name in LOOKUP_TABLES}
+
+    def id(self, table: str, value: str) -> int:
+        ids = self._ids[table]
+        if value not in ids:
+            ids[value] = len(self.tables[table])
+            self.tables[table].append(value)
+        return ids[value]
+
+def _date_field(key: str, text: str) -> dict[str, str]:
+    """
+    ISO date under `key`, or the original text under `<key>_text` when it doesn't round-trip.
+    """
+    parsed = parse_display_date(text)
+    if parsed is not None and format_display_date(parsed) == text:
+        return {key: parsed.isoformat()}
+    return {f"{key}_text": text}
+
+def _display_date(departure: dict[str, Any], key: str) -> str:
+    if key in departure:
+        return format_display_date(date.fromisoformat(departure[key]))
+    return departure[f"{key}_text"]
+
+def _normalize_category(category: dict[str, Any], lookups: _Lookups) -> dict[str, Any]:
+    price = parse_price(category.get("price"))
+    occupancy = parse_occupancy(category.get("occupancy"))
+    normalized = {
+        "name": category.get("category_name"),
+        "deck": lookups.id("decks", category.get("deck", "Unknown")),
+        "occupancy": occupancy,
+        "cabin_type": lookups.id("cabin_types", category.get("cabin_type", "Unknown")),
+        "price": price,
+        "status": category.get("status"),
+        "cabins": split_joined(category.get("cabinNumbers")),
+    }
+    # Keep display prices that don't round-trip (e.g. "Unknown" or "$9,999 pp")
+    if price is None or format_price(price) != category.get("price"):
+        normalized["price_text"] = category.get("price")
+    if format_occupancy(occupancy) != category.get("occupancy"):
+        normalized["occupancy_text"] = category.get("occupancy")
+    return normalized
+
+def _normalize_departure(departure: dict[str, Any], lookups: _Lookups) -> dict[str, Any]:
+    ship = departure.get("ship")
+    return {
+        **_date_field("start", departure.get("start_date", "")),
+        **_date_field("end", departure.get("end_date", "")),
+        "ship": lookups.id("ships", ship) if ship is not None else None,
+        "booking_url": departure.get("booking_url"),
+        "categories": [_normalize_category(c, lookups) for c in departure.get("categories", [])],
+    }
+
+def normalize_trips(trips: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Converts the trip list into the normalized schema: repeated strings move into lookup
+    tables referenced by index, prices become integers in CURRENCY, dates ISO 8601 and
+    cabin numbers arrays.
+    """
+    lookups = _Lookups()
+    normalized_trips = [
+        {
+            "name": trip.get("trip_name"),
+            "url": trip.get("url"),
+            "image_url": trip.get("image_url"),
+            "destinations": [lookups.id("destinations", d) for d in split_joined(trip.get("destinations"))],
+            "departures": [_normalize_departure(d, lookups) for d in trip.get("departures", [])],
+        }
+        for trip in trips
+    ]
+    return {"schema_version": SCHEMA_VERSION, "currency": CURRENCY, "lookups": lookups.tables,
+            "trips": normalized_trips}
+
+def denormalize_trips(document: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Converts a normalized document back into the trip list shape saved to trip_list.json.
+    """
+    if document.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported normalized schema version: {document.get('schema_version')}")
+    lookups = document["lookups"]
+
+    trips = []
+    for trip in document["trips"]:
+        departures = []
+        for departure in trip["departures"]:
+            categories = [
+                {
+                    "category_name": category["name"],
+                    "deck": lookups["decks"][category["deck"]],
+                    "occupancy": category.get("occupancy_text", format_occupancy(category["occupancy"])),
+                    "cabin_type": lookups["cabin_types"][category["cabin_type"]],
+                    "price": (category["price_text"] if "price_text" in category
+                              else format_price(category["price"])),
+                    "status": category["status"],
+                    "cabinNumbers": "|".join(category["cabins"]),
+                    "num_cabins": len(category["cabins"]),
+                }
+                for category in departure["categories"]
+            ]
+            departures.append({
+                "start_date": _display_date(departure, "start"),
+                "end_date": _display_date(departure, "end"),
+                "ship": lookups["ships"][departure["ship"]] if departure["ship"] is not None else None,
+                "booking_url": departure["booking_url"],
+                "categories": categories,
+            })
+        trips.append({
+            "trip_name": trip["name"],
+            "url": trip["url"],
+            "image_url": trip["image_url"],
+            "destinations": "|".join(lookups["destinations"][i] for i in trip["destinations"]),
+            "departures": departures,
+        })
+    return trips
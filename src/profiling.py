@@ -0,0 +1,206 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Iterator
+from config import (PROFILE_FOLDER, PROFILE_MAX_MB, PROFILE_MIN_SAMPLES, PROFILE_PAGES, PROFILE_PERCENTILE,
+                    PROFILE_TRACE)
+from metrics import percentile
+
+class ProfiledCall:
+    """
+    Outcome of one profiled call; the caller sets `retried` if the page needed retries.
+    """
+
+    def __init__(self, kind: str, label: str) -> None:
+        self.kind = kind
+        self.label = label
+        self.retried = False
+        self.failed = False
+        self.duration_s = 0.0
+        self.excluded_s = 0.0
+        self._python_profile: cProfile.Profile | None = None
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """
+        Leaves the enclosed time out of the duration and the Python profile, e.g. while a
+        profiled generator waits for its consumer.
+        """
+        if self._python_profile:
+            self._python_profile.disable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.excluded_s += time.perf_counter() - started
+            if self._python_profile:
+                try:
+                    self._python_profile.enable()
+                except ValueError:  # Another thread's profiler became active meanwhile (Python 3.12+)
+                    self._python_profile = None
+
+class SlowPageProfiler:
+    """
+    Opt-in outlier diagnostics: every profiled call runs under a Playwright trace chunk and
+    cProfile, but the artifacts are only kept for calls slower than the PROFILE_PERCENTILE of
+    earlier calls of the same kind, or that retried or failed. Kept artifacts live in one
+    folder per call under `folder`, and the oldest are evicted beyond `max_mb`.
+
+    Chunks only split the recording: once tracing starts, every page pays its cost, kept or
+    not. `trace` picks how much is recorded ("dom", "full" with screenshots, or "off").
+    """
+
+    def __init__(self, enabled: bool = PROFILE_PAGES, folder: str = PROFILE_FOLDER, max_mb: float = PROFILE_MAX_MB,
+                 slow_percentile: float = PROFILE_PERCENTILE, min_samples: int = PROFILE_MIN_SAMPLES,
+                 trace: str = PROFILE_TRACE) -> None:
+        self.enabled = enabled
+        self.trace = trace
+        self.folder = folder
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.slow_percentile = slow_percentile
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._durations: dict[str, list[float]] = {}
+        self._tracing_contexts: set[int] = set()
+        self.kept = 0
+        self.evicted = 0
+
+    def _start_trace(self, page: Any, title: str) -> Any:
+        """
+        Starts a trace chunk on the page's context (starting tracing on first use) and returns the tracing object.
+        """
+        if self.trace == "off":
+            return None
+        try:
+            context = page.context
+            with self._lock:
+                first_use = id(context) not in self._tracing_contexts
+                self._tracing_contexts.add(id(context))
+            if first_use:
+                context.tracing.start(screenshots=self.trace == "full", snapshots=True)
+            context.tracing.start_chunk(title=title)
+            return context.tracing
+        except Exception as e:
+            logging.warning(f"⚠️ Could not start Playwright tracing: {e}")
+            return None
+
+    def threshold(self, kind: str) -> float | None:
+        """
+        Duration (seconds) above which a call of `kind` counts as slow, or None until enough calls were seen.
+        """
+        with self._lock:
+            durations = sorted(self._durations.get(kind, []))
+        if len(durations) < self.min_samples:
+            return None
+        return percentile(durations, self.slow_percentile)
+
+    def _should_keep(self, call: ProfiledCall) -> tuple[bool, float | None]:
+        threshold = self.threshold(call.kind)
+        with self._lock:
+            self._durations.setdefault(call.kind, []).append(call.duration_s)
+        slow = threshold is not None and call.duration_s > threshold
+        return slow or call.retried or call.failed, threshold
+
+    @contextmanager
+    def profile(self, page: Any, kind: str, label: str) -> Iterator[ProfiledCall]:
+        call = ProfiledCall(kind, label)
+        if not self.enabled:
+            yield call
+            return
+
+        tracing = self._start_trace(page, f"{kind} {label}")
+        python_profile: cProfile.Profile | None = cProfile.Profile()
+        try:
+            python_profile.enable()
+        except ValueError:  # Python 3.12+ allows only one active profiler, e.g. with pooled workers
+            python_profile = None
+        call._python_profile = python_profile
+        started = time.perf_counter()
+        try:
+            yield call
+        except Exception:
+            call.failed = True
+            raise
+        finally:
+            if python_profile:
+                python_profile.disable()
+            call.duration_s = time.perf_counter() - started - call.excluded_s
+            keep, threshold = self._should_keep(call)
+            folder = self._save(call, threshold, python_profile, tracing) if keep else None
+            if tracing and folder is None:
+                self._discard_trace(tracing)
+
+    def _discard_trace(self, tracing: Any) -> None:
+        try:
+            tracing.stop_chunk()
+        except Exception as e:
+            logging.warning(f"⚠️ Could not stop Playwright tracing: {e}")
+
+    def _save(self, call: ProfiledCall, threshold: float | None, python_profile: cProfile.Profile | None,
+              tracing: Any) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", call.label).strip("-")[-60:] or "page"
+        folder = os.path.join(self.folder, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{call.kind}-{slug}")
+        os.makedirs(folder, exist_ok=True)
+
+        if tracing:
+            try:
+                tracing.stop_chunk(path=os.path.join(folder, "trace.zip"))
+            except Exception as e:
+                logging.warning(f"⚠️ Could not save Playwright trace: {e}")
+
+        if python_profile:
+            python_profile.dump_stats(os.path.join(folder, "profile.pstats"))
+            report = io.StringIO()
+            pstats.Stats(python_profile, stream=report).sort_stats("cumulative").print_stats(30)
+            with open(os.path.join(folder, "profile.txt"), "w", encoding="utf-8") as f:
+                f.write(report.getvalue())
+
+        reason = "failed" if call.failed else "retried" if call.retried else "slow"
+        with open(os.path.join(folder, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"kind": call.kind, "label": call.label, "reason": reason,
+                       "duration_s": round(call.duration_s, 3),
+                       "threshold_s": round(threshold, 3) if threshold is not None else None,
+                       "percentile": self.slow_percentile}, f, indent=2)
+
+        logging.info(f"🔬 Kept {reason} {call.kind} profile ({call.duration_s:.1f}s"
+                     f"{f' vs p{self.slow_percentile * 100:.0f} {threshold:.1f}s' if threshold is not None else ''}): {folder}")
+        with self._lock:
+            self.kept += 1
+            self._evict()
+        return folder
+
+    def _evict(self) -> None:
+        """
+        Deletes the oldest kept profiles until the folder fits in `max_bytes`.
+        """
+        entries = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if os.path.isdir(path):
+                size = sum(os.path.getsize(os.path.join(root, file))
+                           for root, _, files in os.walk(path) for file in files)
+                entries.append((name, path, size))
+
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):  # names start with their creation time
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evicted += 1
+
+    def log_summary(self) -> None:
+        if self.enabled:
+            logging.info(f"🔬 Profiling kept {self.kept} slow or failing pages in {self.folder} "
+                         f"({self.evicted} older profiles evicted).")
+
+profiler = SlowPageProfiler()
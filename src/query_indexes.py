@@ -0,0 +1,51 @@
+from typing import Any
+from records import Trip
+
+# Upper bounds (exclusive, USD) of the price buckets; a departure is bucketed by its cheapest category
+PRICE_BUCKETS = (5000, 10000, 15000, 20000, 30000)
+
+def price_bucket(price: int | None) -> str:
+    if price is None:
+        return "unknown"
+    lower = 0
+    for upper in PRICE_BUCKETS:
+        if price < upper:
+            return f"{lower}-{upper - 1}"
+        lower = upper
+    return f"{lower}+"
+
+def _add(index: dict[str, list[list[int]]], key: str, ref: list[int]) -> None:
+    index.setdefault(key, []).append(ref)
+
+def build_indexes(trips: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    Inverted indexes over the departures of `trips`, for the viewer's common filters.
+    Departures are referenced as [trip position, departure position] in the trip list.
+    """
+    by_destination: dict[str, list[list[int]]] = {}
+    by_ship: dict[str, list[list[int]]] = {}
+    by_month: dict[str, list[list[int]]] = {}
+    by_price: dict[str, list[list[int]]] = {}
+    cabins_available: list[list[int]] = []
+
+    # One typed record at a time, so dates, prices and cabins are parsed once without a second copy of the list
+    for t, trip in enumerate(map(Trip.from_dict, trips)):
+        for d, departure in enumerate(trip.departures):
+            ref = [t, d]
+            for destination in trip.destinations:
+                _add(by_destination, destination, ref)
+            _add(by_ship, departure.ship or "Unknown", ref)
+            _add(by_month, departure.start.strftime("%Y-%m") if departure.start else "unknown", ref)
+            _add(by_price, price_bucket(departure.min_price), ref)
+
+            if departure.available_cabins:
+                cabins_available.append([t, d, departure.available_cabins])
+
+    return {
+        "by_destination": by_destination,
+        "by_ship": by_ship,
+        "by_month": dict(sorted(by_month.items())),
+        "by_price": by_price,
+        # [trip, departure, available cabins], most available first
+        "cabins_available": {"departures": sorted(cabins_available, key=lambda row: -row[2])},
+    }
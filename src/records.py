@@ -0,0 +1,199 @@
+import sys
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any
+from trip_values import (format_display_date, format_occupancy, format_price, parse_display_date,
+                         parse_occupancy, parse_price, split_joined)
+
+def _intern(value: str | None) -> str | None:
+    """
+    Shares one string object for values repeated across records (ships, decks, statuses...).
+    """
+    return sys.intern(value) if value is not None else None
+
+def _absent(data: dict[str, Any], keys: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    The keys missing from `data`, so to_dict() leaves them out again. Empty for complete records.
+    """
+    return tuple(key for key in keys if key not in data)
+
+def _without(data: dict[str, Any], absent: tuple[str, ...]) -> dict[str, Any]:
+    for key in absent:
+        del data[key]
+    return data
+
+def _parsed_date(text: str | None) -> tuple[date | None, str | None]:
+    """
+    (parsed date, original text). The text is only kept when it doesn't round-trip.
+    """
+    parsed = parse_display_date(text)
+    if parsed is not None and format_display_date(parsed) == text:
+        return parsed, None
+    return parsed, text
+
+def _display_date(parsed: date | None, text: str | None) -> str:
+    if text is not None or parsed is None:
+        return text or ""
+    return format_display_date(parsed)
+
+@dataclass(slots=True)
+class Category:
+    """
+    One cabin category of a departure, with price, occupancy and cabins parsed.
+    """
+    name: str
+    deck: str
+    occupancy: int | None
+    cabin_type: str
+    price: int | None
+    status: str
+    cabins: tuple[str, ...] = ()
+    num_cabins: int = 0
+    # Display text kept only when it doesn't round-trip (e.g. "Unknown" or "$9,999 pp")
+    price_text: str | None = None
+    occupancy_text: str | None = None
+    absent: tuple[str, ...] = ()
+
+    KEYS = ("category_name", "deck", "occupancy", "cabin_type", "price", "status", "cabinNumbers", "num_cabins")
+
+    @property
+    def available(self) -> bool:
+        return self.status == "Available"
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Category":
+        price_text = data.get("price")
+        occupancy_text = data.get("occupancy")
+        price = parse_price(price_text)
+        occupancy = parse_occupancy(occupancy_text)
+        cabins = tuple(split_joined(data.get("cabinNumbers")))
+        return cls(
+            name=data.get("category_name", "Unknown"),
+            deck=_intern(data.get("deck", "Unknown")),
+            occupancy=occupancy,
+            cabin_type=_intern(data.get("cabin_type", "Unknown")),
+            price=price,
+            status=_intern(data.get("status", "Unknown")),
+            cabins=cabins,
+            num_cabins=data.get("num_cabins", len(cabins)),
+            price_text=None if price is not None and format_price(price) == price_text else price_text,
+            occupancy_text=None if format_occupancy(occupancy) == occupancy_text else occupancy_text,
+            absent=_absent(data, cls.KEYS),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return _without({
+            "category_name": self.name,
+            "deck": self.deck,
+            "occupancy": self.occupancy_text if self.occupancy_text is not None else format_occupancy(self.occupancy),
+            "cabin_type": self.cabin_type,
+            "price": format_price(self.price) if self.price_text is None and self.price is not None else self.price_text,
+            "status": self.status,
+            "cabinNumbers": "|".join(self.cabins),
+            "num_cabins": self.num_cabins,
+        }, self.absent)
+
+@dataclass(slots=True)
+class Departure:
+    """
+    One departure of a trip. `categories` is None until Phase 2 has scraped the booking page.
+    """
+    start: date | None
+    end: date | None
+    ship: str | None
+    booking_url: str
+    categories: list[Category] | None = None
+    # Display dates kept only when they don't round-trip
+    start_text: str | None = None
+    end_text: str | None = None
+    absent: tuple[str, ...] = ()
+
+    KEYS = ("start_date", "end_date", "ship", "booking_url")
+
+    @property
+    def min_price(self) -> int | None:
+        prices = [category.price for category in self.categories or [] if category.price is not None]
+        return min(prices) if prices else None
+
+    @property
+    def available_cabins(self) -> int:
+        return sum(category.num_cabins for category in self.categories or [])
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Departure":
+        start, start_text = _parsed_date(data.get("start_date"))
+        end, end_text = _parsed_date(data.get("end_date"))
+        categories = data.get("categories")
+        return cls(
+            start=start,
+            end=end,
+            ship=_intern(data.get("ship")),
+            booking_url=data.get("booking_url", "No URL Available"),
+            categories=[Category.from_dict(c) for c in categories] if categories is not None else None,
+            start_text=start_text,
+            end_text=end_text,
+            absent=_absent(data, cls.KEYS),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        data = {
+            "start_date": _display_date(self.start, self.start_text),
+            "end_date": _display_date(self.end, self.end_text),
+            "ship": self.ship,
+            "booking_url": self.booking_url,
+        }
+        if self.categories is not None:
+            data["categories"] = [category.to_dict() for category in self.categories]
+        return _without(data, self.absent)
+
+@dataclass(slots=True)
+class Trip:
+    """
+    One trip with its departures. `position` is the listing position used to order shards.
+    """
+    name: str
+    url: str
+    image_url: str
+    destinations: tuple[str, ...] = ()
+    departures: list[Departure] = field(default_factory=list)
+    position: Any = None
+    absent: tuple[str, ...] = ()
+
+    KEYS = ("trip_name", "url", "image_url", "destinations", "departures")
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Trip":
+        return cls(
+            name=data.get("trip_name", "Unnamed Trip"),
+            url=data.get("url", "No URL Available"),
+            image_url=data.get("image_url", ""),
+            destinations=tuple(_intern(d) for d in split_joined(data.get("destinations"))),
+            departures=[Departure.from_dict(d) for d in data.get("departures", [])],
+            position=data.get("_position"),
+            absent=_absent(data, cls.KEYS),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        data = {
+            "trip_name": self.name,
+            "url": self.url,
+            "image_url": self.image_url,
+            "destinations": "|".join(self.destinations),
+            "departures": [departure.to_dict() for departure in self.departures],
+        }
+        if self.position is not None:
+            data["_position"] = self.position
+        return _without(data, self.absent)
+
+def trips_from_json(trips: list[dict[str, Any]]) -> list[Trip]:
+    """
+    Typed records for a trip list in the trip_list.json shape.
+    """
+    return [Trip.from_dict(trip) for trip in trips]
+
+def trips_to_json(trips: list[Trip]) -> list[dict[str, Any]]:
+    """
+    The trip_list.json shape of typed records; trips_to_json(trips_from_json(x)) == x, keys
+    missing from x included.
+    """
+    return [trip.to_dict() for trip in trips]
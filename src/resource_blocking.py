@@ -0,0 +1,119 @@
+import logging
+import threading
+from typing import Any
+from urllib.parse import urlparse
+from config import RESOURCE_ALLOWLIST, RESOURCE_PROFILE
+
+# Analytics, tag managers and third-party consent scripts the parsers never read
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googleadservices.com",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "bat.bing.com",
+    "segment.io",
+    "segment.com",
+    "nr-data.net",
+    "newrelic.com",
+    "onetrust.com",
+    "cookielaw.org",
+    "trustarc.com",
+    "pinterest.com",
+    "tiktok.com",
+)
+
+PROFILES: dict[str, dict[str, Any]] = {
+    "off": {"resource_types": set(), "domains": ()},
+    # We only read image_url from the <img> src attribute, so the pixels are never needed
+    "lean": {"resource_types": {"image", "media", "font"}, "domains": TRACKER_DOMAINS},
+}
+
+class BlockingStats:
+    """
+    Counts requests aborted by the routing profile and bytes actually downloaded, per run.
+    Bytes of aborted requests are never transferred, so they cannot be measured directly.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.blocked: dict[str, int] = {}
+        self.allowed_requests = 0
+        self.downloaded_bytes = 0
+
+    def record_blocked(self, reason: str) -> None:
+        with self._lock:
+            self.blocked[reason] = self.blocked.get(reason, 0) + 1
+
+    def record_response(self, response: Any) -> None:
+        length = response.headers.get("content-length")
+        with self._lock:
+            self.allowed_requests += 1
+            self.downloaded_bytes += int(length) if length and length.isdigit() else 0
+
+    def log_summary(self) -> None:
+        with self._lock:
+            blocked = dict(self.blocked)
+            allowed, downloaded = self.allowed_requests, self.downloaded_bytes
+        total_blocked = sum(blocked.values())
+        if not total_blocked and not allowed:
+            return
+
+        logging.info(f"🧱 Blocked {total_blocked} requests; allowed {allowed} "
+                     f"({downloaded / 1_048_576:.1f} MiB downloaded, by Content-Length).")
+        for reason, count in sorted(blocked.items(), key=lambda item: -item[1]):
+            logging.info(f"    {reason}: {count}")
+
+blocking_stats = BlockingStats()
+
+class ResourceBlocker:
+    """
+    Aborts requests matching a blocking profile, except URLs containing an allowlisted substring.
+    """
+
+    def __init__(self, profile: str = RESOURCE_PROFILE, allowlist: tuple[str, ...] = RESOURCE_ALLOWLIST) -> None:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown resource profile '{profile}'. Expected one of: {', '.join(PROFILES)}")
+        self.profile = profile
+        self.resource_types = PROFILES[profile]["resource_types"]
+        self.domains = PROFILES[profile]["domains"]
+        self.allowlist = allowlist
+
+    def block_reason(self, url: str, resource_type: str) -> str | None:
+        """
+        Returns why a request should be aborted, or None to let it through.
+        """
+        if any(allowed in url for allowed in self.allowlist):
+            return None
+        if resource_type in self.resource_types:
+            return resource_type
+
+        host = urlparse(url).hostname or ""
+        for domain in self.domains:
+            if host == domain or host.endswith("." + domain):
+                return f"tracker:{domain}"
+        return None
+
+    def _handle_route(self, route: Any) -> None:
+        request = route.request
+        reason = self.block_reason(request.url, request.resource_type)
+        if reason:
+            blocking_stats.record_blocked(reason)
+            route.abort()
+        else:
+            route.continue_()
+
+    def install(self, page: Any) -> None:
+        """
+        Routes every request of `page` (or a browser context) through the profile.
+        """
+        if self.profile == "off":
+            return
+        page.route("**/*", self._handle_route)
+        page.on("response", blocking_stats.record_response)
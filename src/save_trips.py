@@ -1,8 +1,27 @@
 import os
+import gzip
 import json
+import shutil
+import hashlib
 import logging
-from typing import Any
+import textwrap
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
 import boto3
+from botocore.exceptions import ClientError
+from config import MULTIPART_PART_MB, SPLIT_OUTPUT_BROTLI, SPLIT_OUTPUT_FOLDER
+from metrics import metrics
+from normalized_schema import normalize_trips
+from query_indexes import build_indexes
+from shards import trip_key
+from trip_values import min_price
+
+try:
+    import brotli
+except ImportError:  # Optional: only needed for SPLIT_OUTPUT_BROTLI
+    brotli = None
 
 # AWS S3 Configuration
 AWS_REGION = "us-west-2"
@@ -14,6 +33,37 @@ s3 = boto3.client("s3", region_name=AWS_REGION)
 # File Configuration
 OUTPUT_FOLDER = "output"
 JSON_FILENAME = f"{OUTPUT_FOLDER}/trip_list.json"
+DELTA_FILENAME = f"{OUTPUT_FOLDER}/trip_list.delta.json"
+NORMALIZED_FILENAME = f"{OUTPUT_FOLDER}/trip_list.normalized.json"
+INDEX_FOLDER = f"{OUTPUT_FOLDER}/indexes"
+
+S3_KEY = "trip_list.json"  # Keep a single, consistent filename in S3
+DELTA_S3_KEY = "trip_list.delta.json"
+NORMALIZED_S3_KEY = "trip_list.normalized.json"
+INDEX_S3_PREFIX = "indexes"
+
+# S3 user metadata key holding the canonical content hash of the published trip list
+HASH_METADATA_KEY = "content-sha256"
+
+# Split layout: S3 prefix, and cache headers for content-addressed files vs. the manifest that points at them
+SPLIT_S3_PREFIX = "trips"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MANIFEST_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+def content_hash(trips: list[dict[str, Any]]) -> str:
+    """
+    SHA-256 of the trips in canonical form (sorted keys, no whitespace), so formatting changes
+    never count as a content change.
+    """
+    canonical = json.dumps(trips, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def write_json(data: Any, path: str) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    return path
 
 def save_to_json(trips: list[dict[str, Any]]) -> str:
     """
@@ -24,38 +74,548 @@ def save_to_json(trips: list[dict[str, Any]]) -> str:
     logging.info(f"📁 Saving trips to JSON: {JSON_FILENAME}")
 
     try:
-        with open(JSON_FILENAME, "w", encoding="utf-8") as f:
-            json.dump(trips, f, indent=4)
+        write_json(trips, JSON_FILENAME)
 
         logging.info("✅ JSON file saved successfully.")
 
         # Uploading using the updated upload_to_s3 function
-        upload_to_s3(JSON_FILENAME)
+        upload_to_s3(JSON_FILENAME, metadata={HASH_METADATA_KEY: content_hash(trips)})
 
     except PermissionError as e:
         logging.error(f"❌ Permission error writing to {JSON_FILENAME}: {e}")
 
     return JSON_FILENAME
 
-def upload_to_s3(file_path: str) -> None:
+def upload_to_s3(file_path: str, s3_key: str = S3_KEY, metadata: dict[str, str] | None = None,
+                 s3_client: Any = None) -> bool:
     """
     Uploads the JSON file to the AWS S3 bucket as `trip_list.json`.
     """
+    s3_client = s3_client or s3
 
     # Validate file path before uploading
     if not isinstance(file_path, str) or not os.path.exists(file_path):
         logging.error(f"❌ Invalid file path: {file_path}. Cannot upload to S3.")
-        return
-
-    s3_key = "trip_list.json"  # Keep a single, consistent filename in S3
+        return False
 
     logging.info(f"📤 Uploading {file_path} to S3 as {s3_key}...")
 
+    extra_args: dict[str, Any] = {"ContentType": "application/json"}
+    if metadata:
+        extra_args["Metadata"] = metadata
+
     try:
-        s3.upload_file(file_path, S3_BUCKET_NAME, s3_key)
+        with metrics.span("s3_upload"):
+            s3_client.upload_file(file_path, S3_BUCKET_NAME, s3_key, ExtraArgs=extra_args)
         logging.info(f"✅ Successfully uploaded to s3://{S3_BUCKET_NAME}/{s3_key}")
+        return True
     except Exception as e:
         logging.error(f"❌ Failed to upload to S3: {e}")
+        metrics.count("s3_upload_failures")
+        return False
+
+def _is_not_found(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+def _is_access_denied(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("403", "AccessDenied", "Forbidden")
+
+_read_denied_logged = False
+
+def _head_object(s3_client: Any, s3_key: str) -> dict[str, Any] | None:
+    """
+    HEAD of a published object, or None if it doesn't exist. A role without s3:GetObject gets a
+    403 here (for missing keys too, without s3:ListBucket); that is also None, so the caller
+    uploads anyway instead of failing the run.
+    """
+    global _read_denied_logged
+    try:
+        return s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+    except ClientError as e:
+        if _is_not_found(e):
+            return None
+        if not _is_access_denied(e):
+            raise
+        metrics.count("s3_read_denied")
+        if not _read_denied_logged:
+            _read_denied_logged = True
+            logging.warning(f"⚠️ No read access to s3://{S3_BUCKET_NAME} ({e}). "
+                            "Uploading without checking the published copies.")
+        return None
+
+def published_fingerprint(s3_client: Any = None, s3_key: str = S3_KEY) -> tuple[str | None, str | None]:
+    """
+    Returns the (content hash metadata, ETag) of the currently published object, or
+    (None, None) if nothing has been published yet or it can't be read.
+    """
+    head = _head_object(s3_client or s3, s3_key)
+    if head is None:
+        return None, None
+    return head.get("Metadata", {}).get(HASH_METADATA_KEY), head.get("ETag", "").strip('"')
+
+def fetch_published_trips(s3_client: Any = None) -> list[dict[str, Any]]:
+    s3_client = s3_client or s3
+    try:
+        response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=S3_KEY)
+        return json.loads(response["Body"].read())
+    except Exception as e:
+        logging.warning(f"⚠️ Could not read the published trip list for the delta: {e}")
+        return []
+
+def _departure_index(trips: list[dict[str, Any]]) -> dict[str, tuple[dict[str, Any], dict[str, Any]]]:
+    return {
+        f"{trip.get('url')}|{departure.get('booking_url')}": (trip, departure)
+        for trip in trips for departure in trip.get("departures", [])
+    }
+
+def _category_key(category: dict[str, Any]) -> str:
+    return f"{category.get('category_name')}|{category.get('deck')}"
+
+def _summary(trip: dict[str, Any], departure: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "trip_name": trip.get("trip_name"),
+        "trip_url": trip.get("url"),
+        "booking_url": departure.get("booking_url"),
+        "start_date": departure.get("start_date"),
+        "end_date": departure.get("end_date"),
+    }
+
+def compute_delta(previous: list[dict[str, Any]], current: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Lists departures added, removed and changed between two trip lists. Changed departures
+    carry their added, removed and changed categories (keyed by category name and deck).
+    """
+    old = _departure_index(previous)
+    new = _departure_index(current)
+
+    changed = []
+    for key in new.keys() & old.keys():
+        old_trip, old_departure = old[key]
+        new_trip, new_departure = new[key]
+        if old_departure == new_departure:
+            continue
+
+        old_categories = {_category_key(c): c for c in old_departure.get("categories", [])}
+        new_categories = {_category_key(c): c for c in new_departure.get("categories", [])}
+        changed.append({
+            **_summary(new_trip, new_departure),
+            "categories_added": [new_categories[k] for k in new_categories.keys() - old_categories.keys()],
+            "categories_removed": [old_categories[k] for k in old_categories.keys() - new_categories.keys()],
+            "categories_changed": [
+                {"before": old_categories[k], "after": new_categories[k]}
+                for k in new_categories.keys() & old_categories.keys() if old_categories[k] != new_categories[k]
+            ],
+        })
+
+    return {
+        "previous_hash": content_hash(previous) if previous else None,
+        "current_hash": content_hash(current),
+        "added": [_summary(*new[key]) | {"categories": new[key][1].get("categories", [])}
+                  for key in new if key not in old],
+        "removed": [_summary(*old[key]) for key in old if key not in new],
+        "changed": sorted(changed, key=lambda d: (d["trip_url"] or "", d["booking_url"] or "")),
+    }
+
+def _published_hash(s3_client: Any, digest: str) -> tuple[str | None, str | None]:
+    """
+    (content hash, ETag) of the published trip list. For older uploads without hash metadata,
+    the hash is inferred from a single-part ETag, which is the MD5 of the local JSON_FILENAME bytes.
+    """
+    published_hash, etag = published_fingerprint(s3_client)
+    if published_hash is None and etag:
+        with open(JSON_FILENAME, "rb") as f:
+            published_hash = digest if hashlib.md5(f.read()).hexdigest() == etag else None
+    return published_hash, etag
+
+def _write_delta(trips: list[dict[str, Any]], etag: str | None, s3_client: Any) -> None:
+    delta = compute_delta(fetch_published_trips(s3_client) if etag else [], trips)
+    write_json(delta, DELTA_FILENAME)
+    logging.info(f"🧮 Delta: {len(delta['added'])} added, {len(delta['removed'])} removed, "
+                 f"{len(delta['changed'])} changed departures.")
+
+def publish_trips(trips: list[dict[str, Any]], s3_client: Any = None) -> bool:
+    """
+    Saves the trip list locally and publishes it only if its content differs from the
+    published copy, together with a delta against that copy.
+    Returns True when something was uploaded (and the CDN should be invalidated).
+    """
+    s3_client = s3_client or s3
+    digest = content_hash(trips)
+
+    logging.info(f"📁 Saving trips to JSON: {JSON_FILENAME}")
+    try:
+        write_json(trips, JSON_FILENAME)
+    except PermissionError as e:
+        logging.error(f"❌ Permission error writing to {JSON_FILENAME}: {e}")
+        return False
+
+    published_hash, etag = _published_hash(s3_client, digest)
+    if published_hash == digest:
+        logging.info(f"⏭️ Trip list unchanged (sha256 {digest[:12]}). Skipping upload and invalidation.")
+        return False
+
+    _write_delta(trips, etag, s3_client)
+    uploaded = upload_to_s3(JSON_FILENAME, S3_KEY, {HASH_METADATA_KEY: digest}, s3_client)
+    if uploaded:
+        upload_to_s3(DELTA_FILENAME, DELTA_S3_KEY, {HASH_METADATA_KEY: digest}, s3_client)
+    return uploaded
+
+class TripListWriter:
+    """
+    Appends trips to a JSON array file as they finish, so the trip list never has to be
+    serialized in one piece. The file is valid JSON once closed and byte-identical to
+    write_json(trips, path); the content hash is computed along the way. `on_data` receives
+    every chunk of encoded bytes written.
+    """
+
+    def __init__(self, path: str = JSON_FILENAME, on_data: Callable[[bytes], None] | None = None) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.on_data = on_data
+        self.count = 0
+        self._file = open(path, "wb")
+        # content_hash() of a list is the hash of "[" + ",".join(canonical items) + "]"
+        self._hash = hashlib.sha256(b"[")
+        self._lock = threading.Lock()
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        if self.on_data:
+            self.on_data(data)
+
+    def append(self, trip: dict[str, Any]) -> None:
+        canonical = json.dumps(trip, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        item = textwrap.indent(json.dumps(trip, indent=4), "    ").encode("utf-8")
+        with self._lock:
+            self._hash.update(b"," + canonical if self.count else canonical)
+            self._write((b",\n" if self.count else b"[\n") + item)
+            self.count += 1
+
+    def close(self) -> str:
+        """
+        Ends the JSON array and returns the content hash of the trips written.
+        """
+        with self._lock:
+            if self._file.closed:
+                return self._hash.hexdigest()
+            self._write(b"\n]" if self.count else b"[]")
+            self._file.close()
+            self._hash.update(b"]")
+            return self._hash.hexdigest()
+
+class MultipartUpload:
+    """
+    Streams bytes to S3 while they are produced. Once `part_size` bytes are buffered a
+    multipart upload is started on a staging key and full parts are sent from a background
+    thread. commit() publishes everything at `s3_key` in one step (a server-side copy that
+    also sets the metadata), so readers never see a partial object; abort() discards it.
+    Data smaller than one part is sent with a single put_object at commit.
+    """
+
+    def __init__(self, s3_key: str, s3_client: Any = None, part_size: int = MULTIPART_PART_MB * 1024 * 1024,
+                 content_type: str = "application/json") -> None:
+        self.s3 = s3_client or s3
+        self.s3_key = s3_key
+        self.staging_key = f"{s3_key}.uploading-{uuid.uuid4().hex[:12]}"
+        self.part_size = part_size
+        self.content_type = content_type
+        self.upload_id: str | None = None
+        self._staged = False
+        self._buffer = bytearray()
+        self._parts: list[Future[dict[str, Any]]] = []
+        self._executor: ThreadPoolExecutor | None = None
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._send_part(part)
+
+    def _send_part(self, body: bytes) -> None:
+        if self.upload_id is None:
+            response = self.s3.create_multipart_upload(Bucket=S3_BUCKET_NAME, Key=self.staging_key,
+                                                       ContentType=self.content_type)
+            self.upload_id = response["UploadId"]
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="s3-parts")
+            logging.info(f"📤 Streaming {self.s3_key} to S3 in {self.part_size // (1024 * 1024)} MB parts...")
+        self._parts.append(self._executor.submit(self._upload_part, len(self._parts) + 1, body))
+
+    def _upload_part(self, part_number: int, body: bytes) -> dict[str, Any]:
+        with metrics.span("s3_upload_part"):
+            response = self.s3.upload_part(Bucket=S3_BUCKET_NAME, Key=self.staging_key, UploadId=self.upload_id,
+                                           PartNumber=part_number, Body=body)
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def commit(self, metadata: dict[str, str] | None = None) -> bool:
+        """
+        Sends the rest of the data and publishes the object at `s3_key`. Returns False (after
+        aborting) if any part failed.
+        """
+        try:
+            with metrics.span("s3_upload"):
+                if self.upload_id is None:
+                    self.s3.put_object(Bucket=S3_BUCKET_NAME, Key=self.s3_key, Body=bytes(self._buffer),
+                                       ContentType=self.content_type, Metadata=metadata or {})
+                else:
+                    if self._buffer:
+                        self._send_part(bytes(self._buffer))
+                    parts = [part.result() for part in self._parts]
+                    self.s3.complete_multipart_upload(Bucket=S3_BUCKET_NAME, Key=self.staging_key,
+                                                      UploadId=self.upload_id, MultipartUpload={"Parts": parts})
+                    self.upload_id = None
+                    self._staged = True
+                    self.s3.copy_object(Bucket=S3_BUCKET_NAME, Key=self.s3_key,
+                                        CopySource={"Bucket": S3_BUCKET_NAME, "Key": self.staging_key},
+                                        MetadataDirective="REPLACE", ContentType=self.content_type,
+                                        Metadata=metadata or {})
+                    self._delete_staging()
+            logging.info(f"✅ Successfully uploaded to s3://{S3_BUCKET_NAME}/{self.s3_key}")
+            return True
+        except Exception as e:
+            logging.error(f"❌ Failed to upload to S3: {e}")
+            metrics.count("s3_upload_failures")
+            self.abort()
+            return False
+        finally:
+            self._shutdown()
+
+    def abort(self) -> None:
+        """
+        Discards the parts sent so far, or the staging object if the final copy failed; nothing
+        is published. Does nothing once commit() has succeeded.
+        """
+        self._buffer.clear()
+        if self._staged:
+            self._delete_staging()
+        if self.upload_id is not None:
+            for part in self._parts:
+                part.exception()  # Let in-flight parts finish before they are discarded
+            try:
+                self.s3.abort_multipart_upload(Bucket=S3_BUCKET_NAME, Key=self.staging_key, UploadId=self.upload_id)
+            except Exception as e:
+                logging.warning(f"⚠️ Could not abort the multipart upload of {self.s3_key}: {e}")
+            self.upload_id = None
+        self._shutdown()
+
+    def _delete_staging(self) -> None:
+        try:
+            self.s3.delete_object(Bucket=S3_BUCKET_NAME, Key=self.staging_key)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not delete the staging object {self.staging_key}: {e}")
+        self._staged = False
+
+    def _shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+class StreamingTripPublisher:
+    """
+    publish_trips() for trips that arrive one at a time: each trip is appended to
+    JSON_FILENAME and streamed to S3 as it finishes. finish() commits the upload only if the
+    content differs from the published copy (uploading the delta too), and aborts it otherwise.
+    """
+
+    def __init__(self, s3_client: Any = None, part_size: int = MULTIPART_PART_MB * 1024 * 1024) -> None:
+        self.s3 = s3_client or s3
+        self.upload = MultipartUpload(S3_KEY, self.s3, part_size)
+        self.writer = TripListWriter(JSON_FILENAME, on_data=self.upload.write)
+        logging.info(f"📁 Streaming trips to JSON: {JSON_FILENAME}")
+
+    def append(self, trip: dict[str, Any]) -> None:
+        self.writer.append(trip)
+
+    def finish(self, trips: list[dict[str, Any]]) -> bool:
+        """
+        Returns True when the trip list was published (and the CDN should be invalidated).
+        `trips` are the trips that were appended, used to build the delta.
+        """
+        digest = self.writer.close()
+        logging.info(f"✅ Streamed {self.writer.count} trips to {JSON_FILENAME}.")
+
+        published_hash, etag = _published_hash(self.s3, digest)
+        if published_hash == digest:
+            logging.info(f"⏭️ Trip list unchanged (sha256 {digest[:12]}). Discarding the upload.")
+            self.upload.abort()
+            return False
+
+        _write_delta(trips, etag, self.s3)
+        uploaded = self.upload.commit({HASH_METADATA_KEY: digest})
+        if uploaded:
+            upload_to_s3(DELTA_FILENAME, DELTA_S3_KEY, {HASH_METADATA_KEY: digest}, self.s3)
+        return uploaded
+
+    def abort(self) -> None:
+        self.writer.close()
+        self.upload.abort()
+
+def publish_normalized(trips: list[dict[str, Any]], s3_client: Any = None) -> bool:
+    """
+    Writes and uploads the trip list in the normalized schema, unless the published copy was
+    built from the same content. Returns True when it was uploaded.
+    """
+    s3_client = s3_client or s3
+    digest = content_hash(trips)
+
+    os.makedirs(os.path.dirname(NORMALIZED_FILENAME) or ".", exist_ok=True)
+    with open(NORMALIZED_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(normalize_trips(trips), f, separators=(",", ":"), ensure_ascii=False)
+    logging.info(f"📁 Saved normalized trip list to {NORMALIZED_FILENAME} "
+                 f"({os.path.getsize(NORMALIZED_FILENAME):,} bytes).")
+
+    if published_fingerprint(s3_client, NORMALIZED_S3_KEY)[0] == digest:
+        logging.info("⏭️ Normalized trip list unchanged. Skipping upload.")
+        return False
+    return upload_to_s3(NORMALIZED_FILENAME, NORMALIZED_S3_KEY, {HASH_METADATA_KEY: digest}, s3_client)
+
+def publish_indexes(trips: list[dict[str, Any]], s3_client: Any = None, folder: str = INDEX_FOLDER) -> bool:
+    """
+    Writes one small JSON file per query index and uploads those built from new content.
+    Each file carries the hash of the trip list it indexes. Returns True if any was uploaded.
+    """
+    s3_client = s3_client or s3
+    digest = content_hash(trips)
+    os.makedirs(folder, exist_ok=True)
+
+    uploaded = False
+    for name, index in build_indexes(trips).items():
+        path = os.path.join(folder, f"{name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"source_sha256": digest, "index": index}, f, separators=(",", ":"), ensure_ascii=False)
+
+        key = f"{INDEX_S3_PREFIX}/{name}.json"
+        if published_fingerprint(s3_client, key)[0] == digest:
+            continue
+        uploaded |= upload_to_s3(path, key, {HASH_METADATA_KEY: digest}, s3_client)
+
+    logging.info(f"🗂️ Query indexes written to {folder}{'' if uploaded else ' (unchanged, not uploaded)'}.")
+    return uploaded
+
+def trip_id(trip: dict[str, Any]) -> str:
+    return hashlib.sha1(trip_key(trip).encode("utf-8")).hexdigest()[:12]
+
+def _compact(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def _write_encoded(folder: str, name: str, data: Any, use_brotli: bool) -> dict[str, Any]:
+    """
+    Writes `data` as compact JSON under a content-addressed name, gzip-compressed (and brotli
+    if requested), and returns its manifest entry. The gzip variant is written locally as
+    `path`.gz but served at `path` itself, so its entry has no `file` of its own.
+    """
+    raw = _compact(data)
+    digest = hashlib.sha256(raw).hexdigest()
+    path = f"{name}.{digest[:16]}.json"
+    os.makedirs(os.path.dirname(os.path.join(folder, path)) or ".", exist_ok=True)
+
+    # mtime=0 keeps the gzip bytes identical for identical content
+    encodings = {"gzip": gzip.compress(raw, compresslevel=9, mtime=0)}
+    if use_brotli:
+        encodings["br"] = brotli.compress(raw, quality=11)
+
+    entry: dict[str, Any] = {"path": path, "sha256": digest, "size": len(raw), "encodings": {}}
+    for encoding, payload in encodings.items():
+        suffix = ".gz" if encoding == "gzip" else ".br"
+        with open(os.path.join(folder, path + suffix), "wb") as f:
+            f.write(payload)
+        entry["encodings"][encoding] = {"size": len(payload)} if encoding == "gzip" else \
+            {"file": path + suffix, "size": len(payload)}
+    return entry
+
+def trip_index_entry(trip: dict[str, Any], detail_path: str) -> dict[str, Any]:
+    departures = trip.get("departures", [])
+    return {
+        "id": trip_id(trip),
+        "trip_name": trip.get("trip_name"),
+        "url": trip.get("url"),
+        "image_url": trip.get("image_url"),
+        "destinations": trip.get("destinations"),
+        "departure_dates": [departure.get("start_date") for departure in departures],
+        "min_price": min_price(departures),
+        "detail": detail_path,
+    }
+
+def write_split_output(trips: list[dict[str, Any]], folder: str = SPLIT_OUTPUT_FOLDER,
+                       use_brotli: bool = SPLIT_OUTPUT_BROTLI) -> dict[str, Any]:
+    """
+    Writes a compact trip index plus one detail file per trip, pre-compressed, and a manifest
+    listing every file with its hash. Returns the manifest.
+    """
+    if use_brotli and brotli is None:
+        logging.warning("⚠️ SPLIT_OUTPUT_BROTLI is set but the brotli package is not installed. Writing gzip only.")
+        use_brotli = False
+
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder, exist_ok=True)
+
+    details = {}
+    index = []
+    for trip in trips:
+        entry = _write_encoded(folder, f"detail/{trip_id(trip)}", trip, use_brotli)
+        details[trip_id(trip)] = entry
+        index.append(trip_index_entry(trip, entry["path"]))
+
+    manifest = {
+        "version": 1,
+        "content_sha256": content_hash(trips),
+        "index": _write_encoded(folder, "index", index, use_brotli),
+        "trips": details,
+    }
+    write_json(manifest, os.path.join(folder, MANIFEST_NAME))
+
+    compressed = sum(e["encodings"]["gzip"]["size"] for e in [manifest["index"], *details.values()])
+    raw = sum(e["size"] for e in [manifest["index"], *details.values()])
+    logging.info(f"🗜️ Wrote split output for {len(trips)} trips to {folder}: "
+                 f"{raw:,} bytes of JSON, {compressed:,} bytes gzipped.")
+    return manifest
+
+def _split_uploads(manifest: dict[str, Any]) -> list[tuple[str, str, str]]:
+    """
+    (local file, S3 key, Content-Encoding) for every compressed file in the manifest. The gzip
+    variant is served under the plain .json key (the entry's `path`) so clients decode it
+    transparently; other variants under their own `file`.
+    """
+    uploads = []
+    for entry in [*manifest["trips"].values(), manifest["index"]]:
+        for encoding, variant in entry["encodings"].items():
+            if encoding == "gzip":
+                uploads.append((entry["path"] + ".gz", f"{SPLIT_S3_PREFIX}/{entry['path']}", encoding))
+            else:
+                uploads.append((variant["file"], f"{SPLIT_S3_PREFIX}/{variant['file']}", encoding))
+    return uploads
+
+def publish_split(trips: list[dict[str, Any]], s3_client: Any = None, folder: str = SPLIT_OUTPUT_FOLDER) -> bool:
+    """
+    Writes and uploads the split layout. Content-addressed files that already exist in S3 are
+    not re-sent, and the manifest goes last so readers never see it point at missing files.
+    Returns True when the manifest changed (and the CDN should be invalidated).
+    """
+    s3_client = s3_client or s3
+    manifest = write_split_output(trips, folder)
+    manifest_key = f"{SPLIT_S3_PREFIX}/{MANIFEST_NAME}"
+
+    if published_fingerprint(s3_client, manifest_key)[0] == manifest["content_sha256"]:
+        logging.info("⏭️ Split output unchanged. Skipping upload and invalidation.")
+        return False
+
+    sent = 0
+    for file_name, key, encoding in _split_uploads(manifest):
+        if _head_object(s3_client, key) is not None:
+            continue
+        with open(os.path.join(folder, file_name), "rb") as f, metrics.span("s3_upload"):
+            s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=f.read(), ContentType="application/json",
+                                 ContentEncoding=encoding, CacheControl=IMMUTABLE_CACHE_CONTROL)
+        sent += 1
+
+    with open(os.path.join(folder, MANIFEST_NAME), "rb") as f:
+        s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=manifest_key, Body=gzip.compress(f.read(), mtime=0),
+                             ContentType="application/json", ContentEncoding="gzip",
+                             CacheControl=MANIFEST_CACHE_CONTROL,
+                             Metadata={HASH_METADATA_KEY: manifest["content_sha256"]})
+
+    logging.info(f"✅ Uploaded {sent} new split files and the manifest to s3://{S3_BUCKET_NAME}/{SPLIT_S3_PREFIX}/")
+    return True
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -0,0 +1,250 @@
+import json
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Any
+from urllib.parse import parse_qsl, urlencode
+from config import BASE_URL, END_DATE, SEARCH_PAYLOAD_URL_PATTERN
+from snapshots import snapshots
+
+# The listing page is an Algolia InstantSearch UI (infinitehits / hits containers). Each hit
+# field may appear under several names depending on the index, so candidates are tried in order.
+HIT_FIELDS = {
+    "trip_name": ("name", "title", "tripName"),
+    "url": ("url", "path", "slug"),
+    "image_url": ("image", "imageUrl", "thumbnail"),
+    "destinations": ("destinations", "destinationNames"),
+    "departures": ("departures", "departureHits"),
+}
+
+DEPARTURE_FIELDS = {
+    "start_date": ("startDate", "start_date", "departureDate"),
+    "end_date": ("endDate", "end_date", "returnDate"),
+    "ship": ("ship", "shipName", "vessel"),
+    "booking_url": ("bookingUrl", "booking_url", "url"),
+    "is_land_expedition": ("isLandExpedition", "landExpedition"),
+}
+
+def first_field(record: dict[str, Any], candidates: tuple[str, ...]) -> Any:
+    """
+    The first non-empty value among the candidate field names (shared with http_tier).
+    """
+    for key in candidates:
+        if key in record and record[key] not in (None, ""):
+            return record[key]
+    return None
+
+def field_text(value: Any) -> str:
+    """
+    Flattens a hit value that may be a string or a {"name"/"url": ...} object.
+    """
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("url") or value.get("src") or ""
+    return str(value).strip() if value is not None else ""
+
+def _absolute(url: str) -> str:
+    return url if not url or url.startswith("http") else BASE_URL + url
+
+def _display_date(value: Any) -> str:
+    """
+    Converts an epoch timestamp or ISO date into the DOM format used by fetch_departures ("2025 May 23").
+    """
+    if isinstance(value, (int, float)):
+        parsed = datetime.fromtimestamp(value / 1000 if value > 10**11 else value, tz=timezone.utc)
+    else:
+        parsed = datetime.fromisoformat(str(value)[:10])
+    return f"{parsed.year} {parsed.strftime('%b')} {parsed.day}"
+
+def extract_hits(payload: Any) -> list[dict[str, Any]]:
+    """
+    Returns the hits of an Algolia-style response (`{"results": [{"hits": [...]}]}` or `{"hits": [...]}`).
+    """
+    if not isinstance(payload, dict):
+        return []
+    if isinstance(payload.get("results"), list):
+        hits = []
+        for result in payload["results"]:
+            hits.extend(extract_hits(result))
+        return hits
+    hits = payload.get("hits")
+    return [hit for hit in hits if isinstance(hit, dict)] if isinstance(hits, list) else []
+
+def departure_from_hit(hit: dict[str, Any], end_cutoff: datetime) -> dict[str, str] | None:
+    start = first_field(hit, DEPARTURE_FIELDS["start_date"])
+    end = first_field(hit, DEPARTURE_FIELDS["end_date"])
+    booking_url = _absolute(field_text(first_field(hit, DEPARTURE_FIELDS["booking_url"])))
+    if start is None or end is None or not booking_url:
+        return None
+
+    try:
+        start_date = _display_date(start)
+        end_date = _display_date(end)
+    except (ValueError, OverflowError) as e:
+        logging.warning(f"Could not parse departure dates {start!r} - {end!r}: {e}")
+        return None
+
+    if datetime.strptime(start_date, "%Y %b %d") > end_cutoff:
+        return None
+
+    is_land = bool(first_field(hit, DEPARTURE_FIELDS["is_land_expedition"]))
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "ship": "Land Expedition" if is_land else field_text(first_field(hit, DEPARTURE_FIELDS["ship"])),
+        "booking_url": booking_url
+    }
+
+def trip_from_hit(hit: dict[str, Any], end_cutoff: datetime) -> dict[str, Any] | None:
+    """
+    Builds a trip in the same shape as the DOM path, or None if the hit has no departure list.
+    """
+    trip_name = field_text(first_field(hit, HIT_FIELDS["trip_name"]))
+    raw_departures = first_field(hit, HIT_FIELDS["departures"])
+    if not trip_name or not isinstance(raw_departures, list):
+        return None
+
+    destinations = first_field(hit, HIT_FIELDS["destinations"]) or []
+    if isinstance(destinations, str):
+        destinations = destinations.split("|")
+
+    departures = []
+    seen_urls = set()
+    for raw in raw_departures:
+        departure = departure_from_hit(raw, end_cutoff) if isinstance(raw, dict) else None
+        if departure and departure["booking_url"] not in seen_urls:
+            seen_urls.add(departure["booking_url"])
+            departures.append(departure)
+
+    trip_url = field_text(first_field(hit, HIT_FIELDS["url"]))
+    return {
+        "trip_name": trip_name,
+        "url": _absolute(trip_url) if trip_url else "No URL Available",
+        "image_url": field_text(first_field(hit, HIT_FIELDS["image_url"])),
+        "destinations": "|".join(field_text(d) for d in destinations if field_text(d)),
+        "departures": departures
+    }
+
+def trips_from_payloads(payloads: list[Any], limit: int, end_date: str | None = None) -> list[dict[str, Any]]:
+    """
+    Builds up to `limit` trips from captured search payloads, deduplicated by trip URL.
+    An empty list means no payload matched and the caller should use the DOM path.
+    """
+    end_cutoff = datetime.strptime(end_date or END_DATE, "%Y-%m-%d")
+    trips = []
+    seen = set()
+
+    for payload in payloads:
+        for hit in extract_hits(payload):
+            trip = trip_from_hit(hit, end_cutoff)
+            if trip is None:
+                continue
+            key = trip["url"] if trip["url"] != "No URL Available" else trip["trip_name"]
+            if key in seen:
+                continue
+            seen.add(key)
+            trips.append(trip)
+            if len(trips) >= limit:
+                return trips
+
+    return trips
+
+def page_info(payload: Any) -> tuple[int, int]:
+    """
+    Returns (current page, number of pages) from an Algolia-style response.
+    """
+    if not isinstance(payload, dict):
+        return 0, 0
+    results = payload["results"] if isinstance(payload.get("results"), list) else [payload]
+    results = [r for r in results if isinstance(r, dict)]
+    return (max((r.get("page", 0) for r in results), default=0),
+            max((r.get("nbPages", 0) for r in results), default=0))
+
+def _with_page(body: dict[str, Any], page_number: int) -> dict[str, Any]:
+    """
+    Returns a copy of a multi-query request body asking for another page of hits.
+    """
+    requests = []
+    for query in body.get("requests", []):
+        query = dict(query)
+        if isinstance(query.get("params"), str):
+            params = dict(parse_qsl(query["params"], keep_blank_values=True))
+            params["page"] = str(page_number)
+            query["params"] = urlencode(params)
+        else:
+            query["page"] = page_number
+        requests.append(query)
+    return {**body, "requests": requests}
+
+class SearchPayloadCollector:
+    """
+    Captures search API responses on a page so trips can be built without the "Show More" loop.
+    """
+
+    def __init__(self, page: Any, url_pattern: str = SEARCH_PAYLOAD_URL_PATTERN) -> None:
+        self.page = page
+        self.url_pattern = re.compile(url_pattern)
+        self.responses: list[Any] = []
+        page.on("response", self._on_response)
+
+    def _on_response(self, response: Any) -> None:
+        # Bodies are read later; reading them inside the event handler can stall the sync API
+        if self.url_pattern.search(response.url) and "json" in response.headers.get("content-type", ""):
+            self.responses.append(response)
+
+    def close(self) -> None:
+        """
+        Stops capturing, so a later listing load on the same page starts with a fresh collector.
+        """
+        self.page.remove_listener("response", self._on_response)
+
+    def captured(self) -> list[tuple[Any, Any]]:
+        """
+        (response, payload) pairs for the responses whose body could be read, in capture order.
+        """
+        captured = []
+        for response in self.responses:
+            try:
+                captured.append((response, response.json()))
+            except Exception as e:
+                logging.warning(f"Could not read search payload from {response.url}: {e}")
+        return captured
+
+    def payloads(self) -> list[Any]:
+        return [payload for _, payload in self.captured()]
+
+    def fetch_trips(self, limit: int, end_date: str | None = None) -> list[dict[str, Any]]:
+        """
+        Builds trips from the captured payloads, replaying the last search request for further
+        pages until `limit` trips are found or the index runs out of pages.
+        """
+        captured = self.captured()
+        payloads = [payload for _, payload in captured]
+        trips = trips_from_payloads(payloads, limit, end_date)
+        if not trips:
+            return []
+
+        # The replayed request and its page info must come from the same response
+        last, last_payload = captured[-1]
+        body = last.request.post_data_json if last.request.method == "POST" else None
+        headers = {**last.request.headers, "content-type": "application/json"}
+        page_number, nb_pages = page_info(last_payload)
+        page_number += 1
+
+        while len(trips) < limit and isinstance(body, dict) and page_number < nb_pages:
+            logging.info(f"Requesting search page {page_number + 1}/{nb_pages} directly...")
+            try:
+                response = self.page.request.post(last.url, data=json.dumps(_with_page(body, page_number)),
+                                                  headers=headers)
+                payloads.append(response.json())
+            except Exception as e:
+                logging.warning(f"Search page request failed, keeping {len(trips)} trips: {e}")
+                break
+            trips = trips_from_payloads(payloads, limit, end_date)
+            page_number += 1
+
+        logging.info(f"Built {len(trips)} trips from {len(payloads)} search payloads.")
+        # Only a listing the run used is captured; an empty one falls back to the DOM, which is captured instead
+        if trips and snapshots.enabled:
+            snapshots.capture_text("search_payloads", self.page.url, json.dumps(payloads), end_date=end_date,
+                                   limit=limit)
+        return trips
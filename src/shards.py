@@ -0,0 +1,96 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any
+from config import SHARD_FOLDER
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """
+    Parses an "i/N" shard spec (0 <= i < N).
+    """
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}'. Expected i/N, e.g. 0/4.")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}'. The index must be between 0 and {count - 1}.")
+    return index, count
+
+def shard_of(key: str, count: int) -> int:
+    """
+    Stable shard assignment: the same trip maps to the same shard in every process and run.
+    """
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest(), 16) % count
+
+def trip_key(trip: dict[str, Any]) -> str:
+    url = trip.get("url", "")
+    return url if url and url != "No URL Available" else trip.get("trip_name", "")
+
+def shard_path(index: int, count: int) -> str:
+    return os.path.join(SHARD_FOLDER, f"trip_list.shard-{index}-of-{count}.json")
+
+def write_shard(trips: list[dict[str, Any]], index: int, count: int, limit: int | None = None) -> str:
+    """
+    Writes one worker's trips with their listing positions, so the merge can restore the
+    order of an unsharded run, and the run's trip `limit`, which the merge applies.
+    """
+    os.makedirs(SHARD_FOLDER, exist_ok=True)
+    path = shard_path(index, count)
+    entries = [{"position": trip.pop("_position"), "trip": trip} for trip in trips]
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"shard": index, "count": count, "limit": limit, "trips": entries}, f)
+    os.replace(tmp_path, path)
+
+    logging.info(f"📁 Saved shard {index}/{count} with {len(entries)} trips to {path}")
+    return path
+
+def merge_shards(count: int) -> list[dict[str, Any]]:
+    """
+    Combines all `count` shard files into the trip list an unsharded run would produce.
+    Trips are ordered by listing position and deduplicated by URL, and departures by booking
+    URL exactly as fetch_departures does within one trip. The first `limit` trips are kept:
+    a shard only sees its own trips, so it cannot cap merged date windows itself.
+    """
+    entries = []
+    limit = None
+    for index in range(count):
+        path = shard_path(index, count)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Shard {index}/{count} is missing: {path}")
+        with open(path, encoding="utf-8") as f:
+            shard = json.load(f)
+        if shard.get("count") != count or shard.get("shard") != index:
+            raise ValueError(f"{path} belongs to shard {shard.get('shard')}/{shard.get('count')}, not {index}/{count}")
+        entries.extend(shard["trips"])
+        limit = shard.get("limit", limit)
+
+    entries.sort(key=lambda entry: (entry["position"], trip_key(entry["trip"])))
+
+    trips = []
+    seen_trips = set()
+    for entry in entries:
+        trip = entry["trip"]
+        key = trip_key(trip)
+        if key in seen_trips:
+            continue
+        seen_trips.add(key)
+
+        departures = []
+        seen_urls = set()
+        for departure in trip["departures"]:
+            booking_url = departure.get("booking_url", "")
+            if booking_url not in seen_urls:
+                seen_urls.add(booking_url)
+                departures.append(departure)
+        trip["departures"] = departures
+        trips.append(trip)
+
+    if limit is not None and len(trips) > limit:
+        logging.info(f"Keeping the first {limit} of {len(trips)} merged trips.")
+        trips = trips[:limit]
+
+    logging.info(f"🧩 Merged {count} shards into {len(trips)} trips.")
+    return trips
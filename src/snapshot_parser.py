@@ -0,0 +1,256 @@
+"""
+Browser-free re-extraction of a captured run (CAPTURE_SNAPSHOTS=1).
+
+Rebuilds the trip, departure and category records from the gzipped DOM snapshots with selectolax,
+using the same selectors and field rules as the live parsers, across a process pool:
+
+    python src/snapshot_parser.py output/snapshots/20300101-120000 --workers 8 --output output/trip_list.reparsed.json
+
+Use it to check a selector fix against a whole run without re-scraping the site.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from selectolax.lexbor import LexborHTMLParser
+from category_parser import CABIN_CARD_SELECTOR, CATEGORY_CARD_SELECTOR, CategoryParser, cabin_numbers_from_texts
+from config import BASE_URL
+from departure_parser import DEPARTURE_CONTAINER_SELECTOR, DepartureRowReader
+from http_tier import categories_from_state, extract_embedded_states, hit_payloads_from_state
+from search_payloads import trips_from_payloads
+from snapshots import MANIFEST_NAME
+from trip_parser import (DESTINATION_SELECTOR, HIDDEN_TRIP_SELECTOR, TRIP_CARD_SELECTOR, TRIP_IMAGE_SELECTOR,
+                         TRIP_NAME_SELECTOR, TripParser, merge_date_windows)
+from url_memo import normalize_booking_url
+
+# Listings read from the DOM (cards only) or without it (trips with their departures), and booking pages
+LISTING_KINDS = ("listing", "listing_state", "search_payloads")
+BOOKING_KINDS = ("booking", "booking_state")
+
+def _text(node: Any) -> str | None:
+    return node.text() if node is not None else None
+
+def parse_listing(html: str, limit: int | None = None) -> list[dict[str, Any]]:
+    """
+    Trip cards of a listing snapshot, as TripParser reads them (plus a `hidden` flag).
+    """
+    trips = []
+    for card in LexborHTMLParser(html).css(TRIP_CARD_SELECTOR)[:limit]:
+        name_node = card.css_first(TRIP_NAME_SELECTOR)
+        if name_node is None:
+            continue
+        trip_name = name_node.text().strip() or "Unnamed Trip"
+        trip_url = name_node.attributes.get("href") or ""
+        image_node = card.css_first(TRIP_IMAGE_SELECTOR)
+        destinations = [text.strip() for text in (node.text() for node in card.css(DESTINATION_SELECTOR)) if text]
+        trips.append({
+            "trip_name": trip_name,
+            "url": f"{BASE_URL}{trip_url}" if trip_url else "No URL Available",
+            "image_url": (image_node.attributes.get("src") or "") if image_node is not None else "",
+            "destinations": "|".join(destinations),
+            "hidden": card.css_first(HIDDEN_TRIP_SELECTOR) is not None,
+        })
+    return trips
+
+def departure_rows(html: str) -> list[dict[str, Any]]:
+    """
+    Raw departure rows of a trip card snapshot, in the shape of departure_parser.DEPARTURE_ROWS_JS.
+    """
+    rows = []
+    for row in LexborHTMLParser(html).css(f"{DEPARTURE_CONTAINER_SELECTOR} li"):
+        link = row.css_first("a")
+        rows.append({
+            "year": _text(row.css_first("[data-testid='departure-hit-year']")),
+            "p_texts": [p.text() for p in row.css("p")],
+            "ship": _text(row.css_first("i")),
+            "href": link.attributes.get("href") if link is not None else None,
+            "has_link": link is not None,
+            "is_land_expedition": row.css_first("div[data-land-expedition='true']") is not None,
+        })
+    return rows
+
+def parse_departures(html: str, end_date: str | None = None) -> list[dict[str, str]]:
+    return list(DepartureRowReader(end_date).read(departure_rows(html)))
+
+def category_cards(html: str) -> list[dict[str, Any]]:
+    """
+    Raw category card fields of a booking page snapshot, in the shape of category_parser.CATEGORY_CARDS_JS.
+    """
+    cards = []
+    for card in LexborHTMLParser(html).css(CATEGORY_CARD_SELECTOR):
+        deck = next((span for span in card.css("span") if "deck" in span.text().lower()), None)
+        pax = card.css("[class*='pax-icons_'] svg")
+        sibling = pax[-1].next if pax else None
+        while sibling is not None and sibling.tag in ("-text", "-comment"):
+            sibling = sibling.next
+        buttons = [button.text().lower() for button in card.css("button")]
+        cards.append({
+            "deck": _text(deck),
+            "category_name": _text(card.css_first("h3")),
+            "pax_count": len(pax),
+            "cabin_type": sibling.text() if sibling is not None and sibling.tag == "span" else None,
+            "price": _text(card.css_first("h2")),
+            "has_see_available": any("see available cabins" in text for text in buttons),
+            "has_join_waitlist": any("join waitlist" in text for text in buttons),
+        })
+    return cards
+
+def parse_categories(html: str, drawers: dict[int, str]) -> list[dict[str, Any]]:
+    """
+    Categories of a booking page snapshot, with the cabins of each opened drawer (by card index).
+    Waitlisted categories are excluded unless every category is waitlisted, as in CategoryParser.
+    """
+    categories = []
+    waitlisted = []
+    for index, raw in enumerate(category_cards(html)):
+        fields = CategoryParser._category_fields_from_raw(raw)
+        cabin_numbers: list[str] = []
+        if fields["status"] == "Available" and index in drawers:
+            card_texts = [[p.text() for p in card.css("p")]
+                          for card in LexborHTMLParser(drawers[index]).css(CABIN_CARD_SELECTOR)]
+            cabin_numbers = cabin_numbers_from_texts(card_texts)
+        record = {**fields, "cabinNumbers": "|".join(cabin_numbers), "num_cabins": len(cabin_numbers)}
+        (waitlisted if fields["status"] == "Waitlist" else categories).append(record)
+    return categories or waitlisted
+
+def _read(path: str) -> str:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+def _parse_job(job: tuple[str, str, dict[str, Any]]) -> Any:
+    """
+    Parses one snapshot in a pool process. Jobs are (kind, path, manifest entry).
+    """
+    kind, path, entry = job
+    content = _read(path)
+    if kind == "listing":
+        return parse_listing(content, entry.get("limit"))
+    if kind == "departures":
+        return parse_departures(content, entry.get("end_date"))
+    if kind in ("listing_state", "search_payloads"):
+        payloads = json.loads(content) if kind == "search_payloads" else \
+            [payload for state in extract_embedded_states(content) for payload in hit_payloads_from_state(state)]
+        return trips_from_payloads(payloads, entry["limit"], entry.get("end_date"))
+    if kind == "booking_state":
+        return next((categories for categories in map(categories_from_state, extract_embedded_states(content))
+                     if categories is not None), [])
+    return parse_categories(content, {index: _read(drawer) for index, drawer in entry["drawers"].items()})
+
+def load_manifest(run_folder: str) -> dict[tuple[str, str], dict[str, Any]]:
+    """
+    The latest snapshot entry for each (kind, key), in first-capture order.
+    """
+    entries: dict[tuple[str, str], dict[str, Any]] = {}
+    with open(os.path.join(run_folder, MANIFEST_NAME), encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[(entry["kind"], entry["key"])] = entry
+    return entries
+
+def reparse_run(run_folder: str, workers: int | None = None) -> list[dict[str, Any]]:
+    """
+    Rebuilds a captured run's trips with their departures and categories, dropping departures
+    without available cabins like TripParser does. Trips whose departures were not captured
+    (other shards, hidden trips scraped via their secret event page) are skipped, and
+    departures without a booking page snapshot are reported as errors.
+    """
+    started = time.perf_counter()
+    entries = load_manifest(run_folder)
+
+    drawers: dict[str, dict[int, str]] = {}
+    for (kind, _), entry in entries.items():
+        if kind == "drawer":
+            drawers.setdefault(normalize_booking_url(entry["booking_url"]), {})[entry["category_index"]] = \
+                os.path.join(run_folder, entry["file"])
+
+    # One job per listing, departure list and booking page (with its drawers)
+    targets = [(kind, key) for (kind, key) in entries if kind in LISTING_KINDS + BOOKING_KINDS + ("departures",)]
+    jobs = []
+    for kind, key in targets:
+        entry = entries[(kind, key)]
+        if kind == "booking":
+            entry = {**entry, "drawers": drawers.get(normalize_booking_url(key), {})}
+        jobs.append((kind, os.path.join(run_folder, entry["file"]), entry))
+
+    if workers == 1 or len(jobs) < 2:
+        results = [_parse_job(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_parse_job, jobs, chunksize=chunksize))
+
+    listings = []
+    departures: dict[tuple[str, str | None], list[dict[str, str]]] = {}
+    categories: dict[str, list[dict[str, Any]]] = {}
+    for (kind, key), result in zip(targets, results):
+        entry = entries[(kind, key)]
+        if kind in LISTING_KINDS:
+            listings.append((kind, entry, result))
+        elif kind == "departures":
+            # Keyed by trip and window, since date windows list the same trip more than once
+            departures[(entry.get("trip_url", key), entry.get("end_date"))] = result
+        else:
+            categories[normalize_booking_url(key)] = result
+
+    # Each window's trips, merged like TripParser._gather_trips does with the run's trip limit
+    windows: dict[str | None, list[dict[str, Any]]] = {}
+    limit = None
+    skipped = 0
+    for kind, entry, listing in listings:
+        window = windows.setdefault(entry.get("end_date"), [])
+        limit = entry.get("limit", limit)
+        for card in listing:
+            if kind != "listing":
+                # Trips read from embedded state or search payloads carry their departures
+                window.append(card)
+                continue
+            hidden = card.pop("hidden")
+            card_departures = departures.get((card["url"], entry.get("end_date")))
+            if card_departures is None:
+                skipped += 1
+                if hidden:
+                    logging.info(f"Skipping hidden trip \"{card['trip_name']}\": its secret event page is not captured.")
+                continue
+            window.append({**card, "departures": card_departures})
+    trips = merge_date_windows(list(windows.values()), limit) if windows else []
+
+    all_categories = []
+    missing = 0
+    for trip in trips:
+        for departure in trip["departures"]:
+            booking_url = normalize_booking_url(departure["booking_url"])
+            if booking_url not in categories:
+                missing += 1
+                logging.warning(f"⚠️ No booking page snapshot for {departure['booking_url']}")
+            all_categories.append(categories.get(booking_url, []))
+    TripParser._apply_categories(trips, all_categories)
+
+    logging.info(f"📸 Re-parsed {len(jobs)} snapshots into {len(trips)} trips in {time.perf_counter() - started:.1f}s "
+                 f"({skipped} listed trips without captured departures skipped).")
+    if missing:
+        logging.error(f"❌ {missing} departures have no booking page snapshot and were dropped; "
+                      "the re-parsed trip list is incomplete.")
+    return trips
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description="Rebuild a captured run's trips from its page snapshots.")
+    arg_parser.add_argument("run_folder", help="A SNAPSHOT_FOLDER/<run> folder written with CAPTURE_SNAPSHOTS=1")
+    arg_parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: one per CPU)")
+    arg_parser.add_argument("--output", default="output/trip_list.reparsed.json")
+    return arg_parser.parse_args(argv)
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    trips = reparse_run(args.run_folder, args.workers)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(trips, f, indent=4)
+    logging.info(f"✅ Wrote {len(trips)} trips to {args.output}")
+
+if __name__ == "__main__":
+    main()
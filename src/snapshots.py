@@ -0,0 +1,89 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any
+from config import CAPTURE_SNAPSHOTS, SNAPSHOT_FOLDER
+
+MANIFEST_NAME = "manifest.jsonl"
+
+# Outer HTML of every cabin card in the open drawer, in one round trip
+DRAWER_HTML_JS = "(cards) => cards.map((card) => card.outerHTML).join('\\n')"
+
+class SnapshotWriter:
+    """
+    Capture mode: saves the DOM of each listing, departure list, booking page and opened drawer
+    as gzipped HTML in one folder per run, with a manifest.jsonl line describing each file.
+    Listings and booking pages served over HTTP or from search payloads are saved as they were read.
+    snapshot_parser.py rebuilds the run's records from that folder without a browser.
+    """
+
+    def __init__(self, enabled: bool = CAPTURE_SNAPSHOTS, folder: str = SNAPSHOT_FOLDER) -> None:
+        self.enabled = enabled
+        self.folder = folder
+        self.run_folder: str | None = None
+        self.saved = 0
+        self._lock = threading.Lock()
+
+    def _run_folder(self) -> str:
+        with self._lock:
+            if self.run_folder is None:
+                self.run_folder = os.path.join(self.folder, f"{datetime.now():%Y%m%d-%H%M%S}")
+                os.makedirs(self.run_folder, exist_ok=True)
+                logging.info(f"📸 Capturing page snapshots to {self.run_folder}")
+            return self.run_folder
+
+    def save(self, kind: str, key: str, html: str, **context: Any) -> str:
+        """
+        Writes one snapshot and returns its path relative to the run folder. A later snapshot
+        with the same kind and key (e.g. after a retry) replaces the earlier one.
+        """
+        run_folder = self._run_folder()
+        name = os.path.join(kind, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.html.gz")
+        os.makedirs(os.path.join(run_folder, kind), exist_ok=True)
+        with gzip.open(os.path.join(run_folder, name), "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(html)
+
+        entry = {"kind": kind, "key": key, "file": name, **context}
+        with self._lock:
+            with open(os.path.join(run_folder, MANIFEST_NAME), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.saved += 1
+        return name
+
+    def capture_page(self, page: Any, kind: str, key: str, **context: Any) -> None:
+        if self.enabled:
+            self._capture(kind, key, context, page.content)
+
+    def capture_element(self, locator: Any, kind: str, key: str, **context: Any) -> None:
+        if self.enabled:
+            self._capture(kind, key, context, lambda: locator.evaluate("(el) => el.outerHTML"))
+
+    def capture_text(self, kind: str, key: str, text: str, **context: Any) -> None:
+        """
+        Captures content read without the DOM (server-rendered HTML, search payloads as JSON).
+        """
+        if self.enabled:
+            self._capture(kind, key, context, lambda: text)
+
+    def capture_drawer(self, cabin_cards: Any, booking_url: str, category_index: int) -> None:
+        if self.enabled:
+            self._capture("drawer", f"{booking_url}#{category_index}",
+                          {"booking_url": booking_url, "category_index": category_index},
+                          lambda: cabin_cards.evaluate_all(DRAWER_HTML_JS))
+
+    def _capture(self, kind: str, key: str, context: dict[str, Any], read_html: Any) -> None:
+        # A failed capture must never fail the scrape itself
+        try:
+            self.save(kind, key, read_html(), **context)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not capture {kind} snapshot for {key}: {e}")
+
+    def log_summary(self) -> None:
+        if self.enabled:
+            logging.info(f"📸 Captured {self.saved} page snapshots in {self.run_folder}.")
+
+snapshots = SnapshotWriter()
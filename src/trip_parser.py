@@ -1,146 +1,589 @@
 import logging
-from typing import Any
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+from browser_pages import consent_cleared, new_page
 from category_parser import CategoryParser
-from departure_parser import fetch_departures
-from config import BASE_URL, DEPARTURES_URL, START_DATE, END_DATE
+from departure_cache import DepartureCache
+from departure_parser import iter_departures
+from category_pool import CategoryWorkerPool, fetch_categories_pooled
+from checkpoint import RunJournal
+from config import BASE_URL, START_DATE, END_DATE, CATEGORY_CONCURRENCY, DISCOVERY_WINDOW_DAYS, DEPARTURE_CACHE_TTL_HOURS, HTTP_FAST_PATH, PIPELINE_MODE, PIPELINE_QUEUE_SIZE, RUN_JOURNAL_PATH, SEARCH_PAYLOAD_MODE
+from config import departures_url, split_date_window
+from http_tier import HttpTier
 from playwright.sync_api import sync_playwright
+from resource_blocking import blocking_stats
+from metrics import metrics
+from profiling import profiler
+from search_payloads import SearchPayloadCollector
 from secret_event import handle_secret_trip
+from shards import shard_of, trip_key
+from snapshots import snapshots
+from url_memo import BookingUrlMemo, normalize_booking_url
+from waits import NetworkTracker, wait_for_network_idle, wait_for_state, wait_stats
+
+# Trip card selectors, shared with the browser-free snapshot_parser.py (see BRITTLE_SELECTORS_AUDIT.md)
+TRIP_CARD_SELECTOR = "[class^='hit_container__']"
+TRIP_NAME_SELECTOR = "[class^='card_name__']"
+TRIP_IMAGE_SELECTOR = "img[class^='card_image__']"
+DESTINATION_SELECTOR = "div[class^='card_list__'] span[class^='card_destination__']"
+HIDDEN_TRIP_SELECTOR = "[class^='card_displayNone']"
+
+# Called with (trip_name, departure) for each departure as Phase 1 finds it
+OnDeparture = Callable[[str, dict[str, Any]], None]
+# Called with each finished trip (categories applied), in trips-list order
+OnTrip = Callable[[dict[str, Any]], None]
+
+def has_available_cabins(categories: list[dict[str, Any]]) -> bool:
+    return not all(cat["status"] == "Waitlist" for cat in categories)
+
+def merge_date_windows(windows: list[list[dict[str, Any]]], limit: int | None) -> list[dict[str, Any]]:
+    """
+    Merges the trips of consecutive date windows by trip key, keeping each (trip name, booking
+    URL) departure once and the first `limit` trips. A single window is returned as it is.
+    Shared with snapshot_parser.py, so a re-parse merges a run's windows the same way.
+    """
+    if len(windows) == 1:
+        return windows[0]
+
+    trips: list[dict[str, Any]] = []
+    trips_by_key: dict[str, dict[str, Any]] = {}
+    seen_departures: set[tuple[str, str]] = set()
+    for window_index, window_trips in enumerate(windows):
+        for trip in window_trips:
+            departures = []
+            for departure in trip["departures"]:
+                key = (trip["trip_name"], normalize_booking_url(departure.get("booking_url", "")))
+                if key not in seen_departures:
+                    seen_departures.add(key)
+                    departures.append(departure)
+
+            existing = trips_by_key.get(trip_key(trip))
+            if existing is None:
+                if "_position" in trip:
+                    # Order shards by first window, then by position within that window's listing
+                    trip["_position"] = [window_index, trip["_position"]]
+                trip["departures"] = departures
+                trips_by_key[trip_key(trip)] = trip
+                trips.append(trip)
+            else:
+                existing["departures"].extend(departures)
+
+    # Each window lists up to `limit` trips, so the merge can exceed it
+    if limit is not None and len(trips) > limit:
+        logging.info(f"Keeping the first {limit} of {len(trips)} merged trips.")
+        trips = trips[:limit]
+    return trips
+
+class TripCompletion:
+    """
+    Emits each trip with its categories applied as soon as every departure of it, and of all
+    trips before it, has its result. Results may arrive in any order (e.g. from pooled workers).
+    """
+
+    def __init__(self, trips: list[dict[str, Any]], all_categories: list[list[dict[str, Any]]], on_trip: OnTrip) -> None:
+        self.trips = trips
+        self.all_categories = all_categories
+        self.on_trip = on_trip
+        self.trip_of = [t for t, trip in enumerate(trips) for _ in trip["departures"]]
+        self.pending = [len(trip["departures"]) for trip in trips]
+        self.next_trip = 0
+        self.next_offset = 0
+        self._lock = threading.Lock()
+        with self._lock:
+            self._flush()
+
+    def done(self, index: int) -> None:
+        with self._lock:
+            self.pending[self.trip_of[index]] -= 1
+            self._flush()
+
+    def complete_all(self) -> None:
+        """
+        Emits every remaining trip, for callers that only have the results at the end.
+        """
+        with self._lock:
+            self.pending = [0] * len(self.trips)
+            self._flush()
+
+    def _flush(self) -> None:
+        while self.next_trip < len(self.trips) and self.pending[self.next_trip] == 0:
+            trip = self.trips[self.next_trip]
+            categories = self.all_categories[self.next_offset:self.next_offset + len(trip["departures"])]
+            # A copy, so _apply_categories still sees the trip as Phase 1 left it
+            self.on_trip({**trip, "departures": [{**departure, "categories": cats}
+                                                 for departure, cats in zip(trip["departures"], categories)
+                                                 if has_available_cabins(cats)]})
+            self.next_offset += len(trip["departures"])
+            self.next_trip += 1
 
 class TripParser:
-    def __init__(self) -> None:
+    def __init__(self, concurrency: int = CATEGORY_CONCURRENCY, use_search_payloads: bool = SEARCH_PAYLOAD_MODE,
+                 pipeline: bool = PIPELINE_MODE, shard: tuple[int, int] | None = None,
+                 http_fast_path: bool = HTTP_FAST_PATH) -> None:
         self.logger = logging.getLogger(__name__)
+        self.concurrency = concurrency
+        self.use_search_payloads = use_search_payloads
+        self.cache = DepartureCache() if DEPARTURE_CACHE_TTL_HOURS > 0 else None
+        self.pipeline = pipeline
+        # (index, count): only trips whose stable hash falls in this shard are scraped
+        self.shard = shard
+        self.journal = RunJournal(RUN_JOURNAL_PATH.replace(".jsonl", f".shard-{shard[0]}-of-{shard[1]}.jsonl")
+                                  if shard else RUN_JOURNAL_PATH)
+        self.completed: dict[str, list[dict[str, Any]]] = {}
+        self.started_at = 0.0
+        self.first_result_at: float | None = None
+        self.memo = BookingUrlMemo()
+        self.completion: TripCompletion | None = None
+        # Pages with complete embedded state are served over plain HTTP; the rest use the browser
+        self.http = HttpTier() if http_fast_path else None
         
-    def fetch_trips(self, limit: int = 50) -> list[dict[str, Any]]: # Limit set to 50
-        trips = []
+    def fetch_trips(self, limit: int = 50, resume: bool = False, on_trip: OnTrip | None = None) -> list[dict[str, Any]]: # Limit set to 50
+        """
+        Scrapes the trips. `on_trip` receives each finished trip as soon as it and the trips before
+        it are complete (in pipeline mode, once all categories are in).
+        """
+        self.started_at = time.monotonic()
+        self.first_result_at = None
+        self.memo = BookingUrlMemo()
+
+        if resume:
+            trips, self.completed = self.journal.load()
+        else:
+            trips, self.completed = None, {}
+            self.journal.reset()
+
+        try:
+            with sync_playwright() as p:
+                logging.info("========== PHASE 1: Gathering Departures ==========")
+
+                browser = p.chromium.launch(headless=True)
+                page = new_page(browser)
+
+                if trips is not None:
+                    logging.info(f"♻️ Resuming from checkpoint: {len(trips)} trips, "
+                                 f"{len(self.completed)} departures already scraped.")
+                    all_categories = self._scrape_categories(page, trips, on_trip)
+                elif self.pipeline:
+                    logging.info("Pipelining Phase 2: departures are scraped as soon as Phase 1 finds them.")
+                    trips, all_categories = self._gather_and_scrape(page, limit)
+                    if on_trip:
+                        TripCompletion(trips, all_categories, on_trip).complete_all()
+                else:
+                    trips = self._gather_trips(page, limit)
+                    self.journal.record_trips(trips)
+                    logging.info("========== PHASE 2: Checking Cabin Availability ==========")
+                    all_categories = self._scrape_categories(page, trips, on_trip)
+
+                self._apply_categories(trips, all_categories)
+
+                browser.close()
+        finally:
+            # The SQLite connection is reopened if this parser runs again
+            if self.cache:
+                self.cache.close()
+
+        wait_stats.log_summary()
+        blocking_stats.log_summary()
+        self.memo.log_summary()
+        profiler.log_summary()
+        snapshots.log_summary()
+        if self.http:
+            self.http.log_summary()
+        if self.cache:
+            self.cache.log_summary()
+
+        total = time.monotonic() - self.started_at
+        first = f"{self.first_result_at - self.started_at:.1f}s" if self.first_result_at else "n/a"
+        logging.info(f"⏱️ Time to first departure result: {first}; total wall time: {total:.1f}s")
+
+        return trips
+
+    def _gather_trips(self, page: Any, limit: int, on_departure: OnDeparture | None = None) -> list[dict[str, Any]]:
+        """
+        Phase 1: collects trips with their departures, crawling START_DATE..END_DATE either as one
+        listing or as DISCOVERY_WINDOW_DAYS sub-windows merged by trip URL and booking URL.
+        `on_departure(trip_name, departure)` is called once for each departure kept.
+        """
+        windows = split_date_window(START_DATE, END_DATE, DISCOVERY_WINDOW_DAYS)
+        if len(windows) == 1:
+            return self._gather_window(page, START_DATE, END_DATE, limit, on_departure)
+
+        logging.info(f"Splitting discovery into {len(windows)} windows of up to {DISCOVERY_WINDOW_DAYS} days.")
+        seen_departures: set[tuple[str, str]] = set()
+
+        def forward(trip_name: str, departure: dict[str, Any]) -> None:
+            key = (trip_name, normalize_booking_url(departure.get("booking_url", "")))
+            if key not in seen_departures:
+                seen_departures.add(key)
+                if on_departure:
+                    on_departure(trip_name, departure)
+
+        # Departures are forwarded as they are found; the merge keeps the same ones
+        trips = merge_date_windows([self._gather_window(page, window_start, window_end, limit, forward)
+                                    for window_start, window_end in windows], limit)
+
+        logging.info(f"Merged {len(windows)} windows into {len(trips)} trips with "
+                     f"{sum(len(t['departures']) for t in trips)} departures.")
+        return trips
+
+    def _gather_window(self, page: Any, start_date: str, end_date: str, limit: int,
+                       on_departure: OnDeparture | None = None) -> list[dict[str, Any]]:
+        """
+        Loads the departures listing for one dateRange and collects its trips.
+        """
+        url = departures_url(start_date, end_date)
+        trips = self.http.fetch_trips(url, limit, end_date) if self.http else []
+        if trips:
+            logging.info(f"Using {len(trips)} trips from the server-rendered listing for {start_date} to {end_date}.")
+            return self._adopt_trips(trips, on_departure)
+
+        collector = SearchPayloadCollector(page) if self.use_search_payloads else None
+        with metrics.span("listing_goto"):
+            page.goto(url, timeout=60000)
+        
+        logging.info(f"Loaded Departures page for {start_date} to {end_date}")
+        logging.info(f"{url}")
+
+        page.wait_for_selector(TRIP_CARD_SELECTOR, timeout=10000)
+        
+        # Forcefully dismiss the GDPR overlay if the consent session didn't already
+        if not consent_cleared(page):
+            self._remove_gdpr_blocker(page)
 
-        with sync_playwright() as p:
-            logging.info("========== PHASE 1: Gathering Departures ==========")
-
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(DEPARTURES_URL, timeout=60000)
-            
-            logging.info(f"Loaded Departures page for {START_DATE} to {END_DATE}")
-            logging.info(f"{DEPARTURES_URL}")
-
-            page.wait_for_selector("[class^='hit_container__']", timeout=10000)
-            
-            # Forcefully dismiss the GDPR overlay if it exists
-            try:
-                page.evaluate("""
-                    const wrapper = document.querySelector('div[type="GDPR"]#wrapper');
-                    if (wrapper) {
-                        wrapper.style.display = 'none';
-                        wrapper.remove();
-                        const removed = !document.contains(wrapper);
-                        if (removed) {
-                            console.log("GDPR blocker removed from DOM.");
-                        }
+        trips = collector.fetch_trips(limit, end_date) if collector else []
+        if collector:
+            collector.close()
+        if trips:
+            logging.info(f"Using {len(trips)} trips from intercepted search payloads.")
+            trips = self._adopt_trips(trips, on_departure)
+        else:
+            if collector:
+                logging.info("No search payload matched. Falling back to the rendered listing.")
+            trips = self._collect_trips_from_dom(page, limit, end_date, on_departure)
+
+        return trips
+
+    def _adopt_trips(self, trips: list[dict[str, Any]], on_departure: OnDeparture | None = None) -> list[dict[str, Any]]:
+        """
+        Keeps this shard's trips from a listing read without the DOM, forwarding their departures.
+        """
+        if self.shard:
+            for position, trip in enumerate(trips):
+                trip["_position"] = position
+            trips = [trip for trip in trips if self._in_shard(trip)]
+        if on_departure:
+            for trip in trips:
+                for departure in trip["departures"]:
+                    on_departure(trip["trip_name"], departure)
+        return trips
+
+    def _remove_gdpr_blocker(self, page: Any) -> None:
+        try:
+            page.evaluate("""
+                const wrapper = document.querySelector('div[type="GDPR"]#wrapper');
+                if (wrapper) {
+                    wrapper.style.display = 'none';
+                    wrapper.remove();
+                    const removed = !document.contains(wrapper);
+                    if (removed) {
+                        console.log("GDPR blocker removed from DOM.");
                     }
-                """)
-                self.logger.info("Forced removal of GDPR blocker if present.")
-                time.sleep(2)  # Give time for DOM update
-            except Exception as e:
-                self.logger.info(f"Could not remove GDPR blocker: {e}")
-
-            trip_elements = page.locator("[class^='hit_container__']")
-            total_loaded = trip_elements.count()
-            logging.info(f"Initial load found {total_loaded} trips.")
-
-            # Keep clicking "Show more" until we reach the limit or no more trips
-            while total_loaded < limit:
-                show_more_button = page.locator("div.infinitehits_showMore__IYt_q button")
-                if show_more_button.count() > 0:
-                    logging.info("Clicking 'Show More' to load more trips...")
+                }
+            """)
+            self.logger.info("Forced removal of GDPR blocker if present.")
+            wait_for_state(page.locator('div#wrapper[type="GDPR"]'), "detached", timeout_ms=2000,
+                           name="blocker_removal", budget_ms=2000)
+        except Exception as e:
+            self.logger.info(f"Could not remove GDPR blocker: {e}")
+
+    def _collect_trips_from_dom(self, page: Any, limit: int, end_date: str,
+                                on_departure: OnDeparture | None = None) -> list[dict[str, Any]]:
+        """
+        Phase 1 from the rendered listing: expands "Show More" and reads each trip card.
+        """
+        trips = []
+
+        trip_elements = page.locator(TRIP_CARD_SELECTOR)
+        total_loaded = trip_elements.count()
+        logging.info(f"Initial load found {total_loaded} trips.")
+
+        # Keep clicking "Show more" until we reach the limit or no more trips
+        while total_loaded < limit:
+            show_more_button = page.locator("div.infinitehits_showMore__IYt_q button")
+            if show_more_button.count() > 0:
+                logging.info("Clicking 'Show More' to load more trips...")
+                with metrics.span("trips_show_more"), NetworkTracker(page) as network:
                     show_more_button.click()
-                    page.wait_for_timeout(3000)  # Wait for more trips to load
-                    total_loaded = page.locator("[class^='hit_container__']").count()
-                    logging.info(f"New total trips loaded: {total_loaded}")
-                else:
-                    logging.info("No more 'Show More' button found. Ending trip fetch.")
-                    break  # Exit loop when no more "Show more" button is available
+                    # Wait for the next card and for the search request that delivers the page of hits
+                    wait_for_network_idle(network, trip_elements.nth(total_loaded), timeout_ms=15000,
+                                          name="trips_show_more", budget_ms=3000)
+                total_loaded = trip_elements.count()
+                logging.info(f"New total trips loaded: {total_loaded}")
+            else:
+                logging.info("No more 'Show More' button found. Ending trip fetch.")
+                break  # Exit loop when no more "Show more" button is available
+
+        snapshots.capture_page(page, "listing", page.url, end_date=end_date, limit=limit)
+
+        # Adjust the trip count based on the new total_loaded
+        trip_count = min(total_loaded, limit)
+        logging.info(f"Processing {trip_count} trips.")
+
+        for i in range(trip_count):
+            trip_element = trip_elements.nth(i)
+            trip_name_locator = trip_element.locator(TRIP_NAME_SELECTOR)
+            if trip_name_locator.count() == 0:
+                continue
+
+            trip_name_raw = trip_name_locator.text_content()
+            trip_name = trip_name_raw.strip() if trip_name_raw else "Unnamed Trip"
+
+            trip_url = trip_name_locator.get_attribute("href") or ""
+            full_trip_url = f"{BASE_URL}{trip_url}" if trip_url else "No URL Available"
+
+
+            if not self._in_shard({"trip_name": trip_name, "url": full_trip_url}):
+                continue
 
-            # Adjust the trip count based on the new total_loaded
-            trip_count = min(total_loaded, limit)
-            logging.info(f"Processing {trip_count} trips.")
+            logging.info(f"[Trip {i+1}/{trip_count}] - Processing \"{trip_name}\" (URL: {full_trip_url})")
 
-            for i in range(trip_count):
-                trip_element = trip_elements.nth(i)
-                trip_name_locator = trip_element.locator("[class^='card_name__']")
-                if trip_name_locator.count() == 0:
-                    continue
+            # Extract image URL
+            image_locator = trip_element.locator(TRIP_IMAGE_SELECTOR)
+            image_url = image_locator.get_attribute("src") if image_locator.count() > 0 else ""
 
-                trip_name_raw = trip_name_locator.text_content()
-                trip_name = trip_name_raw.strip() if trip_name_raw else "Unnamed Trip"
+            # Extract destination tags
+            dest_spans = trip_element.locator(DESTINATION_SELECTOR)
+            destinations = []
+            for j in range(dest_spans.count()):
+                text = dest_spans.nth(j).text_content()
+                if text:
+                    destinations.append(text.strip())
+            destination_str = "|".join(destinations)
 
-                trip_url = trip_name_locator.get_attribute("href") or ""
-                full_trip_url = f"{BASE_URL}{trip_url}" if trip_url else "No URL Available"
+            # Detect hidden trips
+            hidden_trip_locator = trip_element.locator(HIDDEN_TRIP_SELECTOR)
+            is_hidden_trip = hidden_trip_locator.count() > 0
 
+            if is_hidden_trip:
+                logging.info(f"🚨 Detected hidden trip: {trip_name}, triggering secret event handler.")
+                departures = handle_secret_trip(page, full_trip_url)
+            else:
+                departures = []
+                for departure in iter_departures(page, trip_element, end_date=end_date, label=trip_name):
+                    departures.append(departure)
+                    if on_departure:
+                        on_departure(trip_name, departure)
+                # Date windows list the same trip again, so each window keeps its own snapshot
+                snapshots.capture_element(trip_element, "departures", f"{full_trip_url}|{end_date}",
+                                          trip_url=full_trip_url, end_date=end_date)
 
-                logging.info(f"[Trip {i+1}/{trip_count}] - Processing \"{trip_name}\" (URL: {full_trip_url})")
+            trips.append({
+                "trip_name": trip_name,
+                "url": full_trip_url,
+                "image_url": image_url,
+                "destinations": destination_str,
+                "departures": departures
+            })
+            if self.shard:
+                trips[-1]["_position"] = i
 
-                # Extract image URL
-                image_locator = trip_element.locator("img[class^='card_image__']")
-                image_url = image_locator.get_attribute("src") if image_locator.count() > 0 else ""
+        return trips
+
+    def _in_shard(self, trip: dict[str, Any]) -> bool:
+        return self.shard is None or shard_of(trip_key(trip), self.shard[1]) == self.shard[0]
+
+    def _reuse_categories(self, label: str, departure: dict[str, Any]) -> list[dict[str, Any]] | None:
+        """
+        Returns categories already known for a departure (from before a restart, or a fresh
+        cache entry), or None if it has to be scraped.
+        """
+        booking_url = normalize_booking_url(departure.get("booking_url", "No URL Available"))
+        if booking_url in self.completed:
+            logging.info(f"{label} - already scraped before the restart")
+            return self.completed[booking_url]
+
+        cached = self.cache.get(booking_url, departure.get("start_date")) if self.cache else None
+        if cached is not None:
+            logging.info(f"{label} - using cached categories")
+        return cached
+
+    def _remember(self, booking_url: str, categories: list[dict[str, Any]]) -> None:
+        if self.first_result_at is None:
+            self.first_result_at = time.monotonic()
+        booking_url = normalize_booking_url(booking_url)
+        self.journal.record_departure(booking_url, categories)
+        # An empty list usually means the page failed to render, so it is never cached. Fully
+        # waitlisted pages come back as their waitlisted categories and are cached like any other.
+        if self.cache and categories:
+            self.cache.put(booking_url, categories)
 
-                # Extract destination tags
-                dest_spans = trip_element.locator("div[class^='card_list__'] span[class^='card_destination__']")
-                destinations = []
-                for j in range(dest_spans.count()):
-                    text = dest_spans.nth(j).text_content()
-                    if text:
-                        destinations.append(text.strip())
-                destination_str = "|".join(destinations)
+    @staticmethod
+    def _departure_label(trip_name: str, departure: dict[str, Any], position: str) -> str:
+        start_date = departure.get("start_date", "Unknown Start Date")
+        end_date = departure.get("end_date", "Unknown End Date")
+        return f"[{position}] Fetching cabin categories for \"{trip_name}\" ({start_date} to {end_date})"
 
-                # Detect hidden trips
-                hidden_trip_locator = trip_element.locator("[class^='card_displayNone']")
-                is_hidden_trip = hidden_trip_locator.count() > 0
+    def _scrape_categories(self, page: Any, trips: list[dict[str, Any]],
+                           on_trip: OnTrip | None = None) -> list[list[dict[str, Any]]]:
+        """
+        Returns the categories for every departure of every trip, in order. Known results are
+        reused and duplicate booking URLs are scraped once; the rest are scraped serially or
+        across the page pool and checkpointed as they finish. Finished trips go to `on_trip`.
+        """
+        jobs = []
+        all_categories: list[list[dict[str, Any]]] = [[] for trip in trips for _ in trip["departures"]]
+        self.completion = TripCompletion(trips, all_categories, on_trip) if on_trip else None
+        index = 0
 
-                if is_hidden_trip:
-                    logging.info(f"🚨 Detected hidden trip: {trip_name}, triggering secret event handler.")
-                    departures = handle_secret_trip(page, full_trip_url)
+        for trip_index, trip in enumerate(trips, start=1):  # Track trip number
+            for dep_index, departure in enumerate(trip["departures"], start=1):  # Track departure number
+                position = f"Trip {trip_index}/{len(trips)} - Departure {dep_index}/{len(trip['departures'])}"
+                label = self._departure_label(trip["trip_name"], departure, position)
+
+                if self._claim(index, label, departure, all_categories):
+                    jobs.append((label, departure.get("booking_url", "No URL Available"), index))
+                index += 1
+
+        if self.http and jobs:
+            # Booking pages whose embedded state already lists the cabins never reach the browser
+            remaining = []
+            for job, categories in zip(jobs, self.http.fetch_many([booking_url for _, booking_url, _ in jobs])):
+                if categories is None:
+                    remaining.append(job)
                 else:
-                    departures = fetch_departures(page, trip_element)
+                    self._resolve(job[2], job[1], categories, all_categories)
+            jobs = remaining
 
-                trips.append({
-                    "trip_name": trip_name,
-                    "url": full_trip_url,
-                    "image_url": image_url,
-                    "destinations": destination_str,
-                    "departures": departures
-                })
+        def store(position: int, categories: list[dict[str, Any]]) -> None:
+            _, booking_url, index = jobs[position]
+            self._resolve(index, booking_url, categories, all_categories)
 
-            logging.info("========== PHASE 2: Checking Cabin Availability ==========")
+        if self.concurrency > 1 and len(jobs) > 1:
+            fetch_categories_pooled([job[:2] for job in jobs], self.concurrency, on_result=store)
+        else:
+            for position, (label, booking_url, _) in enumerate(jobs):
+                logging.info(label)
+                category_parser = CategoryParser(booking_url, page)
+                store(position, category_parser.fetch_categories())
 
-            for trip_index, trip in enumerate(trips, start=1):  # Track trip number
-                trip_name = trip["trip_name"]
-                valid_departures = []
+        self.completion = None
+        return all_categories
 
-                for dep_index, departure in enumerate(trip["departures"], start=1):  # Track departure number
-                    booking_url = departure.get("booking_url", "No URL Available")
-                    start_date = departure.get("start_date", "Unknown Start Date")
-                    end_date = departure.get("end_date", "Unknown End Date")
+    def _claim(self, index: int, label: str, departure: dict[str, Any],
+               all_categories: list[list[dict[str, Any]]]) -> bool:
+        """
+        Fills in departure `index` from a known result if possible. Returns True when the
+        departure's booking URL has to be scraped.
+        """
+        reused = self._reuse_categories(label, departure)
+        booking_url = departure.get("booking_url", "No URL Available")
+        should_scrape, known = self.memo.claim(index, booking_url)
 
-                    logging.info(f"[Trip {trip_index}/{len(trips)} - Departure {dep_index}/{len(trip['departures'])}] "
-                                f"Fetching cabin categories for \"{trip_name}\" ({start_date} to {end_date})")
+        if reused is not None:
+            all_categories[index] = reused
+            if should_scrape:
+                self.memo.resolve(booking_url, reused)
+            self._done(index)
+            return False
+        if not should_scrape:
+            logging.info(f"{label} - same booking page as an earlier departure")
+            if known is not None:
+                all_categories[index] = known
+                self._done(index)
+        return should_scrape
 
-                    # Fetch categories and remove departures with no available cabins
-                    category_parser = CategoryParser(booking_url, page)
-                    categories = category_parser.fetch_categories()
-                    departure["categories"] = categories
+    def _done(self, index: int) -> None:
+        if self.completion:
+            self.completion.done(index)
 
-                    # ✅ Remove the departure if ALL cabins are waitlisted or unavailable
-                    if all(cat["status"] == "Waitlist" for cat in categories):
-                        logging.info(f"🚫 Removing departure: {departure['start_date']} - No available cabins")
-                        continue  # Skip adding this departure to the list
+    def _resolve(self, index: int, booking_url: str, categories: list[dict[str, Any]],
+                 all_categories: list[list[dict[str, Any]]]) -> None:
+        """
+        Stores a scraped result for departure `index` and every duplicate waiting on it.
+        """
+        self._remember(booking_url, categories)
+        for waiting_index in [index] + self.memo.resolve(booking_url, categories):
+            all_categories[waiting_index] = categories
+            self._done(waiting_index)
 
-                    # ✅ Only add departures that have at least ONE available cabin
-                    valid_departures.append(departure)
+    def _gather_and_scrape(self, page: Any, limit: int) -> tuple[list[dict[str, Any]], list[list[dict[str, Any]]]]:
+        """
+        Runs Phase 1 on `page` while a worker pool scrapes categories for each departure as it is
+        found. Results are returned in the order of the trips list.
+        """
+        all_categories: list[list[dict[str, Any]]] = []
+        booking_urls: list[str] = []
+        discovery_index: dict[int, int] = {}
 
-                trip["departures"] = valid_departures
+        def store(index: int, categories: list[dict[str, Any]]) -> None:
+            self._resolve(index, booking_urls[index], categories, all_categories)
 
-            browser.close()
+        pool = CategoryWorkerPool(self.concurrency, store, max_pending=PIPELINE_QUEUE_SIZE)
+        http_pool = ThreadPoolExecutor(self.http.concurrency, thread_name_prefix="http-tier") if self.http else None
+        http_jobs: list[Future[None]] = []
 
-        return trips
+        def try_http(index: int, label: str, booking_url: str) -> None:
+            categories = self.http.fetch_categories(booking_url)
+            if categories is None:
+                pool.submit(index, label, booking_url)
+            else:
+                store(index, categories)
+
+        def on_departure(trip_name: str, departure: dict[str, Any]) -> None:
+            index = len(all_categories)
+            label = self._departure_label(trip_name, departure, f"Departure {index + 1}")
+            booking_url = departure.get("booking_url", "No URL Available")
+            booking_urls.append(booking_url)
+            discovery_index[id(departure)] = index
+            all_categories.append([])
+
+            if not self._claim(index, label, departure, all_categories):
+                return
+            if http_pool:
+                http_jobs.append(http_pool.submit(try_http, index, label, booking_url))
+            else:
+                pool.submit(index, label, booking_url)
+
+        try:
+            trips = self._gather_trips(page, limit, on_departure)
+            self.journal.record_trips(trips)
+            logging.info(f"Phase 1 finished after {time.monotonic() - self.started_at:.1f}s; "
+                         "waiting for the remaining category pages.")
+            for job in http_jobs:
+                job.result()
+        finally:
+            if http_pool:
+                http_pool.shutdown(wait=True)
+            pool.close()
+
+        # Date windows can add departures to a trip found earlier, so restore the trips-list order
+        ordered = [all_categories[discovery_index[id(departure)]]
+                   for trip in trips for departure in trip["departures"]]
+        return trips, ordered
+
+    @staticmethod
+    def _apply_categories(trips: list[dict[str, Any]], all_categories: list[list[dict[str, Any]]]) -> None:
+        """
+        Attaches scraped categories to departures (in Phase 1 order) and drops waitlisted departures.
+        """
+        remaining = iter(all_categories)
+
+        for trip in trips:
+            valid_departures = []
+
+            for departure in trip["departures"]:
+                categories = next(remaining)
+                departure["categories"] = categories
+
+                # ✅ Remove the departure if ALL cabins are waitlisted or unavailable
+                if not has_available_cabins(categories):
+                    logging.info(f"🚫 Removing departure: {departure['start_date']} - No available cabins")
+                    metrics.count("departures_removed")
+                    continue  # Skip adding this departure to the list
+
+                # ✅ Only add departures that have at least ONE available cabin
+                valid_departures.append(departure)
 
+            trip["departures"] = valid_departures
@@ -0,0 +1,59 @@
+import re
+from datetime import date, datetime
+from typing import Any
+
+_PRICE_DIGITS = re.compile(r"[\d,]+")
+_OCCUPANCY = re.compile(r"^(\d+) Person\(s\)$")
+
+# Date format of departure start/end dates in the trip list ("2025 May 23")
+DISPLAY_DATE_FORMAT = "%Y %b %d"
+
+def parse_price(price: str | None) -> int | None:
+    """
+    Whole-dollar amount of a display price such as "$12,345", or None if it has no number.
+    """
+    if not price:
+        return None
+    match = _PRICE_DIGITS.search(price)
+    if not match or not match.group().replace(",", ""):
+        return None
+    return int(match.group().replace(",", ""))
+
+def format_price(amount: int) -> str:
+    return f"${amount:,}"
+
+def parse_display_date(text: str | None) -> date | None:
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text, DISPLAY_DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+def format_display_date(value: date) -> str:
+    return f"{value.year} {value.strftime('%b')} {value.day}"
+
+def parse_occupancy(occupancy: str | None) -> int | None:
+    """
+    Guest count of an occupancy label such as "2 Person(s)", or None for "Unknown".
+    """
+    match = _OCCUPANCY.match(occupancy or "")
+    return int(match.group(1)) if match else None
+
+def format_occupancy(count: int | None) -> str:
+    return f"{count} Person(s)" if count else "Unknown"
+
+def split_joined(value: str | None) -> list[str]:
+    """
+    Items of a pipe-joined field such as `destinations` or `cabinNumbers`.
+    """
+    return value.split("|") if value else []
+
+def min_price(departures: list[dict[str, Any]]) -> int | None:
+    """
+    Lowest parsed category price across `departures`, or None if none has a price.
+    """
+    prices = [parse_price(category.get("price")) for departure in departures
+              for category in departure.get("categories", [])]
+    prices = [price for price in prices if price is not None]
+    return min(prices) if prices else None
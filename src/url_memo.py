@@ -0,0 +1,68 @@
+import logging
+import threading
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from config import BASE_URL
+
+# Query parameters that never change which departure a booking page shows
+IGNORED_QUERY_PARAMS = ("utm_", "gclid", "fbclid", "_ga")
+
+def normalize_booking_url(url: str) -> str:
+    """
+    Canonical form of a booking URL: absolute, lower-case host, no fragment or tracking
+    parameters, and query parameters in sorted order.
+    """
+    if not url.startswith("http"):
+        url = BASE_URL + url
+    parts = urlsplit(url)
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.startswith(IGNORED_QUERY_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+class BookingUrlMemo:
+    """
+    Run-scoped memo that makes every normalized booking URL be scraped at most once.
+
+    The first departure to claim a URL scrapes it. Departures claiming it later either get the
+    finished result straight away or, if the scrape is still in flight, are handed the result
+    when it resolves.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.results: dict[str, list[dict[str, Any]]] = {}
+        self.in_flight: dict[str, list[int]] = {}
+        self.avoided = 0
+
+    def claim(self, index: int, booking_url: str) -> tuple[bool, list[dict[str, Any]] | None]:
+        """
+        Returns (should_scrape, known_result) for departure `index`.
+        """
+        key = normalize_booking_url(booking_url)
+        with self._lock:
+            if key in self.results:
+                self.avoided += 1
+                return False, self.results[key]
+            if key in self.in_flight:
+                self.avoided += 1
+                self.in_flight[key].append(index)
+                return False, None
+            self.in_flight[key] = []
+            return True, None
+
+    def resolve(self, booking_url: str, categories: list[dict[str, Any]]) -> list[int]:
+        """
+        Stores the result for a URL and returns the departures that were waiting on it.
+        """
+        key = normalize_booking_url(booking_url)
+        with self._lock:
+            self.results[key] = categories
+            return self.in_flight.pop(key, [])
+
+    def log_summary(self) -> None:
+        if self.avoided:
+            logging.info(f"🔁 Coalesced {self.avoided} duplicate booking URLs "
+                         f"({len(self.results)} unique departures scraped or reused).")
@@ -0,0 +1,139 @@
+import logging
+import threading
+import time
+from typing import Any
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from metrics import metrics
+
+class WaitStats:
+    """
+    Records how long each event-driven wait took against the fixed sleep it replaced.
+    Shared by every page of a run, including pooled worker threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.waits: dict[str, dict[str, float]] = {}
+
+    def record(self, name: str, waited: float, budget: float, timed_out: bool) -> None:
+        with self._lock:
+            entry = self.waits.setdefault(name, {"count": 0, "waited_s": 0.0, "budget_s": 0.0, "timeouts": 0})
+            entry["count"] += 1
+            entry["waited_s"] += waited
+            entry["budget_s"] += budget
+            entry["timeouts"] += 1 if timed_out else 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.waits = {}
+
+    def log_summary(self) -> None:
+        with self._lock:
+            waits = dict(self.waits)
+        if not waits:
+            return
+
+        waited = sum(entry["waited_s"] for entry in waits.values())
+        budget = sum(entry["budget_s"] for entry in waits.values())
+        logging.info(f"⏱️ Waited {waited:.1f}s in total vs {budget:.1f}s of fixed sleeps ({budget - waited:.1f}s saved).")
+        for name, entry in sorted(waits.items()):
+            logging.info(f"    {name}: {entry['count']}x, waited {entry['waited_s']:.1f}s "
+                         f"vs {entry['budget_s']:.1f}s fixed, {entry['timeouts']} hit the ceiling")
+
+wait_stats = WaitStats()
+
+def _timed(name: str, budget_ms: int, wait: Any) -> bool:
+    start = time.monotonic()
+    timed_out = False
+    try:
+        wait()
+    except PlaywrightTimeoutError:
+        timed_out = True
+        metrics.count("wait_timeouts")
+    wait_stats.record(name, time.monotonic() - start, budget_ms / 1000, timed_out)
+    return not timed_out
+
+def wait_for_state(locator: Any, state: str, timeout_ms: int, name: str, budget_ms: int) -> bool:
+    """
+    Waits until the first element of `locator` is attached/detached/visible/hidden, up to `timeout_ms`.
+    Returns False when the ceiling was hit instead of raising.
+    """
+    return _timed(name, budget_ms, lambda: locator.first.wait_for(state=state, timeout=timeout_ms))
+
+def wait_for_count_increase(locator: Any, previous: int, timeout_ms: int, name: str, budget_ms: int) -> bool:
+    """
+    Waits until `locator` matches more than `previous` elements, e.g. after a "Show more" click.
+    """
+    return _timed(name, budget_ms, lambda: locator.nth(previous).wait_for(state="attached", timeout=timeout_ms))
+
+class NetworkTracker:
+    """
+    Counts a page's requests in flight while it is entered, so a wait can end once the data a
+    click asked for has arrived. Enter it before the click: Playwright's own "networkidle" load
+    state only fires once per navigation, so it returns at once after a click in a single-page app.
+    """
+
+    def __init__(self, page: Any) -> None:
+        self.page = page
+        self.in_flight: set[Any] = set()
+        self.last_activity = time.monotonic()
+
+    def _started(self, request: Any) -> None:
+        self.in_flight.add(request)
+        self.last_activity = time.monotonic()
+
+    def _ended(self, request: Any) -> None:
+        self.in_flight.discard(request)
+        self.last_activity = time.monotonic()
+
+    def idle_for(self) -> float:
+        return 0.0 if self.in_flight else time.monotonic() - self.last_activity
+
+    def __enter__(self) -> "NetworkTracker":
+        self.page.on("request", self._started)
+        self.page.on("requestfinished", self._ended)
+        self.page.on("requestfailed", self._ended)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.page.remove_listener("request", self._started)
+        self.page.remove_listener("requestfinished", self._ended)
+        self.page.remove_listener("requestfailed", self._ended)
+
+def wait_for_network_idle(network: NetworkTracker, locator: Any, timeout_ms: int, name: str, budget_ms: int,
+                          idle_ms: int = 300, poll_ms: int = 100) -> bool:
+    """
+    Waits until `locator` is attached and no request has been in flight for `idle_ms`, i.e. the
+    data behind the selector has loaded. Polls with page.wait_for_timeout, which lets the sync
+    API deliver the request events.
+    """
+    def wait() -> None:
+        deadline = time.monotonic() + timeout_ms / 1000
+        locator.first.wait_for(state="attached", timeout=timeout_ms)
+        while network.idle_for() < idle_ms / 1000:
+            if time.monotonic() >= deadline:
+                raise PlaywrightTimeoutError(f"{name}: {len(network.in_flight)} requests still in flight after {timeout_ms}ms")
+            network.page.wait_for_timeout(poll_ms)
+
+    return _timed(name, budget_ms, wait)
+
+def wait_for_stable_count(locator: Any, timeout_ms: int, name: str, budget_ms: int,
+                          settle_ms: int = 500, poll_ms: int = 100) -> bool:
+    """
+    Waits until `locator` matches at least one element and its count has not changed for
+    `settle_ms`, e.g. while a drawer renders its cards in batches as their data arrives.
+    """
+    def wait() -> None:
+        deadline = time.monotonic() + timeout_ms / 1000
+        count = locator.count()
+        stable_since = time.monotonic()
+        while count == 0 or time.monotonic() - stable_since < settle_ms / 1000:
+            if time.monotonic() >= deadline:
+                raise PlaywrightTimeoutError(f"{name}: element count did not settle within {timeout_ms}ms")
+            time.sleep(poll_ms / 1000)
+            current = locator.count()
+            if current != count:
+                count = current
+                stable_since = time.monotonic()
+
+    return _timed(name, budget_ms, wait)
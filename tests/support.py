@@ -0,0 +1,161 @@
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+from urllib.parse import urlparse
+
+# (method, path) -> handler(query, body) -> (status, content type, body)
+Routes = dict[tuple[str, str], Callable[[str, bytes], tuple[int, str, bytes]]]
+
+@contextmanager
+def local_server(routes: Routes) -> Iterator[str]:
+    """
+    Serves `routes` on an ephemeral localhost port and yields the base URL.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def _dispatch(self, method: str) -> None:
+            parsed = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            handler = routes.get((method, parsed.path))
+            if handler is None:
+                self.send_error(404)
+                return
+            status, content_type, payload = handler(parsed.query, body)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:
+            self._dispatch("GET")
+
+        def do_POST(self) -> None:
+            self._dispatch("POST")
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def chromium_available() -> bool:
+    """
+    True when a Playwright Chromium build is installed, so browser tests can run.
+    """
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            p.chromium.launch(headless=True).close()
+        return True
+    except Exception:
+        return False
+
+class FakeS3:
+    """
+    In-memory stand-in for the boto3 S3 client calls the publish step makes.
+    Objects are keyed by (bucket, key) and get an MD5 ETag like a single-part upload.
+    Multipart uploads enforce S3's minimum size for every part but the last. With `read_denied`,
+    reads fail with 403 like they do for a role that may only s3:PutObject.
+    """
+
+    def __init__(self, min_part_size: int = 5 * 1024 * 1024, read_denied: bool = False) -> None:
+        self.read_denied = read_denied
+        self.objects: dict[tuple[str, str], dict] = {}
+        self.uploads: list[str] = []
+        self.multipart: dict[str, dict] = {}
+        self.min_part_size = min_part_size
+        self.multipart_started = 0
+
+    def _not_found(self, operation: str):
+        from botocore.exceptions import ClientError
+        return ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, operation)
+
+    def _check_read(self, operation: str) -> None:
+        from botocore.exceptions import ClientError
+        if self.read_denied:
+            raise ClientError({"Error": {"Code": "403", "Message": "Forbidden"}}, operation)
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs) -> dict:
+        import hashlib
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        self.objects[(Bucket, Key)] = {
+            "Body": Body, "ETag": etag,
+            "Metadata": kwargs.get("Metadata", {}),
+            "ContentType": kwargs.get("ContentType"),
+            "ContentEncoding": kwargs.get("ContentEncoding"),
+            "CacheControl": kwargs.get("CacheControl"),
+        }
+        self.uploads.append(Key)
+        return {"ETag": etag}
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str, ExtraArgs: dict | None = None) -> None:
+        with open(Filename, "rb") as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f.read(), **(ExtraArgs or {}))
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        self._check_read("HeadObject")
+        if (Bucket, Key) not in self.objects:
+            raise self._not_found("HeadObject")
+        obj = self.objects[(Bucket, Key)]
+        return {"ETag": obj["ETag"], "Metadata": obj["Metadata"], "ContentLength": len(obj["Body"])}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self.multipart_started += 1
+        upload_id = f"upload-{self.multipart_started}"
+        self.multipart[upload_id] = {"Bucket": Bucket, "Key": Key, "Parts": {}, "Args": kwargs}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> dict:
+        import hashlib
+        upload = self.multipart[UploadId]
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        upload["Parts"][PartNumber] = (etag, Body)
+        return {"ETag": etag}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> dict:
+        import hashlib
+        from botocore.exceptions import ClientError
+        upload = self.multipart.pop(UploadId)
+        parts = MultipartUpload["Parts"]
+        if [part["PartNumber"] for part in parts] != sorted(upload["Parts"]):
+            raise ClientError({"Error": {"Code": "InvalidPart", "Message": "Parts do not match"}}, "CompleteMultipartUpload")
+        bodies = [upload["Parts"][part["PartNumber"]][1] for part in parts]
+        if any(len(body) < self.min_part_size for body in bodies[:-1]):
+            raise ClientError({"Error": {"Code": "EntityTooSmall", "Message": "Part too small"}}, "CompleteMultipartUpload")
+        digests = b"".join(hashlib.md5(body).digest() for body in bodies)
+        etag = f'"{hashlib.md5(digests).hexdigest()}-{len(bodies)}"'
+        self.objects[(Bucket, Key)] = {"Body": b"".join(bodies), "ETag": etag, "Metadata": {},
+                                       "ContentType": upload["Args"].get("ContentType"),
+                                       "ContentEncoding": None, "CacheControl": None}
+        self.uploads.append(Key)
+        return {"ETag": etag}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        self.multipart.pop(UploadId)
+        return {}
+
+    def copy_object(self, Bucket: str, Key: str, CopySource: dict, MetadataDirective: str = "COPY", **kwargs) -> dict:
+        source = self.objects[(CopySource["Bucket"], CopySource["Key"])]
+        metadata = kwargs.get("Metadata", {}) if MetadataDirective == "REPLACE" else source["Metadata"]
+        return self.put_object(Bucket=Bucket, Key=Key, Body=source["Body"], Metadata=metadata,
+                               ContentType=kwargs.get("ContentType", source["ContentType"]))
+
+    def delete_object(self, Bucket: str, Key: str) -> dict:
+        self.objects.pop((Bucket, Key), None)
+        return {}
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+        import io
+        self._check_read("GetObject")
+        if (Bucket, Key) not in self.objects:
+            raise self._not_found("GetObject")
+        obj = self.objects[(Bucket, Key)]
+        return {"Body": io.BytesIO(obj["Body"]), "ETag": obj["ETag"], "Metadata": obj["Metadata"]}
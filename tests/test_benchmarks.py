@@ -0,0 +1,38 @@
+import unittest
+from benchmarks.run_benchmarks import compare, count_playwright_calls, parse_args, run_phases
+from tests.support import chromium_available
+
+def _result(wall: float, calls: int) -> dict:
+    phase = {"wall_s_median": wall, "playwright_calls": calls, "peak_python_kib": 100}
+    return {"commit": "abc", "created_at": "2025-01-01T00:00:00+00:00", "phases": {"categories": phase}}
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_compare_flags_slower_or_chattier_phases(self):
+        """Test that a regression is reported for extra wall time beyond the limit or extra Playwright calls."""
+        self.assertTrue(compare(_result(1.1, 10), _result(1.0, 10), max_regression=0.2))
+        self.assertFalse(compare(_result(1.5, 10), _result(1.0, 10), max_regression=0.2))
+        self.assertFalse(compare(_result(1.0, 11), _result(1.0, 10), max_regression=0.2))
+
+    def test_call_counting_restores_playwright_methods(self):
+        """Test that the Page/Locator patches are removed when the counting block ends."""
+        from playwright.sync_api import Locator
+        original = Locator.__dict__["count"]
+        with count_playwright_calls():
+            self.assertIsNot(Locator.__dict__["count"], original)
+        self.assertIs(Locator.__dict__["count"], original)
+
+    @unittest.skipUnless(chromium_available(), "Playwright Chromium is not installed")
+    def test_fixture_phases_produce_records(self):
+        """Test that every parser extracts the expected records from the fixture pages."""
+        args = parse_args(["--trips", "13", "--departures", "5", "--long-departures", "9",
+                           "--categories", "4", "--cabins", "2", "--repeat", "1"])
+        phases = run_phases(args)
+
+        self.assertEqual(phases["trip_listing"]["records"], 13 * 5)
+        self.assertEqual(phases["departures"]["records"], 9)
+        self.assertEqual(phases["categories"]["records"], 3)  # every 4th category is waitlisted
+        self.assertGreater(phases["categories"]["playwright_calls"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
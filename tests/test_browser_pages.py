@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src import browser_pages
+from src.browser_pages import COOKIE_OK_TEXT, consent_cleared, new_page, prepare_storage_state
+from tests.support import chromium_available, local_server
+
+class FakeContext:
+    def __init__(self):
+        self.init_scripts = []
+        self.storage_state_path = None
+
+    def add_init_script(self, script):
+        self.init_scripts.append(script)
+
+    def new_page(self):
+        return mock.MagicMock()
+
+    def storage_state(self, path):
+        self.storage_state_path = path
+        with open(path, "w") as f:
+            f.write("{}")
+
+    def close(self):
+        pass
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    def new_context(self, **kwargs):
+        context = FakeContext()
+        context.kwargs = kwargs
+        self.contexts.append(context)
+        return context
+
+class TestBrowserPages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp.name, "browser_state.json")
+        for name in ("_state_ready", "_state_failed"):
+            patch = mock.patch.object(browser_pages, name, False)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fresh_storage_state_is_reused(self):
+        """Test that a recent saved session is reused without opening a context to re-consent."""
+        with open(self.state_path, "w") as f:
+            f.write("{}")
+        browser = FakeBrowser()
+
+        self.assertEqual(prepare_storage_state(browser, self.state_path), self.state_path)
+        self.assertEqual(browser.contexts, [])
+
+    def test_new_page_uses_storage_state_and_init_script(self):
+        """Test that consent-session pages start from the saved state with the blocker script installed."""
+        browser = FakeBrowser()
+        with mock.patch.object(browser_pages, "prepare_storage_state", return_value=self.state_path):
+            new_page(browser, consent_session=True)
+
+        context = browser.contexts[-1]
+        self.assertEqual(context.kwargs, {"storage_state": self.state_path})
+        self.assertEqual(context.init_scripts, [browser_pages.CONSENT_INIT_SCRIPT])
+
+    def test_failed_session_is_not_retried_for_every_page(self):
+        """Test that a failed consent session is attempted once and later pages get plain contexts."""
+        browser = FakeBrowser()
+        with mock.patch.object(FakeContext, "new_page", side_effect=RuntimeError("goto timed out")):
+            self.assertIsNone(prepare_storage_state(browser, self.state_path))
+            self.assertIsNone(prepare_storage_state(browser, self.state_path))
+        self.assertEqual(len(browser.contexts), 1)
+
+    def test_consent_check_falls_back_on_errors(self):
+        """Test that the quick check only reports cleared when the page says so."""
+        page = mock.MagicMock()
+        page.evaluate.return_value = True
+        self.assertTrue(consent_cleared(page))
+        page.evaluate.return_value = False
+        self.assertFalse(consent_cleared(page))
+        page.evaluate.side_effect = RuntimeError("navigated away")
+        self.assertFalse(consent_cleared(page))
+
+    def test_cookie_button_text_must_be_exactly_ok(self):
+        """Test that "Book" buttons styled like the cookie button are not taken for the consent banner."""
+        self.assertTrue(all(COOKIE_OK_TEXT.search(text) for text in ("OK", " ok ", "Ok")))
+        self.assertFalse(any(COOKIE_OK_TEXT.search(text) for text in ("Book", "Book now", "Okay")))
+
+    @unittest.skipUnless(chromium_available(), "Playwright Chromium is not installed")
+    def test_booking_buttons_do_not_hide_a_cleared_page(self):
+        """Test that a page with only "Book" buttons is reported cleared, and one with the banner's "OK" is not."""
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            page.set_content("<button data-style='button'>Book</button>")
+            booked = consent_cleared(page)
+            page.set_content("<button data-style='button'>Book</button><button data-style='button'> OK </button>")
+            banner = consent_cleared(page)
+            browser.close()
+        self.assertEqual((booked, banner), (True, False))
+
+    @unittest.skipUnless(chromium_available(), "Playwright Chromium is not installed")
+    def test_init_script_removes_blockers(self):
+        """Test that the GDPR wrapper never survives page scripts when the init script is installed."""
+        from playwright.sync_api import sync_playwright
+        html = b"""<html><body><div id="wrapper" type="GDPR">consent</div>
+            <script>document.body.insertAdjacentHTML("beforeend", '<div id="wrapper" type="CCPA">ccpa</div>');</script>
+            <p>content</p></body></html>"""
+        routes = {("GET", "/"): lambda query, body: (200, "text/html", html)}
+        with local_server(routes) as base_url, sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            with mock.patch.object(browser_pages, "prepare_storage_state", return_value=None):
+                page = new_page(browser, consent_session=True)
+            page.goto(base_url + "/")
+            cleared = consent_cleared(page)
+            browser.close()
+        self.assertTrue(cleared)
+
+if __name__ == "__main__":
+    unittest.main()
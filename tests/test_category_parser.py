@@ -0,0 +1,48 @@
+import unittest
+from src.category_parser import CategoryParser
+
+class TestCategoryParser(unittest.TestCase):
+
+    def setUp(self):
+        """Raw card fields as returned by CATEGORY_CARDS_JS."""
+        self.raw = {
+            "deck": "  Main Deck ",
+            "category_name": "Category 3",
+            "pax_count": 2,
+            "cabin_type": " Twin ",
+            "price": "$12,345",
+            "has_see_available": True,
+            "has_join_waitlist": False,
+        }
+
+    def test_fields_match_locator_schema(self):
+        """Test that batched fields produce the same values as the per-locator path."""
+        fields = CategoryParser._category_fields_from_raw(self.raw)
+        self.assertEqual(fields, {
+            "category_name": "Category 3",
+            "deck": "Main Deck",
+            "occupancy": "2 Person(s)",
+            "cabin_type": "Twin",
+            "price": "$12,345",
+            "status": "Available",
+        })
+
+    def test_missing_fields_fall_back_to_unknown(self):
+        """Test that absent elements map to the same 'Unknown' defaults as the locator path."""
+        raw = dict(self.raw, deck=None, pax_count=0, cabin_type=None, price=None,
+                   has_see_available=False, has_join_waitlist=True)
+        fields = CategoryParser._category_fields_from_raw(raw)
+        self.assertEqual(fields["deck"], "Unknown")
+        self.assertEqual(fields["occupancy"], "Unknown")
+        self.assertEqual(fields["cabin_type"], "Unknown")
+        self.assertEqual(fields["price"], "Unknown")
+        self.assertEqual(fields["status"], "Waitlist")
+
+    def test_legacy_round_trip_count(self):
+        """Test the per-card call count the locator path would have made."""
+        self.assertEqual(CategoryParser._legacy_card_round_trips(self.raw), 12)
+        raw = dict(self.raw, deck=None, has_see_available=False)
+        self.assertEqual(CategoryParser._legacy_card_round_trips(raw), 12)
+
+if __name__ == "__main__":
+    unittest.main()
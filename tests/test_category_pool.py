@@ -0,0 +1,30 @@
+import unittest
+from unittest import mock
+from src import category_pool
+from src.category_pool import CategoryWorkerPool, fetch_categories_pooled
+
+class TestCategoryWorkerPool(unittest.TestCase):
+
+    def setUp(self):
+        playwright = mock.MagicMock()
+        playwright.__enter__.return_value.chromium.launch.side_effect = RuntimeError("Executable doesn't exist")
+        patch = mock.patch.object(category_pool, "sync_playwright", return_value=playwright)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_browser_launch_failure_is_raised_to_the_caller(self):
+        """Test that a worker whose browser cannot start fails the scrape instead of returning empty results."""
+        with self.assertLogs(level="ERROR"), self.assertRaisesRegex(RuntimeError, "Executable"):
+            fetch_categories_pooled([("Trip A", "/book/1"), ("Trip B", "/book/2")], concurrency=2)
+
+    def test_bounded_queue_producer_stops_when_every_worker_failed(self):
+        """Test that submit() raises the setup failure instead of waiting forever on a full queue."""
+        with self.assertLogs(level="ERROR"), self.assertRaisesRegex(RuntimeError, "Executable"):
+            pool = CategoryWorkerPool(1, lambda index, categories: None, max_pending=1)
+            for index in range(3):
+                pool.submit(index, f"Trip {index}", f"/book/{index}")
+        with self.assertRaises(RuntimeError):
+            pool.close()
+
+if __name__ == "__main__":
+    unittest.main()
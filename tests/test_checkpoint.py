@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from src.checkpoint import RunJournal
+
+class TestRunJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = RunJournal(os.path.join(self.tmp.name, "output", "run_journal.jsonl"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resume_returns_trips_and_completed_departures(self):
+        """Test that Phase 1 output and finished departures survive a restart, ignoring a torn last line."""
+        trips = [{"trip_name": "A", "departures": [{"booking_url": "u1"}, {"booking_url": "u2"}]}]
+        self.journal.record_trips(trips)
+        self.journal.record_departure("u1", [{"category_name": "Cat 1", "status": "Available"}])
+        with open(self.journal.path, "a", encoding="utf-8") as f:
+            f.write('{"type": "departure", "booking_url": "u2", "categ')
+
+        loaded_trips, completed = RunJournal(self.journal.path).load()
+
+        self.assertEqual(loaded_trips, trips)
+        self.assertEqual(list(completed), ["u1"])
+
+    def test_records_after_a_torn_line_survive_the_next_resume(self):
+        """Test that a departure recorded after resuming from a torn journal is not glued onto the torn line."""
+        self.journal.record_trips([{"trip_name": "A", "departures": [{"booking_url": "u1"}]}])
+        with open(self.journal.path, "a", encoding="utf-8") as f:
+            f.write('{"type": "departure", "booking_url": "u1", "categ')
+
+        self.journal.load()
+        self.journal.record_departure("u1", [{"category_name": "Cat 1", "status": "Available"}])
+
+        self.assertEqual(list(RunJournal(self.journal.path).load()[1]), ["u1"])
+
+    def test_reset_discards_previous_run_and_clear_removes_it(self):
+        """Test that a fresh run replaces the old journal and clear() deletes it."""
+        self.journal.record_trips([{"trip_name": "Old", "departures": []}])
+        self.journal.record_departure("old", [])
+        self.journal.reset()
+        self.journal.record_trips([{"trip_name": "New", "departures": []}])
+
+        trips, completed = self.journal.load()
+        self.assertEqual(trips[0]["trip_name"], "New")
+        self.assertEqual(completed, {})
+
+        self.journal.clear()
+        self.assertEqual(self.journal.load(), (None, {}))
+
+if __name__ == "__main__":
+    unittest.main()
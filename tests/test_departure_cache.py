@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+import unittest
+from src.departure_cache import DepartureCache
+
+CATEGORIES = [{"category_name": "Category 3", "status": "Available", "cabinNumbers": "301|302", "num_cabins": 2}]
+
+class TestDepartureCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+        self.cache = DepartureCache(self.path, ttl_hours=24, refresh_within_days=30)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_fresh_entries_are_hits_across_runs(self):
+        """Test that a stored result is served by a new cache instance on the same file."""
+        self.assertIsNone(self.cache.get("https://x/book?d=1", "2099 May 1"))
+        self.cache.put("https://x/book?d=1", CATEGORIES)
+
+        reopened = DepartureCache(self.path, ttl_hours=24, refresh_within_days=30)
+        self.assertEqual(reopened.get("https://x/book?d=1", "2099 May 1"), CATEGORIES)
+        self.assertEqual((reopened.hits, reopened.hit_ages), (1, {"<6h": 1}))
+        reopened.close()
+
+    def test_expired_and_near_departures_are_rescraped(self):
+        """Test that stale entries and departures sailing soon are treated as misses."""
+        self.cache.put("https://x/book?d=1", CATEGORIES)
+        self.cache._conn.execute("UPDATE departures SET fetched_at = ?", (time.time() - 25 * 3600,))
+        self.assertIsNone(self.cache.get("https://x/book?d=1", "2099 May 1"))
+        self.assertEqual(self.cache.expired, 1)
+
+        self.cache.put("https://x/book?d=1", CATEGORIES)
+        soon = time.strftime("%Y %b %d", time.localtime(time.time() + 5 * 86400))
+        self.assertIsNone(self.cache.get("https://x/book?d=1", soon))
+        self.assertEqual(self.cache.near_departure, 1)
+
+    def test_waitlisted_results_are_cached_and_close_reopens(self):
+        """Test that a fully waitlisted result is served from the cache, also after close()."""
+        waitlisted = [{"category_name": "Category 1", "status": "Waitlist", "cabinNumbers": "", "num_cabins": 0}]
+        self.cache.put("https://x/book?d=2", waitlisted)
+        self.cache.close()
+
+        self.assertEqual(self.cache.get("https://x/book?d=2", "2099 May 1"), waitlisted)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from src import departure_parser
+from src.departure_parser import fetch_departures
+
+def make_row(year, start, end, href, ship="National Geographic Endurance"):
+    return {
+        "year": year,
+        "p_texts": [start, end, "$12,345"],
+        "ship": ship,
+        "href": href,
+        "has_link": True,
+        "is_land_expedition": False,
+    }
+
+class FakeButton:
+    def __init__(self, on_click=None, present=lambda: True):
+        self.on_click = on_click
+        self.present = present
+
+    @property
+    def first(self):
+        return self
+
+    def count(self):
+        return 1 if self.present() else 0
+
+    def scroll_into_view_if_needed(self):
+        pass
+
+    def wait_for(self, state, timeout):
+        pass
+
+    def click(self, timeout=None):
+        if self.on_click:
+            self.on_click()
+
+class FakeDepartureList:
+    """Stands in for a trip card and its page; 'Show more' appends `page_size` more rows."""
+
+    def __init__(self, rows, page_size):
+        self.rows = rows
+        self.page_size = page_size
+        self.visible = page_size
+        self.starts = []
+
+    def locator(self, selector, has_text=None):
+        if has_text == "See departure dates":
+            return FakeButton()
+        if has_text == "Show more":
+            return FakeButton(self._show_more, present=lambda: self.visible < len(self.rows))
+        return self
+
+    def _show_more(self):
+        self.visible += self.page_size
+
+    def count(self):
+        return 1
+
+    @property
+    def first(self):
+        return self
+
+    def nth(self, index):
+        return self
+
+    def wait_for(self, state, timeout):
+        pass
+
+    def evaluate_all(self, script, start):
+        self.starts.append(start)
+        return self.rows[start:self.visible]
+
+    def wait_for_timeout(self, timeout):
+        pass
+
+class TestFetchDepartures(unittest.TestCase):
+
+    def setUp(self):
+        self.original_end_date = departure_parser.END_DATE
+        departure_parser.END_DATE = "2030-12-31"
+
+    def tearDown(self):
+        departure_parser.END_DATE = self.original_end_date
+
+    def test_show_more_reads_only_appended_rows(self):
+        """Test that each 'Show more' only reads the newly appended rows and year headers carry over."""
+        rows = [
+            make_row("2030", "May 1", "May 9", "/book?d=1"),
+            make_row(None, "Jun 1", "Jun 9", "/book?d=2"),
+            make_row(None, "Jun 1", "Jun 9", "/book?d=2"),
+            make_row(None, "Jul 1", "Jul 9", "/book?d=3"),
+        ]
+        trip = FakeDepartureList(rows, page_size=2)
+
+        departures = fetch_departures(trip, trip, batched=True)
+
+        self.assertEqual(trip.starts, [0, 2])
+        self.assertEqual([d["start_date"] for d in departures], ["2030 May 1", "2030 Jun 1", "2030 Jul 1"])
+        self.assertTrue(departures[0]["booking_url"].endswith("/book?d=1"))
+
+    def test_stops_after_end_date(self):
+        """Test that departures past END_DATE stop pagination."""
+        departure_parser.END_DATE = "2030-06-15"
+        rows = [
+            make_row("2030", "May 1", "May 9", "/book?d=1"),
+            make_row(None, "Jul 1", "Jul 9", "/book?d=2"),
+            make_row(None, "Aug 1", "Aug 9", "/book?d=3"),
+        ]
+        trip = FakeDepartureList(rows, page_size=2)
+
+        departures = fetch_departures(trip, trip, batched=True)
+
+        self.assertEqual([d["start_date"] for d in departures], ["2030 May 1"])
+        self.assertEqual(trip.starts, [0])
+
+if __name__ == "__main__":
+    unittest.main()
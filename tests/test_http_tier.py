@@ -0,0 +1,104 @@
+import json
+import os
+import unittest
+from src import search_payloads
+from src.http_tier import HttpTier, categories_from_state, extract_embedded_states
+from tests.support import local_server
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "search_payload.json")
+
+def html_page(state: object, window_global: bool = False) -> bytes:
+    """
+    A server-rendered page embedding `state` the way Next.js or a window global would.
+    """
+    if window_global:
+        script = f"<script>window.__INITIAL_STATE__ = {json.dumps(state)};</script>"
+    else:
+        script = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(state)}</script>'
+    return f"<html><body><div id='root'></div>{script}</body></html>".encode("utf-8")
+
+CATEGORIES_STATE = {"props": {"pageProps": {"booking": {"categories": [
+    {"categoryName": "Category 1", "deckName": "Main Deck", "occupancy": 2, "cabinType": "Double",
+     "price": 12990, "status": "Available", "availableCabins": [{"number": "101"}, {"number": "103", "available": False}]},
+    {"categoryName": "Category 2", "deckName": "Upper Deck", "occupancy": 1, "cabinType": "Single",
+     "price": 15990, "status": "Waitlist", "availableCabins": []},
+]}}}}
+
+# Same page before the drawers are opened: no cabin numbers in the state
+DRAWER_ONLY_STATE = {"props": {"pageProps": {"booking": {"categories": [
+    {"categoryName": "Category 1", "deckName": "Main Deck", "occupancy": 2, "price": 12990, "status": "Available"},
+]}}}}
+
+class TestEmbeddedState(unittest.TestCase):
+
+    def test_extracts_script_and_window_state(self):
+        """Test that JSON script tags and window globals are both read."""
+        self.assertEqual(extract_embedded_states(html_page({"a": 1}).decode()), [{"a": 1}])
+        self.assertEqual(extract_embedded_states(html_page({"b": [1]}, window_global=True).decode()), [{"b": [1]}])
+
+    def test_categories_match_category_parser_shape(self):
+        """Test that embedded categories become CategoryParser records, without waitlisted ones."""
+        self.assertEqual(categories_from_state(CATEGORIES_STATE), [{
+            "category_name": "Category 1", "deck": "Main Deck", "occupancy": "2 Person(s)", "cabin_type": "Double",
+            "price": "$12,990", "status": "Available", "cabinNumbers": "101", "num_cabins": 1,
+        }])
+
+    def test_fully_waitlisted_page_keeps_its_categories(self):
+        """Test that a page with only waitlisted categories is not mistaken for an empty one."""
+        waitlisted = {"categories": CATEGORIES_STATE["props"]["pageProps"]["booking"]["categories"][1:]}
+        self.assertEqual([c["status"] for c in categories_from_state(waitlisted)], ["Waitlist"])
+
+    def test_available_category_without_cabins_needs_browser(self):
+        """Test that cabins only shown in drawers send the page to the browser."""
+        self.assertIsNone(categories_from_state(DRAWER_ONLY_STATE))
+
+class TestHttpTier(unittest.TestCase):
+
+    def setUp(self):
+        with open(FIXTURE, encoding="utf-8") as f:
+            self.payloads = json.load(f)
+        self.original_end_date = search_payloads.END_DATE
+        search_payloads.END_DATE = "2030-12-31"
+
+    def tearDown(self):
+        search_payloads.END_DATE = self.original_end_date
+
+    def routes(self, listing_state: object) -> dict:
+        pages = {
+            "/book": html_page(listing_state),
+            "/book/full": html_page(CATEGORIES_STATE),
+            "/book/drawers": html_page(DRAWER_ONLY_STATE),
+            "/book/plain": b"<html><body>Rendered in the browser only</body></html>",
+        }
+        return {("GET", path): (lambda query, body, page=page: (200, "text/html", page)) for path, page in pages.items()}
+
+    def test_complete_listing_served_over_http(self):
+        """Test that a listing whose embedded state has every page of hits needs no browser."""
+        state = {"props": {"pageProps": {"initialResults": self.payloads}}}
+        with local_server(self.routes(state)) as base_url:
+            tier = HttpTier(concurrency=2)
+            trips = tier.fetch_trips(f"{base_url}/book", limit=10, end_date="2030-12-31")
+
+        self.assertEqual([trip["trip_name"] for trip in trips],
+                         [trip["trip_name"] for trip in search_payloads.trips_from_payloads(self.payloads, 10)])
+        self.assertEqual(tier.served["listing"], 1)
+
+    def test_partial_listing_falls_back(self):
+        """Test that a listing with only the first page of hits is left to the browser."""
+        state = {"props": {"pageProps": {"initialResults": self.payloads[:1]}}}
+        with local_server(self.routes(state)) as base_url:
+            tier = HttpTier(concurrency=2)
+            self.assertEqual(tier.fetch_trips(f"{base_url}/book", limit=10, end_date="2030-12-31"), [])
+        self.assertEqual(tier.fallbacks["listing"], {"partial listing": 1})
+
+    def test_booking_pages_split_between_http_and_browser(self):
+        """Test that only pages needing drawers, lacking state or failing are reported for the browser."""
+        with local_server(self.routes({})) as base_url:
+            tier = HttpTier(concurrency=2)
+            results = tier.fetch_many([f"{base_url}/book/{name}" for name in ("full", "drawers", "plain", "missing")])
+
+        self.assertEqual(results[0][0]["cabinNumbers"], "101")
+        self.assertEqual(results[1:], [None, None, None])
+        self.assertEqual(tier.served["booking"], 1)
+        self.assertEqual(tier.fallbacks["booking"],
+                         {"needs cabin drawers": 1, "no embedded categories": 1, "HTTP 404": 1})
@@ -0,0 +1,54 @@
+import json
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from src.metrics import EMF_MAX_METRICS, Metrics, percentile
+
+class TestMetrics(unittest.TestCase):
+
+    def test_percentiles_use_nearest_rank(self):
+        """Test p50/p95 on a known distribution."""
+        samples = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(samples, 0.50), 50.0)
+        self.assertEqual(percentile(samples, 0.95), 95.0)
+        self.assertEqual(percentile([7.0], 0.95), 7.0)
+
+    def test_span_records_failed_blocks_and_counters_add_up(self):
+        """Test that a span is recorded even when its block raises, and counters accumulate."""
+        metrics = Metrics()
+        with self.assertRaises(RuntimeError), metrics.span("booking_goto"):
+            raise RuntimeError("timeout")
+        metrics.count("booking_retries")
+        metrics.count("booking_retries", 2)
+
+        summary = metrics.summary()
+        self.assertEqual(summary["spans"]["booking_goto"]["count"], 1)
+        self.assertEqual(summary["counters"], {"booking_retries": 3})
+
+    def test_emf_documents(self):
+        """Test that spans get one EMF document each and counters are chunked to the EMF metric limit."""
+        metrics = Metrics()
+        for ms in (100, 200, 300):
+            metrics.record("drawer_open", ms / 1000)
+        for i in range(EMF_MAX_METRICS + 1):
+            metrics.count(f"counter_{i}")
+
+        documents = metrics.emf_documents(namespace="Test", timestamp_ms=1)
+
+        self.assertEqual(len(documents), 3)
+        span = documents[0]
+        self.assertEqual(span["Span"], "drawer_open")
+        self.assertEqual((span["DurationP50"], span["DurationMax"], span["Count"]), (200.0, 300.0, 3))
+        directive = span["_aws"]["CloudWatchMetrics"][0]
+        self.assertEqual(directive["Dimensions"], [["Service", "Span"]])
+        self.assertTrue(all(metric["Name"] in span for metric in directive["Metrics"]))
+        self.assertEqual([len(doc["_aws"]["CloudWatchMetrics"][0]["Metrics"]) for doc in documents[1:]],
+                         [EMF_MAX_METRICS, 1])
+
+        output = StringIO()
+        with redirect_stdout(output):
+            metrics.emit("emf")
+        self.assertEqual(len([json.loads(line) for line in output.getvalue().splitlines()]), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import unittest
+import urllib.error
+import urllib.request
+from benchmarks.mock_site import MockExpeditionSite
+from tests.support import chromium_available
+
+def _get(url: str) -> tuple[int, bytes]:
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+class TestMockSite(unittest.TestCase):
+
+    def test_pages_carry_catalogue_settings(self):
+        """Test that the listing and booking pages are the fixtures with the configured sizes injected."""
+        with MockExpeditionSite(trips=250, categories=3) as site:
+            status, listing = _get(f"{site.base_url}/book?dateRange=1%253A2")
+            _, booking = _get(f"{site.base_url}/book/trip-4/departure-2")
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'window.MOCK_QUERY = "trips=250&', listing)
+        self.assertIn(b"hit_container__", listing)
+        self.assertIn(b"categories=3&", booking)
+        self.assertIn(b"category-card", booking)
+
+    def test_failure_injection_and_stats(self):
+        """Test that booking pages fail at the configured rate and /stats reports it."""
+        with MockExpeditionSite(failure_rate=1.0) as site:
+            status, _ = _get(f"{site.base_url}/book/trip-0/departure-0")
+            listing_status, _ = _get(f"{site.base_url}/book")
+            stats = json.loads(_get(f"{site.base_url}/stats")[1])
+
+        self.assertEqual(status, 503)
+        self.assertEqual(listing_status, 200)
+        self.assertEqual(stats["failures"], 1)
+        self.assertEqual(stats["booking"], 1)
+
+    def test_unknown_setting_is_rejected(self):
+        """Test that a misspelled setting fails fast instead of being ignored."""
+        with self.assertRaises(ValueError):
+            MockExpeditionSite(trip=10)
+
+    @unittest.skipUnless(chromium_available(), "Playwright Chromium is not installed")
+    def test_category_parser_against_booking_page(self):
+        """Test that CategoryParser reads the mock booking page and its drawers."""
+        from playwright.sync_api import sync_playwright
+        from src.category_parser import CategoryParser
+
+        with MockExpeditionSite(categories=4, cabins=3, waitlisted=4) as site, sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            categories = CategoryParser(f"{site.base_url}/book/trip-0/departure-0", browser.new_page()).fetch_categories()
+            browser.close()
+
+        self.assertEqual(len(categories), 3)
+        self.assertEqual([c["num_cabins"] for c in categories], [3, 3, 3])
+
+if __name__ == "__main__":
+    unittest.main()
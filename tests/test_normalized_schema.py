@@ -0,0 +1,60 @@
+import unittest
+from src.normalized_schema import denormalize_trips, normalize_trips
+
+def _category(name: str, price: str, cabins: list[str], deck: str = "Main Deck") -> dict:
+    return {"category_name": name, "deck": deck, "occupancy": "2 Person(s)", "cabin_type": "Balcony",
+            "price": price, "status": "Available", "cabinNumbers": "|".join(cabins), "num_cabins": len(cabins)}
+
+TRIPS = [
+    {
+        "trip_name": "Antarctica",
+        "url": "https://www.expeditions.com/destinations/antarctica",
+        "image_url": "https://example.com/a.jpg",
+        "destinations": "Antarctica|Falklands",
+        "departures": [
+            {"start_date": "2025 Dec 1", "end_date": "2025 Dec 14", "ship": "National Geographic Endurance",
+             "booking_url": "https://www.expeditions.com/book/1",
+             "categories": [_category("Category 1", "$12,345", ["301", "302"]),
+                            _category("Category 2", "Unknown", [], deck="Unknown")]},
+        ],
+    },
+    {
+        "trip_name": "Falklands",
+        "url": "https://www.expeditions.com/destinations/falklands",
+        "image_url": "",
+        "destinations": "Falklands",
+        "departures": [
+            {"start_date": "2026 Jan 5", "end_date": "2026 Jan 20", "ship": "National Geographic Endurance",
+             "booking_url": "https://www.expeditions.com/book/2",
+             "categories": [_category("Category 1", "$9,990", ["201"])]},
+        ],
+    },
+]
+
+class TestNormalizedSchema(unittest.TestCase):
+
+    def test_values_are_parsed_and_interned(self):
+        """Test that prices, dates and cabins are parsed and repeated strings share lookup IDs."""
+        document = normalize_trips(TRIPS)
+
+        self.assertEqual(document["lookups"]["ships"], ["National Geographic Endurance"])
+        self.assertEqual(document["lookups"]["destinations"], ["Antarctica", "Falklands"])
+        self.assertEqual(document["trips"][1]["destinations"], [1])
+
+        departure = document["trips"][0]["departures"][0]
+        self.assertEqual((departure["start"], departure["end"]), ("2025-12-01", "2025-12-14"))
+        self.assertEqual(departure["categories"][0]["price"], 12345)
+        self.assertEqual(departure["categories"][0]["cabins"], ["301", "302"])
+        self.assertIsNone(departure["categories"][1]["price"])
+
+    def test_round_trip_restores_current_shape(self):
+        """Test that the converter turns a normalized document back into the original trip list."""
+        self.assertEqual(denormalize_trips(normalize_trips(TRIPS)), TRIPS)
+
+    def test_unknown_schema_version_is_rejected(self):
+        """Test that documents from an unknown schema version are refused instead of misread."""
+        with self.assertRaises(ValueError):
+            denormalize_trips({**normalize_trips(TRIPS), "schema_version": 99})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from src.profiling import SlowPageProfiler
+
+class FakeTracing:
+    def __init__(self):
+        self.started = 0
+        self.options: dict = {}
+        self.chunks: list[str | None] = []
+
+    def start(self, **kwargs):
+        self.started += 1
+        self.options = kwargs
+
+    def start_chunk(self, title=None):
+        pass
+
+    def stop_chunk(self, path=None):
+        self.chunks.append(path)
+        if path:
+            with open(path, "wb") as f:
+                f.write(b"x" * 1024)
+
+class FakePage:
+    def __init__(self):
+        self.context = type("Context", (), {"tracing": FakeTracing()})()
+
+class TestSlowPageProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.page = FakePage()
+        self.tracing = self.page.context.tracing
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _profiler(self, **kwargs) -> SlowPageProfiler:
+        return SlowPageProfiler(enabled=True, folder=self.tmp.name, **{"min_samples": 3, "slow_percentile": 0.9, **kwargs})
+
+    def test_only_slow_or_retried_pages_are_kept(self):
+        """Test that fast pages discard their trace chunk while outliers and retries keep theirs."""
+        profiler = self._profiler()
+        for i in range(3):
+            with profiler.profile(self.page, "fetch_categories", f"fast-{i}"):
+                pass
+        with profiler.profile(self.page, "fetch_categories", "slow"):
+            time.sleep(0.05)
+        with profiler.profile(self.page, "fetch_categories", "retried") as call:
+            call.retried = True
+
+        self.assertEqual(self.tracing.started, 1)
+        self.assertEqual(self.tracing.chunks[:3], [None, None, None])
+        kept = sorted(os.listdir(self.tmp.name))
+        self.assertEqual(len(kept), 2)
+        with open(os.path.join(self.tmp.name, kept[0], "meta.json")) as f:
+            self.assertEqual(json.load(f)["reason"], "slow")
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, kept[0], "trace.zip")))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, kept[1], "profile.pstats")))
+
+    def test_failures_are_kept_and_oldest_profiles_evicted(self):
+        """Test that a raising call is kept, and the folder stays under its size bound."""
+        profiler = self._profiler(max_mb=0.004)  # room for roughly one kept profile
+        for i in range(3):
+            with self.assertRaises(RuntimeError), profiler.profile(self.page, "fetch_departures", f"trip-{i}"):
+                raise RuntimeError("drawer never opened")
+
+        self.assertEqual(profiler.kept, 3)
+        self.assertGreater(profiler.evicted, 0)
+        remaining = os.listdir(self.tmp.name)
+        self.assertLess(len(remaining), 3)
+
+    def test_disabled_profiler_does_nothing(self):
+        """Test that the default (disabled) profiler never touches tracing or the folder."""
+        profiler = SlowPageProfiler(enabled=False, folder=self.tmp.name)
+        with profiler.profile(self.page, "fetch_categories", "x") as call:
+            call.retried = True
+        self.assertEqual(self.tracing.started, 0)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_consumer_time_is_excluded_and_screenshots_are_opt_in(self):
+        """Test that paused time is left out of the duration, and the default trace records no screenshots."""
+        profiler = self._profiler()
+        with profiler.profile(self.page, "fetch_departures", "trip") as call:
+            with call.paused():
+                time.sleep(0.05)
+        self.assertLess(call.duration_s, 0.04)
+        self.assertEqual(self.tracing.options, {"screenshots": False, "snapshots": True})
+
+        untraced = FakePage()
+        with self._profiler(trace="off").profile(untraced, "fetch_departures", "trip"):
+            pass
+        self.assertEqual(untraced.context.tracing.started, 0)
+
+if __name__ == "__main__":
+    unittest.main()
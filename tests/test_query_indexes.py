@@ -0,0 +1,35 @@
+import unittest
+from src.query_indexes import build_indexes, price_bucket
+
+def _departure(start: str, ship: str, prices: list[str], cabins: int) -> dict:
+    return {"start_date": start, "end_date": start, "ship": ship, "booking_url": f"/book/{start}",
+            "categories": [{"price": price, "num_cabins": cabins if i == 0 else 0} for i, price in enumerate(prices)]}
+
+TRIPS = [
+    {"trip_name": "A", "destinations": "Antarctica|Falklands",
+     "departures": [_departure("2025 Dec 1", "Endurance", ["$12,000", "$9,500"], 3),
+                    _departure("2026 Jan 5", "Resolution", ["Unknown"], 0)]},
+    {"trip_name": "B", "destinations": "Falklands",
+     "departures": [_departure("2025 Dec 20", "Endurance", ["$31,000"], 5)]},
+]
+
+class TestQueryIndexes(unittest.TestCase):
+
+    def test_indexes_reference_departures_by_position(self):
+        """Test that every index maps its key to [trip, departure] positions in the trip list."""
+        indexes = build_indexes(TRIPS)
+
+        self.assertEqual(indexes["by_destination"]["Falklands"], [[0, 0], [0, 1], [1, 0]])
+        self.assertEqual(indexes["by_ship"]["Endurance"], [[0, 0], [1, 0]])
+        self.assertEqual(list(indexes["by_month"]), ["2025-12", "2026-01"])
+        self.assertEqual(indexes["by_price"], {"5000-9999": [[0, 0]], "unknown": [[0, 1]], "30000+": [[1, 0]]})
+        self.assertEqual(indexes["cabins_available"]["departures"], [[1, 0, 5], [0, 0, 3]])
+
+    def test_price_bucket_bounds(self):
+        """Test bucket edges: lower bounds are inclusive and upper bounds exclusive."""
+        self.assertEqual(price_bucket(4999), "0-4999")
+        self.assertEqual(price_bucket(5000), "5000-9999")
+        self.assertIsNotNone(price_bucket(None))
+
+if __name__ == "__main__":
+    unittest.main()
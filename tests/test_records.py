@@ -0,0 +1,51 @@
+import unittest
+from datetime import date
+from src.records import Category, Departure, Trip, trips_from_json, trips_to_json
+from tests.test_normalized_schema import TRIPS
+from tests.test_query_indexes import TRIPS as INDEXED_TRIPS
+from tests.test_save_trips import _trips
+
+class TestRecords(unittest.TestCase):
+
+    def test_round_trip_restores_current_shape(self):
+        """Test that typed records serialize back to the exact trip_list.json shape."""
+        self.assertEqual(trips_to_json(trips_from_json(TRIPS)), TRIPS)
+
+    def test_fields_are_parsed_once(self):
+        """Test that dates, prices, occupancy and cabins are typed, with display text only kept when needed."""
+        departure = trips_from_json(TRIPS)[0].departures[0]
+
+        self.assertEqual((departure.start, departure.end), (date(2025, 12, 1), date(2025, 12, 14)))
+        self.assertIsNone(departure.start_text)
+        self.assertEqual([(c.price, c.price_text) for c in departure.categories], [(12345, None), (None, "Unknown")])
+        self.assertEqual(departure.categories[0].occupancy, 2)
+        self.assertEqual(departure.categories[0].cabins, ("301", "302"))
+        self.assertEqual((departure.min_price, departure.available_cabins), (12345, 2))
+
+    def test_records_are_slotted_and_share_repeated_strings(self):
+        """Test that records have no per-instance dict and repeated values are interned."""
+        trips = trips_from_json(TRIPS)
+        self.assertFalse(hasattr(trips[0], "__dict__"))
+        self.assertIs(trips[0].departures[0].ship, trips[1].departures[0].ship)
+
+    def test_unparsed_values_and_phase1_departures_round_trip(self):
+        """Test that zero-padded dates, pending categories and shard positions survive a round trip."""
+        trip = {"trip_name": "A", "url": "u", "image_url": "", "destinations": "", "_position": [0, 3],
+                "departures": [{"start_date": "2030 May 02", "end_date": "2030 May 12", "ship": None,
+                                "booking_url": "b"}]}
+        record = Trip.from_dict(trip)
+
+        self.assertEqual(record.departures[0].start, date(2030, 5, 2))
+        self.assertIsNone(record.departures[0].categories)
+        self.assertEqual(record.to_dict(), trip)
+        self.assertEqual(Departure.from_dict({}).to_dict(), {})
+
+    def test_partial_records_round_trip_losslessly(self):
+        """Test that omitted keys stay omitted and a num_cabins without cabin numbers is kept."""
+        for trips in (TRIPS, INDEXED_TRIPS, _trips()):
+            self.assertEqual(trips_to_json(trips_from_json(trips)), trips)
+
+        category = {"price": "$10,000", "num_cabins": 2}
+        record = Category.from_dict(category)
+        self.assertEqual((record.num_cabins, record.cabins, record.deck), (2, (), "Unknown"))
+        self.assertEqual(record.to_dict(), category)
@@ -0,0 +1,31 @@
+import unittest
+from src.resource_blocking import ResourceBlocker
+
+class TestResourceBlocker(unittest.TestCase):
+
+    def setUp(self):
+        self.blocker = ResourceBlocker(profile="lean", allowlist=(".svg",))
+
+    def test_blocks_heavy_resource_types_and_trackers(self):
+        """Test that images, fonts and tracker domains are aborted."""
+        self.assertEqual(self.blocker.block_reason("https://images.example.com/trip.jpg", "image"), "image")
+        self.assertEqual(self.blocker.block_reason("https://www.expeditions.com/fonts/a.woff2", "font"), "font")
+        self.assertEqual(self.blocker.block_reason("https://www.googletagmanager.com/gtm.js", "script"),
+                         "tracker:googletagmanager.com")
+
+    def test_allows_documents_scripts_and_allowlist(self):
+        """Test that the booking UI's own scripts and allowlisted URLs load."""
+        self.assertIsNone(self.blocker.block_reason("https://www.expeditions.com/book/cabins?departure=X", "document"))
+        self.assertIsNone(self.blocker.block_reason("https://www.expeditions.com/_next/static/app.js", "script"))
+        self.assertIsNone(self.blocker.block_reason("https://www.expeditions.com/icons/pax.svg", "image"))
+        # A look-alike host is not treated as the tracker domain
+        self.assertIsNone(self.blocker.block_reason("https://notgoogletagmanager.com/x.js", "script"))
+
+    def test_off_profile_and_unknown_profile(self):
+        """Test that the 'off' profile blocks nothing and unknown profiles are rejected."""
+        self.assertIsNone(ResourceBlocker(profile="off").block_reason("https://a.com/x.png", "image"))
+        with self.assertRaises(ValueError):
+            ResourceBlocker(profile="aggressive")
+
+if __name__ == "__main__":
+    unittest.main()
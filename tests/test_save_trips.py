@@ -0,0 +1,254 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src import save_trips
+from src.save_trips import HASH_METADATA_KEY, S3_BUCKET_NAME, S3_KEY, compute_delta, content_hash, publish_trips
+from tests.support import FakeS3
+
+def _trips(price: str = "$10,000") -> list[dict]:
+    return [{
+        "trip_name": "Galápagos",
+        "url": "/expeditions/galapagos/",
+        "departures": [
+            {"booking_url": "/book/1", "start_date": "2025 Jun 1", "end_date": "2025 Jun 8",
+             "categories": [{"category_name": "Cat 1", "deck": "Main", "price": price, "num_cabins": 2}]},
+            {"booking_url": "/book/2", "start_date": "2025 Jul 1", "end_date": "2025 Jul 8", "categories": []},
+        ],
+    }]
+
+class TestContentHashPublishing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.s3 = FakeS3()
+        patches = [
+            mock.patch.object(save_trips, "JSON_FILENAME", os.path.join(self.tmp.name, "trip_list.json")),
+            mock.patch.object(save_trips, "DELTA_FILENAME", os.path.join(self.tmp.name, "trip_list.delta.json")),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_content_hash_ignores_key_order(self):
+        """Test that the canonical hash only depends on content, not dict ordering."""
+        self.assertEqual(content_hash([{"a": 1, "b": 2}]), content_hash([{"b": 2, "a": 1}]))
+        self.assertNotEqual(content_hash(_trips()), content_hash(_trips("$9,000")))
+
+    def test_unchanged_trips_skip_upload(self):
+        """Test that republishing identical content uploads nothing and reports no change."""
+        self.assertTrue(publish_trips(_trips(), self.s3))
+        self.assertEqual(self.s3.uploads, [S3_KEY, "trip_list.delta.json"])
+
+        self.assertFalse(publish_trips(_trips(), self.s3))
+        self.assertEqual(len(self.s3.uploads), 2)
+
+    def test_legacy_object_without_metadata_matches_by_etag(self):
+        """Test that an earlier upload without hash metadata is recognized through its MD5 ETag."""
+        save_trips.write_json(_trips(), save_trips.JSON_FILENAME)
+        with open(save_trips.JSON_FILENAME, "rb") as f:
+            self.s3.put_object(Bucket=S3_BUCKET_NAME, Key=S3_KEY, Body=f.read())
+
+        self.assertFalse(publish_trips(_trips(), self.s3))
+
+    def test_changed_trips_upload_full_file_and_delta(self):
+        """Test that a price change republishes with new hash metadata and a delta naming the category."""
+        publish_trips(_trips(), self.s3)
+        self.assertTrue(publish_trips(_trips("$9,000"), self.s3))
+
+        head = self.s3.head_object(Bucket=S3_BUCKET_NAME, Key=S3_KEY)
+        self.assertEqual(head["Metadata"][HASH_METADATA_KEY], content_hash(_trips("$9,000")))
+
+        delta = json.loads(self.s3.get_object(Bucket=S3_BUCKET_NAME, Key="trip_list.delta.json")["Body"].read())
+        self.assertEqual(delta["added"], [])
+        self.assertEqual(delta["removed"], [])
+        self.assertEqual(len(delta["changed"]), 1)
+        change = delta["changed"][0]
+        self.assertEqual(change["booking_url"], "/book/1")
+        self.assertEqual(change["categories_changed"][0]["after"]["price"], "$9,000")
+
+    def test_delta_lists_added_and_removed_departures(self):
+        """Test that departures are matched by trip URL and booking URL."""
+        previous = _trips()
+        current = _trips()
+        current[0]["departures"][1]["booking_url"] = "/book/3"
+
+        delta = compute_delta(previous, current)
+
+        self.assertEqual([d["booking_url"] for d in delta["added"]], ["/book/3"])
+        self.assertEqual([d["booking_url"] for d in delta["removed"]], ["/book/2"])
+        self.assertEqual(delta["changed"], [])
+
+    def test_write_only_role_still_publishes_every_layout(self):
+        """Test that a 403 on reading the published copies uploads anyway instead of failing the run."""
+        s3 = FakeS3(read_denied=True)
+        folder = self.tmp.name
+        with mock.patch.object(save_trips, "NORMALIZED_FILENAME", os.path.join(folder, "normalized.json")):
+            self.assertTrue(publish_trips(_trips(), s3))
+            self.assertTrue(save_trips.publish_split(_trips(), s3, os.path.join(folder, "trips")))
+            self.assertTrue(save_trips.publish_normalized(_trips(), s3))
+            self.assertTrue(save_trips.publish_indexes(_trips(), s3, os.path.join(folder, "indexes")))
+
+        self.assertIn(S3_KEY, s3.uploads)
+        self.assertIn("trips/manifest.json", s3.uploads)
+        self.assertIn("trip_list.normalized.json", s3.uploads)
+        self.assertIn("indexes/by_month.json", s3.uploads)
+
+    def test_unwritable_output_folder_is_reported_not_raised(self):
+        """Test that a permission error writing the local file is logged and nothing is uploaded."""
+        with mock.patch.object(save_trips, "write_json", side_effect=PermissionError("read-only")):
+            self.assertFalse(publish_trips(_trips(), self.s3))
+        self.assertEqual(self.s3.uploads, [])
+
+class TestSplitOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "trips")
+        self.s3 = FakeS3()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_manifest_index_and_details_round_trip(self):
+        """Test that the gzipped index summarizes each trip and its detail file holds the full trip."""
+        manifest = save_trips.write_split_output(_trips(), self.folder, use_brotli=False)
+
+        self.assertNotIn("file", manifest["index"]["encodings"]["gzip"])  # served at "path"
+        with open(os.path.join(self.folder, manifest["index"]["path"] + ".gz"), "rb") as f:
+            index = json.loads(gzip.decompress(f.read()))
+        self.assertEqual(index[0]["min_price"], 10000)
+        self.assertEqual(index[0]["departure_dates"], ["2025 Jun 1", "2025 Jul 1"])
+
+        detail = manifest["trips"][index[0]["id"]]
+        self.assertEqual(detail["path"], index[0]["detail"])
+        with open(os.path.join(self.folder, detail["path"] + ".gz"), "rb") as f:
+            raw = gzip.decompress(f.read())
+        self.assertEqual(hashlib.sha256(raw).hexdigest(), detail["sha256"])
+        self.assertEqual(json.loads(raw), _trips()[0])
+
+    def test_publish_split_sets_headers_and_skips_unchanged(self):
+        """Test that files go up gzip-encoded with cache headers, and an unchanged run uploads nothing."""
+        self.assertTrue(save_trips.publish_split(_trips(), self.s3, self.folder))
+
+        index_key = next(key for key in self.s3.uploads if "/index." in key)
+        index_object = self.s3.objects[(S3_BUCKET_NAME, index_key)]
+        self.assertEqual(index_object["ContentEncoding"], "gzip")
+        self.assertEqual(index_object["CacheControl"], save_trips.IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(self.s3.uploads[-1], "trips/manifest.json")
+
+        # Every object the manifest names can be fetched; the gzip variant is the object at "path"
+        manifest = json.loads(gzip.decompress(self.s3.objects[(S3_BUCKET_NAME, "trips/manifest.json")]["Body"]))
+        for entry in [manifest["index"], *manifest["trips"].values()]:
+            names = [entry["path"], *(variant["file"] for variant in entry["encodings"].values() if "file" in variant)]
+            for name in names:
+                self.assertIn((S3_BUCKET_NAME, f"trips/{name}"), self.s3.objects)
+
+        uploads = len(self.s3.uploads)
+        self.assertFalse(save_trips.publish_split(_trips(), self.s3, self.folder))
+        self.assertEqual(len(self.s3.uploads), uploads)
+
+        # Only the changed trip's detail, the index and the manifest are re-sent
+        self.assertTrue(save_trips.publish_split(_trips("$9,000"), self.s3, self.folder))
+        self.assertEqual(len(self.s3.uploads) - uploads, 3)
+
+class TestQueryIndexPublishing(unittest.TestCase):
+
+    def test_indexes_upload_once_per_content(self):
+        """Test that index files carry the source hash and are skipped when the trip list is unchanged."""
+        s3 = FakeS3()
+        with tempfile.TemporaryDirectory() as folder:
+            self.assertTrue(save_trips.publish_indexes(_trips(), s3, folder))
+            uploads = len(s3.uploads)
+            self.assertFalse(save_trips.publish_indexes(_trips(), s3, folder))
+            self.assertEqual(len(s3.uploads), uploads)
+
+            body = json.loads(s3.get_object(Bucket=S3_BUCKET_NAME, Key="indexes/by_month.json")["Body"].read())
+        self.assertEqual(body["source_sha256"], content_hash(_trips()))
+        self.assertEqual(body["index"], {"2025-06": [[0, 0]], "2025-07": [[0, 1]]})
+
+class TestStreamingPublish(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.s3 = FakeS3(min_part_size=1024)
+        for name in ("JSON_FILENAME", "DELTA_FILENAME"):
+            patch = mock.patch.object(save_trips, name, os.path.join(self.tmp.name, f"{name}.json"))
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.trips = [{**_trips()[0], "trip_name": f"Trip {n}", "url": f"/expeditions/{n}/"} for n in range(20)]
+
+    def stream(self, trips: list[dict]) -> save_trips.StreamingTripPublisher:
+        publisher = save_trips.StreamingTripPublisher(self.s3, part_size=1024)
+        for trip in trips:
+            publisher.append(trip)
+        return publisher
+
+    def test_writer_matches_write_json_and_content_hash(self):
+        """Test that the streamed file is the same bytes as a one-shot dump, with the same content hash."""
+        for trips in (self.trips, []):
+            expected = os.path.join(self.tmp.name, "expected.json")
+            save_trips.write_json(trips, expected)
+            writer = save_trips.TripListWriter(os.path.join(self.tmp.name, "streamed.json"))
+            for trip in trips:
+                writer.append(trip)
+
+            self.assertEqual(writer.close(), content_hash(trips))
+            with open(expected, "rb") as f, open(writer.path, "rb") as g:
+                self.assertEqual(g.read(), f.read())
+
+    def test_parts_are_sent_during_the_scrape_and_committed_at_the_end(self):
+        """Test that parts upload before finish, and the object only appears, with hash metadata, at commit."""
+        publisher = self.stream(self.trips)
+
+        upload = next(iter(self.s3.multipart.values()))
+        publisher.upload._parts[-1].result()
+        self.assertGreater(len(upload["Parts"]), 1)
+        self.assertNotIn((S3_BUCKET_NAME, S3_KEY), self.s3.objects)
+
+        self.assertTrue(publisher.finish(self.trips))
+        with open(save_trips.JSON_FILENAME, "rb") as f:
+            published = self.s3.objects[(S3_BUCKET_NAME, S3_KEY)]
+            self.assertEqual(published["Body"], f.read())
+        self.assertEqual(published["Metadata"][HASH_METADATA_KEY], content_hash(self.trips))
+        self.assertEqual(self.s3.multipart, {})
+        self.assertEqual(sorted(key for _, key in self.s3.objects), sorted([S3_KEY, "trip_list.delta.json"]))
+        with open(save_trips.DELTA_FILENAME, encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["added"]), sum(len(t["departures"]) for t in self.trips))
+
+    def test_unchanged_stream_is_aborted(self):
+        """Test that streaming the published content again discards the parts and publishes nothing."""
+        publish_trips(self.trips, self.s3)
+        uploads = list(self.s3.uploads)
+
+        self.assertFalse(self.stream(self.trips).finish(self.trips))
+        self.assertEqual(self.s3.uploads, uploads)
+        self.assertEqual(self.s3.multipart, {})
+
+    def test_failed_copy_and_failed_finish_leave_nothing_behind(self):
+        """Test that a failed final copy deletes the staging object, and abort() after a raise in finish() drops the parts."""
+        from botocore.exceptions import ClientError
+        publisher = self.stream(self.trips)
+        denied = ClientError({"Error": {"Code": "AccessDenied", "Message": "Denied"}}, "CopyObject")
+        with mock.patch.object(self.s3, "copy_object", side_effect=denied), self.assertLogs(level="ERROR"):
+            self.assertFalse(publisher.finish(self.trips))
+        self.assertEqual(self.s3.objects, {})
+        self.assertEqual(self.s3.multipart, {})
+
+        publisher = self.stream(self.trips)
+        with mock.patch.object(save_trips, "_published_hash", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                publisher.finish(self.trips)
+        publisher.abort()
+        self.assertEqual(self.s3.objects, {})
+        self.assertEqual(self.s3.multipart, {})
+
+if __name__ == "__main__":
+    unittest.main()
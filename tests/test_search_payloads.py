@@ -0,0 +1,116 @@
+import json
+import os
+import unittest
+from types import SimpleNamespace
+from src import search_payloads
+from src.search_payloads import SearchPayloadCollector, trips_from_payloads
+from tests.support import chromium_available, local_server
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "search_payload.json")
+
+# Minimal stand-in for the listing page: queries the search API and renders one card per hit
+LISTING_HTML = b"""<html><body><div id="hits"></div><script>
+fetch("/1/indexes/*/queries?x-algolia-application-id=TEST", {
+    method: "POST",
+    headers: {"content-type": "application/json"},
+    body: JSON.stringify({requests: [{indexName: "trips", params: "hitsPerPage=2&page=0"}]}),
+}).then((r) => r.json()).then((data) => {
+    for (const hit of data.results[0].hits) {
+        const card = document.createElement("div");
+        card.className = "hit_container__abc";
+        card.textContent = hit.name;
+        document.getElementById("hits").appendChild(card);
+    }
+});
+</script></body></html>"""
+
+class TestSearchPayloads(unittest.TestCase):
+
+    def setUp(self):
+        with open(FIXTURE, encoding="utf-8") as f:
+            self.payloads = json.load(f)
+        self.original_end_date = search_payloads.END_DATE
+        search_payloads.END_DATE = "2030-12-31"
+
+    def tearDown(self):
+        search_payloads.END_DATE = self.original_end_date
+
+    def test_trips_match_dom_shape(self):
+        """Test that recorded payloads produce trips in the same shape as the DOM path."""
+        trips = trips_from_payloads(self.payloads, limit=10)
+
+        self.assertEqual([t["trip_name"] for t in trips],
+                         ["Galápagos: Wildlife Up Close", "Land of the Pharaohs", "Alaska's Inside Passage"])
+        galapagos = trips[0]
+        self.assertEqual(galapagos["url"], "https://www.expeditions.com/expedition/galapagos-wildlife")
+        self.assertEqual(galapagos["image_url"], "https://images.example.com/galapagos.jpg")
+        self.assertEqual(galapagos["destinations"], "Galápagos|South America")
+        # Duplicate booking URLs are dropped and departures past END_DATE are filtered
+        self.assertEqual(galapagos["departures"], [{
+            "start_date": "2030 May 2",
+            "end_date": "2030 May 12",
+            "ship": "National Geographic Endeavour II",
+            "booking_url": "https://www.expeditions.com/book/cabins?departure=GAL-300502",
+        }])
+        self.assertEqual(trips[1]["departures"][0]["ship"], "Land Expedition")
+        self.assertEqual(trips[1]["departures"][0]["start_date"], "2030 May 11")
+
+    def test_limit_and_unmatched_payloads(self):
+        """Test that the limit is honoured and unrelated payloads yield nothing (DOM fallback)."""
+        self.assertEqual(len(trips_from_payloads(self.payloads, limit=1)), 1)
+        self.assertEqual(trips_from_payloads([{"results": [{"hits": [{"objectID": "1"}]}]}, {"ok": True}], limit=10), [])
+
+    def test_replay_pairs_request_with_its_own_payload(self):
+        """Test that a later response with an unreadable body does not become the replayed request."""
+        class FakeResponse:
+            def __init__(self, url, payload):
+                self.url = url
+                self.payload = payload
+                self.request = SimpleNamespace(method="POST", headers={}, post_data_json={"requests": [{"page": 0}]})
+
+            def json(self):
+                if self.payload is None:
+                    raise ValueError("body unavailable")
+                return self.payload
+
+        posted = []
+        first_page = {"results": [{**self.payloads[0]["results"][0], "page": 0, "nbPages": 2}]}
+        page = SimpleNamespace(on=lambda *args: None, request=SimpleNamespace(
+            post=lambda url, **kwargs: posted.append(url) or FakeResponse(url, self.payloads[1])))
+        collector = SearchPayloadCollector(page)
+        collector.responses = [FakeResponse("https://search/queries", first_page),
+                               FakeResponse("https://search/other", None)]
+
+        trips = collector.fetch_trips(limit=10)
+
+        self.assertEqual(posted, ["https://search/queries"])
+        self.assertEqual(len(trips), 3)
+
+    @unittest.skipUnless(chromium_available(), "Playwright Chromium is not installed")
+    def test_collector_against_local_server(self):
+        """Test interception and page replay against a local stand-in for the search API."""
+        from playwright.sync_api import sync_playwright
+
+        def queries(query, body):
+            params = json.loads(body)["requests"][0]["params"]
+            page_number = 1 if "page=1" in params else 0
+            return 200, "application/json", json.dumps(self.payloads[page_number]).encode()
+
+        routes = {
+            ("GET", "/book"): lambda query, body: (200, "text/html", LISTING_HTML),
+            ("POST", "/1/indexes/*/queries"): queries,
+        }
+        with local_server(routes) as base_url, sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            collector = SearchPayloadCollector(page)
+            page.goto(f"{base_url}/book")
+            page.wait_for_selector("[class^='hit_container__']")
+            trips = collector.fetch_trips(limit=10)
+            browser.close()
+
+        self.assertEqual(len(trips), 3)
+        self.assertEqual(trips[2]["trip_name"], "Alaska's Inside Passage")
+
+if __name__ == "__main__":
+    unittest.main()
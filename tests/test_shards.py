@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from src import shards
+
+def make_trip(name, urls):
+    return {"trip_name": name, "url": f"https://www.expeditions.com/expedition/{name}",
+            "departures": [{"booking_url": url, "categories": []} for url in urls]}
+
+class TestShards(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_folder = shards.SHARD_FOLDER
+        shards.SHARD_FOLDER = os.path.join(self.tmp.name, "shards")
+
+    def tearDown(self):
+        shards.SHARD_FOLDER = self.original_folder
+        self.tmp.cleanup()
+
+    def test_parse_shard(self):
+        """Test the i/N shard spec."""
+        self.assertEqual(shards.parse_shard("2/4"), (2, 4))
+        for spec in ("4/4", "-1/2", "1", "a/b", "0/0"):
+            with self.assertRaises(ValueError):
+                shards.parse_shard(spec)
+
+    def test_every_trip_lands_in_exactly_one_stable_shard(self):
+        """Test that the partition is deterministic and complete."""
+        keys = [f"https://www.expeditions.com/expedition/trip-{i}" for i in range(50)]
+        assignments = [shards.shard_of(key, 3) for key in keys]
+        self.assertEqual(assignments, [shards.shard_of(key, 3) for key in keys])
+        self.assertEqual(set(assignments), {0, 1, 2})
+
+    def test_merge_restores_listing_order(self):
+        """Test that merged shards match the unsharded trip list exactly."""
+        listing = [make_trip(f"trip-{i}", [f"/book?d={i}a", f"/book?d={i}b"]) for i in range(10)]
+        for count in (1, 3):
+            parts = {index: [] for index in range(count)}
+            for position, trip in enumerate(listing):
+                shard_trip = dict(trip, _position=position)
+                parts[shards.shard_of(shards.trip_key(trip), count)].append(shard_trip)
+            for index, trips in parts.items():
+                shards.write_shard(trips, index, count)
+
+            self.assertEqual(shards.merge_shards(count), listing)
+
+    def test_merge_caps_window_merged_trips_at_the_run_limit(self):
+        """Test that sharded date windows keep the same first `limit` trips as an unsharded run."""
+        windows = [[make_trip(f"w{w}-trip-{i}", [f"/book?d={w}{i}"]) for i in range(4)] for w in range(3)]
+        listing = [dict(trip, _position=[w, position]) for w, trips in enumerate(windows)
+                   for position, trip in enumerate(trips)]
+        parts = {index: [] for index in range(3)}
+        for trip in listing:
+            parts[shards.shard_of(shards.trip_key(trip), 3)].append(dict(trip))
+        for index, trips in parts.items():
+            shards.write_shard(trips, index, 3, limit=5)
+
+        expected = [{k: v for k, v in trip.items() if k != "_position"} for trip in listing[:5]]
+        self.assertEqual(shards.merge_shards(3), expected)
+
+    def test_merge_requires_every_shard(self):
+        """Test that a missing shard file fails the merge instead of publishing partial data."""
+        shards.write_shard([dict(make_trip("a", []), _position=0)], 0, 2)
+        with self.assertRaises(FileNotFoundError):
+            shards.merge_shards(2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.config import BASE_URL
+from src.http_tier import categories_from_state, extract_embedded_states
+from src.snapshot_parser import parse_categories, parse_departures, parse_listing, reparse_run
+from src.snapshots import SnapshotWriter
+from src.trip_parser import TripParser
+
+# Static DOM as captured after "See departure dates" and "Show more" were clicked
+TRIP_CARD = """
+<div class="hit_container__a1">
+  <a class="card_name__b2" href="/expedition/galapagos">Galápagos Wildlife</a>
+  <img class="card_image__c3" src="https://images.example.com/galapagos.jpg">
+  <div class="card_list__d4"><span class="card_destination__e5">Galápagos</span>
+    <span class="card_destination__e5">South America</span></div>
+  <div class="hits_departureHitsContainer__f6"><ul>
+    <li><span data-testid="departure-hit-year">2030</span><p>May 02</p><p>May 12</p><p>$9,990</p>
+      <i>National Geographic Endeavour II</i><a href="/book/galapagos/300502">Book</a></li>
+    <li><p>Jun 01</p><p>Jun 11</p><div data-land-expedition="true"></div><a href="/book/galapagos/300601">Book</a></li>
+    <li><p>Dec 01</p><p>Dec 11</p><i>National Geographic Endeavour II</i><a href="/book/galapagos/301201">Book</a></li>
+  </ul></div>
+</div>
+"""
+
+HIDDEN_CARD = """
+<div class="hit_container__a1"><a class="card_name__b2" href="/expedition/secret">Secret</a>
+  <div class="card_displayNone__g7"></div></div>
+"""
+
+LISTING = f"<html><body>{TRIP_CARD}{HIDDEN_CARD}</body></html>"
+
+# The same card in a later date window only lists that window's departures
+JUNE_CARD = TRIP_CARD.split("<ul>")[0] + """<ul>
+    <li><span data-testid="departure-hit-year">2030</span><p>Jun 01</p><p>Jun 11</p>
+      <i>National Geographic Endeavour II</i><a href="/book/galapagos/300601">Book</a></li></ul></div></div>"""
+
+# A booking page served over HTTP, with cabins in its embedded state
+JUNE_BOOKING_STATE = '<script id="__NEXT_DATA__" type="application/json">' + json.dumps({"categories": [
+    {"categoryName": "Category 4", "deckName": "Upper Deck", "occupancy": 2, "price": 14990, "status": "Available",
+     "availableCabins": ["401"]}]}) + "</script>"
+
+# Another trip booked through the same departure, and a trip that only the second window lists
+TWIN_CARD = TRIP_CARD.replace('href="/expedition/galapagos">Galápagos Wildlife', 'href="/expedition/twin">Galápagos Twin')
+ARCTIC_CARD = TRIP_CARD.replace("galapagos", "arctic").replace("Galápagos Wildlife", "Arctic")
+
+SEARCH_PAYLOADS = os.path.join(os.path.dirname(__file__), "fixtures", "search_payload.json")
+
+def category_card(name: str, button: str) -> str:
+    return f"""
+<div data-testid="category-card"><span>Main Deck</span><h3>{name}</h3>
+  <div class="pax-icons_h8"><svg></svg><svg></svg> <span>Double</span></div>
+  <h2>$12,990</h2><button>{button}</button></div>
+"""
+
+BOOKING_PAGE = f"<html><body>{category_card('Category 1', 'See available cabins')}" \
+               f"{category_card('Category 2', 'Join Waitlist')}</body></html>"
+
+DRAWER = """<div data-testid="cabin-card"><p>Cabin</p><p>101</p></div>
+<div data-testid="cabin-card"><p>103</p><p>101</p></div>"""
+
+class TestSnapshotParser(unittest.TestCase):
+
+    def test_departures_follow_live_parser_rules(self):
+        """Test that year headers carry over, land expeditions are named and the END_DATE cutoff stops parsing."""
+        departures = parse_departures(TRIP_CARD, end_date="2030-08-31")
+        self.assertEqual(departures, [
+            {"start_date": "2030 May 02", "end_date": "2030 May 12", "ship": "National Geographic Endeavour II",
+             "booking_url": f"{BASE_URL}/book/galapagos/300502"},
+            {"start_date": "2030 Jun 01", "end_date": "2030 Jun 11", "ship": "Land Expedition",
+             "booking_url": f"{BASE_URL}/book/galapagos/300601"},
+        ])
+
+    def test_categories_match_category_parser_shape(self):
+        """Test that booking snapshots give CategoryParser records with drawer cabins, without waitlisted ones."""
+        self.assertEqual(parse_categories(BOOKING_PAGE, {0: DRAWER}), [{
+            "category_name": "Category 1", "deck": "Main Deck", "occupancy": "2 Person(s)", "cabin_type": "Double",
+            "price": "$12,990", "status": "Available", "cabinNumbers": "101|103", "num_cabins": 2,
+        }])
+
+    def test_reparse_captured_run_in_process_pool(self):
+        """Test that a captured run is rebuilt into trips across worker processes."""
+        with tempfile.TemporaryDirectory() as folder:
+            writer = SnapshotWriter(enabled=True, folder=folder)
+            trip_url = f"{BASE_URL}/expedition/galapagos"
+            writer.save("listing", f"{BASE_URL}/book", LISTING, end_date="2030-08-31", limit=50)
+            writer.save("departures", trip_url, TRIP_CARD, end_date="2030-08-31")
+            writer.save("booking", f"{BASE_URL}/book/galapagos/300502", BOOKING_PAGE)
+            writer.save("drawer", f"{BASE_URL}/book/galapagos/300502#0", DRAWER,
+                        booking_url=f"{BASE_URL}/book/galapagos/300502", category_index=0)
+            writer.save("booking", f"{BASE_URL}/book/galapagos/300601", category_card("Category 9", "Join Waitlist"))
+            self.assertEqual(len(os.listdir(os.path.join(writer.run_folder, "booking"))), 2)
+
+            trips = reparse_run(writer.run_folder, workers=2)
+
+        self.assertEqual(len(trips), 1)  # the hidden trip's secret event page is not captured
+        self.assertEqual(trips[0]["trip_name"], "Galápagos Wildlife")
+        self.assertEqual(trips[0]["destinations"], "Galápagos|South America")
+        # The fully waitlisted June departure is dropped like in a live run
+        self.assertEqual([d["start_date"] for d in trips[0]["departures"]], ["2030 May 02"])
+        self.assertEqual(trips[0]["departures"][0]["categories"][0]["cabinNumbers"], "101|103")
+
+    def test_date_windows_and_pages_read_without_the_dom_are_rebuilt(self):
+        """Test that each window keeps its own departures and HTTP-served booking pages are re-parsed."""
+        with tempfile.TemporaryDirectory() as folder:
+            writer = SnapshotWriter(enabled=True, folder=folder)
+            trip_url = f"{BASE_URL}/expedition/galapagos"
+            for end_date, card in (("2030-05-31", TRIP_CARD), ("2030-08-31", JUNE_CARD)):
+                writer.save("listing", f"{BASE_URL}/book?until={end_date}", f"<html>{card}</html>", end_date=end_date,
+                            limit=50)
+                writer.save("departures", f"{trip_url}|{end_date}", card, trip_url=trip_url, end_date=end_date)
+            writer.save("booking", f"{BASE_URL}/book/galapagos/300502", BOOKING_PAGE)
+            writer.save("drawer", f"{BASE_URL}/book/galapagos/300502#0", DRAWER,
+                        booking_url=f"{BASE_URL}/book/galapagos/300502", category_index=0)
+            writer.save("booking_state", "/book/galapagos/300601", JUNE_BOOKING_STATE)
+
+            trips = reparse_run(writer.run_folder, workers=1)
+
+        self.assertEqual([(d["start_date"], d["categories"][0]["cabinNumbers"]) for d in trips[0]["departures"]],
+                         [("2030 May 02", "101|103"), ("2030 Jun 01", "401")])
+
+    def test_reparsed_date_windows_match_the_live_merge(self):
+        """Test that re-parsing a multi-window run gives the live output: shared departures and the trip limit."""
+        windows = [("2030-05-01", "2030-05-31", [TRIP_CARD, TWIN_CARD]), ("2030-05-31", "2030-08-31", [JUNE_CARD, ARCTIC_CARD])]
+        window_trips = []
+        with tempfile.TemporaryDirectory() as folder:
+            writer = SnapshotWriter(enabled=True, folder=folder)
+            for _, end_date, cards in windows:
+                listing = f"<html>{''.join(cards)}</html>"
+                writer.save("listing", f"{BASE_URL}/book?until={end_date}", listing, end_date=end_date, limit=2)
+                trips = []
+                for card, trip in zip(cards, parse_listing(listing)):
+                    trip.pop("hidden")
+                    writer.save("departures", f"{trip['url']}|{end_date}", card, trip_url=trip["url"], end_date=end_date)
+                    trips.append({**trip, "departures": parse_departures(card, end_date)})
+                window_trips.append(trips)
+            writer.save("booking", f"{BASE_URL}/book/galapagos/300502", BOOKING_PAGE)
+            writer.save("drawer", f"{BASE_URL}/book/galapagos/300502#0", DRAWER,
+                        booking_url=f"{BASE_URL}/book/galapagos/300502", category_index=0)
+            writer.save("booking_state", "/book/galapagos/300601", JUNE_BOOKING_STATE)
+
+            reparsed = reparse_run(writer.run_folder, workers=1)
+
+        # The live run over the same windows, with the same booking pages
+        parser = TripParser()
+        served = iter(window_trips)
+        parser._gather_window = lambda page, start_date, end_date, limit, on_departure: next(served)
+        with patch("src.trip_parser.split_date_window", return_value=[(start, end) for start, end, _ in windows]):
+            live = parser._gather_trips(None, 2)
+        categories = {"300502": parse_categories(BOOKING_PAGE, {0: DRAWER}),
+                      "300601": categories_from_state(extract_embedded_states(JUNE_BOOKING_STATE)[0])}
+        TripParser._apply_categories(live, [categories[d["booking_url"].rsplit("/", 1)[-1]]
+                                            for trip in live for d in trip["departures"]])
+
+        self.assertEqual(reparsed, live)
+        self.assertEqual([(t["trip_name"], [d["start_date"] for d in t["departures"]]) for t in reparsed],
+                         [("Galápagos Wildlife", ["2030 May 02", "2030 Jun 01"]), ("Galápagos Twin", ["2030 May 02"])])
+
+    def test_search_payload_listing_reports_missing_booking_pages(self):
+        """Test that trips from captured search payloads are rebuilt and missing booking pages are logged as errors."""
+        with tempfile.TemporaryDirectory() as folder, open(SEARCH_PAYLOADS, encoding="utf-8") as f:
+            writer = SnapshotWriter(enabled=True, folder=folder)
+            writer.save("search_payloads", f"{BASE_URL}/book", f.read(), end_date="2030-12-31", limit=1)
+
+            with self.assertLogs(level="ERROR") as logs:
+                trips = reparse_run(writer.run_folder, workers=1)
+
+        self.assertEqual(trips[0]["trip_name"], "Galápagos: Wildlife Up Close")
+        self.assertEqual(trips[0]["departures"], [])  # its only departure has no booking page snapshot
+        self.assertIn("1 departures have no booking page snapshot", logs.output[0])
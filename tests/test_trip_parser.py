@@ -1,5 +1,8 @@
 import unittest
-from src.trip_parser import TripParser
+from unittest.mock import patch
+from src.config import split_date_window
+from src.trip_parser import TripCompletion, TripParser
+from src.url_memo import normalize_booking_url
 
 class TestTripParser(unittest.TestCase):
 
@@ -18,5 +21,114 @@ class TestTripParser(unittest.TestCase):
         expected = self.sample_json  # Expected result should match the sample JSON
         self.assertEqual(result, expected)
 
+    def test_apply_categories_keeps_order_and_drops_waitlisted(self):
+        """Test that Phase 2 results are matched to departures in order and waitlist-only departures are removed."""
+        trips = [
+            {"trip_name": "A", "departures": [{"start_date": "2025 May 1"}, {"start_date": "2025 Jun 1"}]},
+            {"trip_name": "B", "departures": [{"start_date": "2025 Jul 1"}]},
+        ]
+        all_categories = [
+            [{"category_name": "Cat 1", "status": "Available"}],
+            [{"category_name": "Cat 2", "status": "Waitlist"}],
+            [{"category_name": "Cat 3", "status": "Available"}],
+        ]
+        TripParser._apply_categories(trips, all_categories)
+
+        self.assertEqual([d["start_date"] for d in trips[0]["departures"]], ["2025 May 1"])
+        self.assertEqual(trips[0]["departures"][0]["categories"][0]["category_name"], "Cat 1")
+        self.assertEqual(trips[1]["departures"][0]["categories"][0]["category_name"], "Cat 3")
+
+    def test_scrape_categories_reuses_completed_departures_in_order(self):
+        """Test that departures finished before a restart are reused without opening a page."""
+        trips = [
+            {"trip_name": "A", "departures": [{"booking_url": "u1"}, {"booking_url": "u2"}]},
+            {"trip_name": "B", "departures": [{"booking_url": "u3"}]},
+        ]
+        parser = TripParser(concurrency=1)
+        parser.completed = {normalize_booking_url(url): [{"category_name": url, "status": "Available"}]
+                            for url in ("u1", "u2", "u3")}
+
+        all_categories = parser._scrape_categories(page=None, trips=trips)
+
+        self.assertEqual([c[0]["category_name"] for c in all_categories], ["u1", "u2", "u3"])
+
+    def test_duplicate_booking_urls_share_one_result(self):
+        """Test that a booking URL listed under several trips is only resolved once."""
+        trips = [
+            {"trip_name": "A", "departures": [{"booking_url": "/book/cabins?departure=X&c=1"}]},
+            {"trip_name": "B", "departures": [{"booking_url": "https://www.expeditions.com/book/cabins?c=1&departure=X#top"}]},
+        ]
+        parser = TripParser(concurrency=1)
+        parser.completed = {normalize_booking_url("/book/cabins?departure=X&c=1"): [{"status": "Available"}]}
+
+        all_categories = parser._scrape_categories(page=None, trips=trips)
+
+        self.assertIs(all_categories[0], all_categories[1])
+        self.assertEqual(parser.memo.avoided, 1)
+
+    def test_finished_trips_stream_in_order(self):
+        """Test that trips are emitted in list order as results arrive, without waitlist-only departures."""
+        trips = [
+            {"trip_name": "A", "departures": [{"booking_url": "u1"}, {"booking_url": "u2"}]},
+            {"trip_name": "B", "departures": []},
+            {"trip_name": "C", "departures": [{"booking_url": "u3"}]},
+        ]
+        all_categories = [[], [], []]
+        emitted = []
+        completion = TripCompletion(trips, all_categories, emitted.append)
+
+        all_categories[2] = [{"status": "Available"}]
+        completion.done(2)
+        all_categories[1] = [{"status": "Waitlist"}]
+        completion.done(1)
+        self.assertEqual(emitted, [])
+
+        all_categories[0] = [{"status": "Available"}]
+        completion.done(0)
+        self.assertEqual([trip["trip_name"] for trip in emitted], ["A", "B", "C"])
+        self.assertEqual(emitted[0]["departures"], [{"booking_url": "u1", "categories": [{"status": "Available"}]}])
+        self.assertEqual(trips[0]["departures"][1], {"booking_url": "u2"})
+
+    def test_split_date_window(self):
+        """Test that sub-windows cover the whole range and share their boundary days."""
+        self.assertEqual(split_date_window("2030-01-01", "2030-01-10", 4),
+                         [("2030-01-01", "2030-01-04"), ("2030-01-04", "2030-01-07"), ("2030-01-07", "2030-01-10")])
+        self.assertEqual(split_date_window("2030-01-01", "2030-01-03", 1),
+                         [("2030-01-01", "2030-01-02"), ("2030-01-02", "2030-01-03")])
+        self.assertEqual(split_date_window("2030-01-01", "2030-01-10", 0), [("2030-01-01", "2030-01-10")])
+
+    def test_date_windows_merge_by_trip_and_booking_url(self):
+        """Test that trips seen in several windows are merged and repeated departures are kept once."""
+        def trip(name, urls):
+            return {"trip_name": name, "url": f"https://x/{name}", "departures": [{"booking_url": u} for u in urls]}
+
+        windows = {
+            "2030-01-01": [trip("A", ["/d1", "/d2"]), trip("B", ["/d3"])],
+            "2030-01-04": [trip("A", ["/d2", "/d4"]), trip("C", ["/d5"])],
+        }
+
+        def fake_window(page, start_date, end_date, limit, on_departure):
+            trips = [dict(t) for t in windows.get(start_date, [])]
+            for t in trips:
+                for departure in t["departures"]:
+                    on_departure(t["trip_name"], departure)
+            return trips
+
+        parser = TripParser()
+        parser._gather_window = fake_window
+        forwarded = []
+        with patch("src.trip_parser.START_DATE", "2030-01-01"), patch("src.trip_parser.END_DATE", "2030-01-08"), \
+                patch("src.trip_parser.DISCOVERY_WINDOW_DAYS", 4):
+            trips = parser._gather_trips(None, 10, lambda name, d: forwarded.append((name, d["booking_url"])))
+
+        self.assertEqual([(t["trip_name"], [d["booking_url"] for d in t["departures"]]) for t in trips],
+                         [("A", ["/d1", "/d2", "/d4"]), ("B", ["/d3"]), ("C", ["/d5"])])
+        self.assertEqual(sorted(forwarded), [("A", "/d1"), ("A", "/d2"), ("A", "/d4"), ("B", "/d3"), ("C", "/d5")])
+
+        with patch("src.trip_parser.START_DATE", "2030-01-01"), patch("src.trip_parser.END_DATE", "2030-01-08"), \
+                patch("src.trip_parser.DISCOVERY_WINDOW_DAYS", 4):
+            capped = parser._gather_trips(None, 2)
+        self.assertEqual([t["trip_name"] for t in capped], ["A", "B"])
+
 if __name__ == "__main__":
     unittest.main()
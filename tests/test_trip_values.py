@@ -0,0 +1,21 @@
+import unittest
+from src.trip_values import min_price, parse_price
+
+class TestTripValues(unittest.TestCase):
+
+    def test_parse_price(self):
+        """Test that display prices become whole-dollar integers and non-prices become None."""
+        self.assertEqual(parse_price("$12,345"), 12345)
+        self.assertEqual(parse_price(" $980 pp"), 980)
+        self.assertIsNone(parse_price("Unknown"))
+        self.assertIsNone(parse_price(None))
+
+    def test_min_price_across_departures(self):
+        """Test that the lowest priced category wins and unpriced ones are ignored."""
+        departures = [{"categories": [{"price": "$5,000"}, {"price": "Unknown"}]},
+                      {"categories": [{"price": "$4,200"}]}, {"categories": []}]
+        self.assertEqual(min_price(departures), 4200)
+        self.assertIsNone(min_price([{"categories": []}]))
+
+if __name__ == "__main__":
+    unittest.main()
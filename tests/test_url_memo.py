@@ -0,0 +1,26 @@
+import unittest
+from src.url_memo import BookingUrlMemo, normalize_booking_url
+
+class TestBookingUrlMemo(unittest.TestCase):
+
+    def test_normalize_booking_url(self):
+        """Test that equivalent booking URLs normalize to the same key."""
+        expected = "https://www.expeditions.com/book/cabins?c=eyJnIjoiIn0%3D&departure=DLAMAZ-250809&productType=AMAZ"
+        self.assertEqual(normalize_booking_url(
+            "/book/cabins/?departure=DLAMAZ-250809&productType=AMAZ&c=eyJnIjoiIn0%3D&utm_source=mail"), expected)
+        self.assertEqual(normalize_booking_url(
+            "https://WWW.expeditions.com/book/cabins?productType=AMAZ&c=eyJnIjoiIn0%3D&departure=DLAMAZ-250809#x"), expected)
+
+    def test_in_flight_and_finished_claims_are_coalesced(self):
+        """Test that only the first claim scrapes and later claims get the shared result."""
+        memo = BookingUrlMemo()
+        self.assertEqual(memo.claim(0, "/book?d=1"), (True, None))
+        self.assertEqual(memo.claim(1, "/book?d=1"), (False, None))
+
+        result = [{"status": "Available"}]
+        self.assertEqual(memo.resolve("/book?d=1", result), [1])
+        self.assertEqual(memo.claim(2, "/book?d=1"), (False, result))
+        self.assertEqual(memo.avoided, 2)
+
+if __name__ == "__main__":
+    unittest.main()
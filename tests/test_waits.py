@@ -0,0 +1,88 @@
+import unittest
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from src import waits
+
+class FakeLocator:
+    def __init__(self, appears):
+        self.appears = appears
+
+    @property
+    def first(self):
+        return self
+
+    def nth(self, index):
+        return self
+
+    def wait_for(self, state, timeout):
+        if not self.appears:
+            raise PlaywrightTimeoutError(f"waiting for {state} exceeded {timeout}ms")
+
+class TestWaits(unittest.TestCase):
+
+    def setUp(self):
+        waits.wait_stats.reset()
+
+    def test_records_waited_time_against_budget(self):
+        """Test that successful waits are recorded against the fixed sleep they replaced."""
+        self.assertTrue(waits.wait_for_state(FakeLocator(True), "attached", 1000, "drawer_open", 6000))
+        self.assertTrue(waits.wait_for_count_increase(FakeLocator(True), 3, 1000, "drawer_open", 6000))
+
+        entry = waits.wait_stats.waits["drawer_open"]
+        self.assertEqual(entry["count"], 2)
+        self.assertEqual(entry["budget_s"], 12.0)
+        self.assertLess(entry["waited_s"], 1.0)
+        self.assertEqual(entry["timeouts"], 0)
+
+    def test_ceiling_returns_false(self):
+        """Test that hitting the ceiling is reported instead of raised."""
+        self.assertFalse(waits.wait_for_state(FakeLocator(False), "detached", 10, "drawer_close", 6000))
+        self.assertEqual(waits.wait_stats.waits["drawer_close"]["timeouts"], 1)
+
+    def test_stable_count_waits_for_cards_to_stop_arriving(self):
+        """Test that the drawer settles only once the card count stops changing, not on the first card."""
+        counts = [0, 1, 3]
+        seen = []
+        locator = type("CountingLocator", (), {"count": lambda self: seen.append(1) or counts[min(len(seen), 3) - 1]})()
+
+        self.assertTrue(waits.wait_for_stable_count(locator, 1000, "drawer_settle", 0, settle_ms=30, poll_ms=10))
+        self.assertGreater(len(seen), 3)  # kept polling after the first and the third card appeared
+        self.assertFalse(waits.wait_for_stable_count(type("Empty", (), {"count": lambda self: 0})(), 30,
+                                                     "drawer_settle", 0, poll_ms=10))
+
+    def test_network_idle_waits_for_the_requests_behind_a_click(self):
+        """Test that the wait ends only after the drawer's request finished and the network stayed quiet."""
+        class FakePage:
+            def __init__(self):
+                self.listeners = {}
+                self.polls = 0
+
+            def on(self, event, handler):
+                self.listeners.setdefault(event, []).append(handler)
+
+            def remove_listener(self, event, handler):
+                self.listeners[event].remove(handler)
+
+            def emit(self, event, request):
+                for handler in self.listeners.get(event, []):
+                    handler(request)
+
+            def wait_for_timeout(self, timeout):
+                self.polls += 1
+                if self.polls == 3:
+                    self.emit("requestfinished", "cabins")
+
+        page = FakePage()
+        with waits.NetworkTracker(page) as network:
+            page.emit("request", "cabins")  # sent by the click
+            self.assertTrue(waits.wait_for_network_idle(network, FakeLocator(True), 1000, "drawer_open", 6000,
+                                                        idle_ms=20, poll_ms=1))
+            self.assertGreater(page.polls, 3)
+            self.assertFalse(network.in_flight)
+
+            page.emit("request", "tracker")
+            self.assertFalse(waits.wait_for_network_idle(network, FakeLocator(True), 30, "drawer_open", 6000, poll_ms=1))
+        self.assertEqual(sum(map(len, page.listeners.values())), 0)
+        self.assertEqual(waits.wait_stats.waits["drawer_open"]["timeouts"], 1)
+
+if __name__ == "__main__":
+    unittest.main()